@@ -0,0 +1,46 @@
+"""trip points and user activity rollups
+
+Revision ID: 173c48267a63
+Revises: ca75b14f49d5
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '173c48267a63'
+down_revision: Union[str, None] = 'ca75b14f49d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('trips', sa.Column('points', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_individuals_user_id'), 'individuals', ['user_id'], unique=False)
+
+    op.create_table(
+        'userActivityRollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('period', sa.Enum('day', 'week', 'month', name='rollup_period_enum'), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('trip_count', sa.Integer(), nullable=False),
+        sa.Column('distance_meters', sa.Float(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'period', 'period_start')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('userActivityRollups')
+    sa.Enum(name='rollup_period_enum').drop(op.get_bind(), checkfirst=True)
+    op.drop_index(op.f('ix_individuals_user_id'), table_name='individuals')
+    op.drop_column('trips', 'points')
@@ -0,0 +1,44 @@
+"""keyset indexes for trip history
+
+Índices para paginar el historial por llave: (user_id, start_time, id) en
+`trips` y (trip_id, trip_start_time, start_time, id) en `activitySegment`,
+que reemplaza al índice anterior sobre (trip_id, trip_start_time).
+
+Postgres no admite CONCURRENTLY sobre tablas particionadas: el índice se
+crea en la tabla padre y en cada partición dentro de la transacción.
+
+Revision ID: 3a97d8340bb9
+Revises: a30940ad5135
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a97d8340bb9'
+down_revision: Union[str, None] = 'a30940ad5135'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_trips_user_id_start_time_id', 'trips', ['user_id', 'start_time', 'id'])
+    op.drop_index('ix_activitySegment_trip_id', table_name='activitySegment')
+    op.create_index(
+        'ix_activitySegment_trip_id', 'activitySegment',
+        ['trip_id', 'trip_start_time', 'start_time', 'id']
+    )
+    op.execute('ANALYZE trips')
+    op.execute('ANALYZE "activitySegment"')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_activitySegment_trip_id', table_name='activitySegment')
+    op.create_index('ix_activitySegment_trip_id', 'activitySegment', ['trip_id', 'trip_start_time'])
+    op.drop_index('ix_trips_user_id_start_time_id', table_name='trips')
@@ -0,0 +1,47 @@
+"""trip created at
+
+`trips.created_at` guarda el momento de la ingesta. Junto con el índice
+parcial de los viajes sin agregar, permite encontrar los que quedaron con
+`aggregated = false` (trabajo en `jobs:dead`, o falla de la cola y de la
+agregación en línea) para reencolarlos (`app.jobs.sweep`).
+
+now() es estable, así que la columna se agrega sin reescribir las
+particiones; los viajes existentes toman la hora de la migración.
+
+Revision ID: 3c5e1f0a9d27
+Revises: b8de70e161d7
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f0a9d27'
+down_revision: Union[str, None] = 'b8de70e161d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'trips',
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+    )
+    op.create_index(
+        'ix_trips_unaggregated',
+        'trips',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text('NOT aggregated')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_trips_unaggregated', table_name='trips', postgresql_where=sa.text('NOT aggregated'))
+    op.drop_column('trips', 'created_at')
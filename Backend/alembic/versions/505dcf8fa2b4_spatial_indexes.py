@@ -0,0 +1,64 @@
+"""spatial indexes on trips and activity segments
+
+Los índices se crean con CONCURRENTLY para no bloquear las escrituras en
+tablas grandes. Las bases creadas con `create_all` ya traían índices GiST
+simples de geoalchemy2 (`idx_<tabla>_<columna>`); se reemplazan por los
+de esta migración.
+
+Revision ID: 505dcf8fa2b4
+Revises: c40908a08372
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '505dcf8fa2b4'
+down_revision: Union[str, None] = 'c40908a08372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SPATIAL_INDEXES = [
+    ('ix_trips_user_id_start_location', 'trips', ['user_id', 'start_location']),
+    ('ix_trips_user_id_end_location', 'trips', ['user_id', 'end_location']),
+    ('ix_activitySegment_start_location', 'activitySegment', ['start_location']),
+    ('ix_activitySegment_end_location', 'activitySegment', ['end_location']),
+]
+
+LEGACY_INDEXES = [
+    'idx_trips_start_location',
+    'idx_trips_end_location',
+    'idx_activitySegment_start_location',
+    'idx_activitySegment_end_location',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Operadores btree para columnas escalares dentro de un índice GiST
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in SPATIAL_INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_using='gist',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name in LEGACY_INDEXES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+    op.execute('ANALYZE trips')
+    op.execute('ANALYZE "activitySegment"')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(SPATIAL_INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,55 @@
+"""points ledger
+
+Libro de movimientos de puntos y créditos de carbono. Los saldos de
+`individuals` dejan de actualizarse en cada viaje: se asientan por lotes
+desde `pointsLedger` (`python -m app.commands.settle_ledger` o el proceso
+de asentamiento de la API). Los saldos actuales quedan como punto de
+partida, ya asentados.
+
+Revision ID: 65a13322746d
+Revises: e233ab19d83c
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '65a13322746d'
+down_revision: Union[str, None] = 'e233ab19d83c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'pointsLedger',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.Column('carbon_credits', sa.Float(), nullable=False),
+        sa.Column('reason', sa.Enum('trip', 'trip_deleted', 'adjustment', name='ledger_reason_enum'), nullable=False),
+        sa.Column('trip_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('settled_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_pointsLedger_unsettled',
+        'pointsLedger',
+        ['user_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('settled_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pointsLedger_unsettled', table_name='pointsLedger', postgresql_where=sa.text('settled_at IS NULL'))
+    op.drop_table('pointsLedger')
+    sa.Enum(name='ledger_reason_enum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,71 @@
+"""ledger carbon saved grams
+
+Los totales históricos de `individuals` (`total_points` y
+`total_carbon_reduction_grams`) dejan de actualizarse en cada viaje, igual
+que los saldos: cada movimiento del libro lleva también sus gramos de
+carbono y el asentamiento los suma a los totales. Así la ingesta ya no
+bloquea la fila del individuo.
+
+Los movimientos sin asentar que existen al migrar ya están contados en
+`total_points` (se escribieron con la actualización directa), así que se
+restan para que el asentamiento no los sume dos veces; sus gramos quedan
+en 0 por la misma razón.
+
+Revision ID: 7d2a94c1e6b3
+Revises: 3c5e1f0a9d27
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2a94c1e6b3'
+down_revision: Union[str, None] = '3c5e1f0a9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'pointsLedger',
+        sa.Column('carbon_saved_grams', sa.Float(), server_default=sa.text('0'), nullable=False)
+    )
+    op.alter_column('pointsLedger', 'carbon_saved_grams', server_default=None)
+    op.execute(
+        """
+        UPDATE individuals AS i
+        SET total_points = COALESCE(i.total_points, 0) - pending.points
+        FROM (
+            SELECT user_id, SUM(points) AS points
+            FROM "pointsLedger"
+            WHERE settled_at IS NULL
+            GROUP BY user_id
+        ) AS pending
+        WHERE pending.user_id = i.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # De vuelta a la actualización directa: lo pendiente se suma ya a los totales
+    op.execute(
+        """
+        UPDATE individuals AS i
+        SET total_points = COALESCE(i.total_points, 0) + pending.points,
+            total_carbon_reduction_grams = COALESCE(i.total_carbon_reduction_grams, 0) + pending.grams
+        FROM (
+            SELECT user_id, SUM(points) AS points, SUM(carbon_saved_grams) AS grams
+            FROM "pointsLedger"
+            WHERE settled_at IS NULL
+            GROUP BY user_id
+        ) AS pending
+        WHERE pending.user_id = i.user_id
+        """
+    )
+    op.drop_column('pointsLedger', 'carbon_saved_grams')
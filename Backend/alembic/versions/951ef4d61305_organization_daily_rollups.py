@@ -0,0 +1,63 @@
+"""organization daily rollups
+
+Acumulados diarios por organización para los tableros: por modo de
+transporte y por miembro activo. Se llenan con
+`python -m app.commands.backfill_organization_rollups` y después se
+mantienen con cada ingesta.
+
+Revision ID: 951ef4d61305
+Revises: 3a97d8340bb9
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '951ef4d61305'
+down_revision: Union[str, None] = '3a97d8340bb9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'organizationModeRollups',
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column(
+            'transportation_mode',
+            postgresql.ENUM('bicycle', 'walking', 'public_transport', 'other', name='transportation_mode_enum', create_type=False),
+            nullable=False
+        ),
+        sa.Column('segment_count', sa.Integer(), nullable=False),
+        sa.Column('distance_meters', sa.Float(), nullable=False),
+        sa.Column('duration_seconds', sa.Float(), nullable=False),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'day', 'transportation_mode')
+    )
+    op.create_table(
+        'organizationMemberDays',
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('trip_count', sa.Integer(), nullable=False),
+        sa.Column('distance_meters', sa.Float(), nullable=False),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('organization_id', 'day', 'user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('organizationMemberDays')
+    op.drop_table('organizationModeRollups')
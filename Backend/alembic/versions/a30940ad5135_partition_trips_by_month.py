@@ -0,0 +1,231 @@
+"""partition trips and activitySegment by month
+
+Convierte `trips` y `activitySegment` en tablas particionadas por rango
+mensual (UTC). Como Postgres no puede particionar una tabla existente, las
+tablas actuales se renombran, se crean las nuevas con sus particiones y se
+copian los datos. Ejecutar en una ventana de mantenimiento.
+
+- trips: partición por start_time, llave primaria (id, start_time).
+- activitySegment: partición por trip_start_time (el inicio de su viaje),
+  llave primaria (id, trip_start_time) y llave foránea compuesta a trips.
+- Se crean particiones desde el mes del viaje más antiguo (máximo 24 meses
+  atrás) hasta 3 meses adelante, más una partición por defecto para lo
+  que quede fuera de rango. El resto lo mantiene
+  `python -m app.commands.manage_partitions`.
+
+Revision ID: a30940ad5135
+Revises: bd794a081477
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from geoalchemy2 import Geography
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a30940ad5135'
+down_revision: Union[str, None] = 'bd794a081477'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIP_COLUMNS = (
+    'id, user_id, start_time, end_time, start_location, end_location, '
+    'distance_meters, duration_seconds, carbon_saved_grams, points'
+)
+SEGMENT_COLUMNS = (
+    'id, trip_id, start_time, end_time, start_location, end_location, '
+    'distance_meters, duration_seconds, carbon_saved_grams, transportation_mode, trace'
+)
+
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    first_month date := greatest(
+        date_trunc('month', coalesce((SELECT min(start_time) FROM trips_legacy), now()) AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') - interval '24 months'
+    )::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+    month date := first_month;
+    lower_bound timestamptz;
+    upper_bound timestamptz;
+BEGIN
+    WHILE month <= last_month LOOP
+        lower_bound := month::timestamp AT TIME ZONE 'UTC';
+        upper_bound := (month + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF trips FOR VALUES FROM (%L) TO (%L)',
+            'trips_p' || to_char(month, 'YYYY_MM'), lower_bound, upper_bound
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF "activitySegment" FOR VALUES FROM (%L) TO (%L)',
+            'activitySegment_p' || to_char(month, 'YYYY_MM'), lower_bound, upper_bound
+        );
+        month := month + interval '1 month';
+    END LOOP;
+END $$
+"""
+
+
+def _create_indexes() -> None:
+    op.create_index('ix_trips_user_id_start_location', 'trips', ['user_id', 'start_location'], postgresql_using='gist')
+    op.create_index('ix_trips_user_id_end_location', 'trips', ['user_id', 'end_location'], postgresql_using='gist')
+    op.create_index('ix_activitySegment_start_location', 'activitySegment', ['start_location'], postgresql_using='gist')
+    op.create_index('ix_activitySegment_end_location', 'activitySegment', ['end_location'], postgresql_using='gist')
+
+
+def _drop_indexes() -> None:
+    for name in (
+        'ix_trips_user_id_start_location',
+        'ix_trips_user_id_end_location',
+        'ix_activitySegment_start_location',
+        'ix_activitySegment_end_location',
+    ):
+        op.execute(f'DROP INDEX IF EXISTS "{name}"')
+    op.execute('DROP INDEX IF EXISTS "ix_trips_id"')
+    op.execute('DROP INDEX IF EXISTS "ix_activitySegment_id"')
+    op.execute('DROP INDEX IF EXISTS "ix_activitySegment_trip_id"')
+
+
+def _trip_columns() -> list:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('trips_id_seq'::regclass)"), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('start_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=False),
+        sa.Column('end_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=True),
+        sa.Column('distance_meters', sa.Float(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=True),
+        sa.Column('points', sa.Integer(), nullable=True),
+    ]
+
+
+def _segment_columns() -> list:
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text('nextval(\'"activitySegment_id_seq"\'::regclass)'), nullable=False),
+        sa.Column('trip_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('start_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=False),
+        sa.Column('end_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=True),
+        sa.Column('distance_meters', sa.Float(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=True),
+        sa.Column(
+            'transportation_mode',
+            postgresql.ENUM('bicycle', 'walking', 'public_transport', 'other', name='transportation_mode_enum', create_type=False),
+            nullable=False
+        ),
+        sa.Column('trace', sa.LargeBinary(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Apartar las tablas actuales; sus índices y restricciones se liberan
+    # para reutilizar los nombres en las tablas nuevas
+    _drop_indexes()
+    op.rename_table('activitySegment', 'activitySegment_legacy')
+    op.rename_table('trips', 'trips_legacy')
+    op.execute('ALTER TABLE "activitySegment_legacy" DROP CONSTRAINT "activitySegment_trip_id_fkey"')
+    op.execute('ALTER TABLE "activitySegment_legacy" RENAME CONSTRAINT "activitySegment_pkey" TO "activitySegment_legacy_pkey"')
+    op.execute('ALTER TABLE trips_legacy RENAME CONSTRAINT trips_pkey TO trips_legacy_pkey')
+    op.execute('ALTER TABLE trips_legacy RENAME CONSTRAINT trips_user_id_fkey TO trips_legacy_user_id_fkey')
+
+    op.create_table(
+        'trips',
+        *_trip_columns(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id', 'start_time'),
+        postgresql_partition_by='RANGE (start_time)'
+    )
+    op.create_table(
+        'activitySegment',
+        *_segment_columns()[:2],
+        sa.Column('trip_start_time', sa.DateTime(timezone=True), nullable=False),
+        *_segment_columns()[2:],
+        sa.ForeignKeyConstraint(['trip_id', 'trip_start_time'], ['trips.id', 'trips.start_time'], ),
+        sa.PrimaryKeyConstraint('id', 'trip_start_time'),
+        postgresql_partition_by='RANGE (trip_start_time)'
+    )
+    op.execute('ALTER TABLE "activitySegment" ALTER COLUMN trace SET STORAGE EXTERNAL')
+
+    op.execute(CREATE_PARTITIONS)
+    op.execute('CREATE TABLE trips_default PARTITION OF trips DEFAULT')
+    op.execute('CREATE TABLE "activitySegment_default" PARTITION OF "activitySegment" DEFAULT')
+
+    op.execute(f'INSERT INTO trips ({TRIP_COLUMNS}) SELECT {TRIP_COLUMNS} FROM trips_legacy')
+    op.execute(
+        f'INSERT INTO "activitySegment" (trip_start_time, {SEGMENT_COLUMNS}) '
+        f'SELECT t.start_time, {", ".join("s." + column for column in SEGMENT_COLUMNS.split(", "))} '
+        f'FROM "activitySegment_legacy" s JOIN trips_legacy t ON t.id = s.trip_id'
+    )
+
+    # Las secuencias pasan a las tablas nuevas antes de borrar las viejas
+    op.execute('ALTER SEQUENCE trips_id_seq OWNED BY trips.id')
+    op.execute('ALTER SEQUENCE "activitySegment_id_seq" OWNED BY "activitySegment".id')
+    op.drop_table('activitySegment_legacy')
+    op.drop_table('trips_legacy')
+
+    _create_indexes()
+    op.create_index('ix_activitySegment_trip_id', 'activitySegment', ['trip_id', 'trip_start_time'])
+
+    op.create_table(
+        'archivedTripTotals',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('trip_count', sa.Integer(), nullable=False),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=False),
+        sa.Column('points', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'month')
+    )
+
+    op.execute('ANALYZE trips')
+    op.execute('ANALYZE "activitySegment"')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('archivedTripTotals')
+
+    _drop_indexes()
+    op.rename_table('activitySegment', 'activitySegment_partitioned')
+    op.rename_table('trips', 'trips_partitioned')
+    op.execute('ALTER TABLE "activitySegment_partitioned" DROP CONSTRAINT "activitySegment_trip_id_trip_start_time_fkey"')
+    op.execute('ALTER TABLE "activitySegment_partitioned" RENAME CONSTRAINT "activitySegment_pkey" TO "activitySegment_partitioned_pkey"')
+    op.execute('ALTER TABLE trips_partitioned RENAME CONSTRAINT trips_pkey TO trips_partitioned_pkey')
+    op.execute('ALTER TABLE trips_partitioned RENAME CONSTRAINT trips_user_id_fkey TO trips_partitioned_user_id_fkey')
+
+    op.create_table(
+        'trips',
+        *_trip_columns(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'activitySegment',
+        *_segment_columns(),
+        sa.ForeignKeyConstraint(['trip_id'], ['trips.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER TABLE "activitySegment" ALTER COLUMN trace SET STORAGE EXTERNAL')
+    op.execute(f'INSERT INTO trips ({TRIP_COLUMNS}) SELECT {TRIP_COLUMNS} FROM trips_partitioned')
+    op.execute(
+        f'INSERT INTO "activitySegment" ({SEGMENT_COLUMNS}) '
+        f'SELECT {SEGMENT_COLUMNS} FROM "activitySegment_partitioned"'
+    )
+
+    op.execute('ALTER SEQUENCE trips_id_seq OWNED BY trips.id')
+    op.execute('ALTER SEQUENCE "activitySegment_id_seq" OWNED BY "activitySegment".id')
+    op.execute('DROP TABLE "activitySegment_partitioned" CASCADE')
+    op.execute('DROP TABLE trips_partitioned CASCADE')
+
+    op.create_index(op.f('ix_trips_id'), 'trips', ['id'], unique=False)
+    op.create_index(op.f('ix_activitySegment_id'), 'activitySegment', ['id'], unique=False)
+    _create_indexes()
@@ -0,0 +1,42 @@
+"""ledger trip corrected reason
+
+Motivo `trip_corrected` para los movimientos del libro que produce la
+corrección de un viaje (PATCH /trips/{trip_id}): la diferencia entre los
+valores corregidos y los anteriores.
+
+Postgres no permite quitar un valor de un enum: el downgrade recrea el
+tipo y convierte esos movimientos en `adjustment`.
+
+Revision ID: b8de70e161d7
+Revises: 65a13322746d
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8de70e161d7'
+down_revision: Union[str, None] = '65a13322746d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TYPE ledger_reason_enum ADD VALUE IF NOT EXISTS 'trip_corrected'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""UPDATE "pointsLedger" SET reason = 'adjustment' WHERE reason = 'trip_corrected'""")
+    op.execute("ALTER TYPE ledger_reason_enum RENAME TO ledger_reason_enum_old")
+    sa.Enum('trip', 'trip_deleted', 'adjustment', name='ledger_reason_enum').create(op.get_bind())
+    op.execute(
+        'ALTER TABLE "pointsLedger" ALTER COLUMN reason TYPE ledger_reason_enum '
+        'USING reason::text::ledger_reason_enum'
+    )
+    op.execute("DROP TYPE ledger_reason_enum_old")
@@ -0,0 +1,31 @@
+"""activity segment encoded trace
+
+Revision ID: bd794a081477
+Revises: 505dcf8fa2b4
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd794a081477'
+down_revision: Union[str, None] = '505dcf8fa2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('activitySegment', sa.Column('trace', sa.LargeBinary(), nullable=True))
+    # Las trazas ya vienen compactas: guardarlas fuera de línea sin pasar
+    # por pglz evita comprimir datos que casi no se reducen
+    op.execute('ALTER TABLE "activitySegment" ALTER COLUMN trace SET STORAGE EXTERNAL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('activitySegment', 'trace')
@@ -0,0 +1,35 @@
+"""individual organization membership
+
+Revision ID: c40908a08372
+Revises: d8efcff6be9a
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c40908a08372'
+down_revision: Union[str, None] = 'd8efcff6be9a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('individuals', sa.Column('organization_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'individuals_organization_id_fkey', 'individuals', 'organizations',
+        ['organization_id'], ['id']
+    )
+    op.create_index(op.f('ix_individuals_organization_id'), 'individuals', ['organization_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_individuals_organization_id'), table_name='individuals')
+    op.drop_constraint('individuals_organization_id_fkey', 'individuals', type_='foreignkey')
+    op.drop_column('individuals', 'organization_id')
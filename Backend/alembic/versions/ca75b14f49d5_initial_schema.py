@@ -0,0 +1,128 @@
+"""initial schema
+
+Esquema inicial de la aplicación. En bases de datos creadas antes de
+versionar las migraciones basta con `alembic stamp ca75b14f49d5`.
+
+Revision ID: ca75b14f49d5
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geography
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ca75b14f49d5'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('type', sa.Enum('individual', 'organization', name='user_type_enum'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+
+    op.create_table(
+        'individuals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('full_name', sa.String(), nullable=False),
+        sa.Column('total_carbon_reduction_grams', sa.Float(), nullable=True),
+        sa.Column('total_points', sa.Integer(), nullable=True),
+        sa.Column('points_balance', sa.Integer(), nullable=True),
+        sa.Column('carbon_credits_balance', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_individuals_id'), 'individuals', ['id'], unique=False)
+
+    op.create_table(
+        'organizations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('package_type', sa.Enum('free', 'basic', 'pro', name='packagetype'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_organizations_id'), 'organizations', ['id'], unique=False)
+
+    op.create_table(
+        'authTokens',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('token', sa.String(), nullable=False),
+        sa.Column('refresh_token', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_authTokens_id'), 'authTokens', ['id'], unique=False)
+
+    op.create_table(
+        'trips',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('start_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=False),
+        sa.Column('end_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=True),
+        sa.Column('distance_meters', sa.Float(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_trips_id'), 'trips', ['id'], unique=False)
+
+    op.create_table(
+        'activitySegment',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trip_id', sa.Integer(), nullable=False),
+        sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('start_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=False),
+        sa.Column('end_location', Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=True),
+        sa.Column('distance_meters', sa.Float(), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('carbon_saved_grams', sa.Float(), nullable=True),
+        sa.Column('transportation_mode', sa.Enum('bicycle', 'walking', 'public_transport', 'other', name='transportation_mode_enum'), nullable=False),
+        sa.ForeignKeyConstraint(['trip_id'], ['trips.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_activitySegment_id'), 'activitySegment', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_activitySegment_id'), table_name='activitySegment')
+    op.drop_table('activitySegment')
+    op.drop_index(op.f('ix_trips_id'), table_name='trips')
+    op.drop_table('trips')
+    op.drop_index(op.f('ix_authTokens_id'), table_name='authTokens')
+    op.drop_table('authTokens')
+    op.drop_index(op.f('ix_organizations_id'), table_name='organizations')
+    op.drop_table('organizations')
+    op.drop_index(op.f('ix_individuals_id'), table_name='individuals')
+    op.drop_table('individuals')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='transportation_mode_enum').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='packagetype').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='user_type_enum').drop(op.get_bind(), checkfirst=True)
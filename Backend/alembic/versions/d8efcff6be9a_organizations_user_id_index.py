@@ -0,0 +1,28 @@
+"""index organizations.user_id
+
+Revision ID: d8efcff6be9a
+Revises: 173c48267a63
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8efcff6be9a'
+down_revision: Union[str, None] = '173c48267a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_organizations_user_id'), 'organizations', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_organizations_user_id'), table_name='organizations')
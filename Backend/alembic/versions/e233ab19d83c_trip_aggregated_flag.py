@@ -0,0 +1,38 @@
+"""trip aggregated flag
+
+`trips.aggregated` indica si el viaje ya se sumó a los totales y
+acumulados. La ingesta solo inserta los viajes y un trabajo en segundo
+plano los agrega; la columna hace idempotentes los reintentos y permite
+que borrar un viaje solo descuente lo que sí se sumó.
+
+Los viajes existentes ya están agregados: la columna se crea con default
+true (solo metadatos, sin reescribir la tabla) y luego el default pasa a
+false para los nuevos.
+
+Revision ID: e233ab19d83c
+Revises: 951ef4d61305
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e233ab19d83c'
+down_revision: Union[str, None] = '951ef4d61305'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('trips', sa.Column('aggregated', sa.Boolean(), server_default=sa.text('true'), nullable=False))
+    op.alter_column('trips', 'aggregated', server_default=sa.text('false'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('trips', 'aggregated')
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.data import TokenInformation
 from app.core.database import get_db
 from app.schemas.auth import LoginRequest, RefreshTokenRequest
-from app.services.auth import login, refresh_tokens,logout
-from app.core.security import get_current_user
+from app.services.auth import login, refresh_tokens, logout, logout_all
+from app.core.security import get_current_session
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -18,6 +19,8 @@ async def login_user(
     """
     try:
         return await login(db, login_data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,14 +29,15 @@ async def login_user(
 
 @router.post("/refresh")
 async def refresh_token(
-    refresh_token: RefreshTokenRequest,
-    db: AsyncSession = Depends(get_db)
+    refresh_token: RefreshTokenRequest
 ):
     """
     Refresca el token de acceso usando el token de refresh.
     """
     try:
-        return await refresh_tokens(db, refresh_token)
+        return await refresh_tokens(refresh_token)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -42,17 +46,32 @@ async def refresh_token(
 
 @router.post("/logout")
 async def logout_user(
-    db: AsyncSession = Depends(get_db),
-    user_id: int = Depends(get_current_user)
+    session: TokenInformation = Depends(get_current_session)
 ):
     """
     Cierra la sesión del usuario actual.
     """
     try:
-        await logout(db, user_id)
+        await logout(session.id, session.sid)
         return {"message": "Sesión cerrada correctamente"}
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al cerrar la sesión: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/logout/all")
+async def logout_all_sessions(
+    session: TokenInformation = Depends(get_current_session)
+):
+    """
+    Cierra todas las sesiones del usuario actual.
+    """
+    try:
+        closed = await logout_all(session.id)
+        return {"message": "Sesiones cerradas correctamente", "closed_sessions": closed}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al cerrar las sesiones: {str(e)}"
+        )
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cache_key, response_cache, user_tag
 from app.core.database import AsyncSessionLocal
-from app.services.individual import register_individual_user, login_individual_user
-from app.schemas.individual import IndividualUserCreate, IndividualUserResponse
+from app.core.security import get_current_user
+from app.services.individual import register_individual_user, login_individual_user, get_individual_profile
+from app.services.memberImport import accept_invite
+from app.schemas.individual import (
+    IndividualUserCreate, IndividualUserResponse, IndividualProfileResponse, AcceptInviteRequest
+)
 from app.schemas.auth import LoginRequest
 
 
@@ -48,6 +53,33 @@ async def individual_login(
             detail=str(e)
         )
 
+@router.get("/me", response_model=IndividualProfileResponse)
+async def my_profile(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Perfil y totales del usuario actual. Se sirve desde el caché de
+    respuestas y admite If-None-Match.
+    """
+    return await response_cache.respond(
+        request,
+        cache_key("individual-profile", user_id),
+        [user_tag(user_id)],
+        lambda: get_individual_profile(db, user_id),
+    )
+
+@router.post("/invites/accept", response_model=IndividualUserResponse)
+async def accept_organization_invite(
+    invite_data: AcceptInviteRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Acepta la invitación de una organización definiendo la contraseña.
+    """
+    return await accept_invite(db, invite_data)
+
 """
 @router.get("/login/google")
 async def google_login(request: Request):
@@ -0,0 +1,67 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LEADERBOARDS_TAG, cache_key, response_cache, user_tag
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.dataTypes import LeaderboardMetric, LeaderboardWindow
+from app.schemas.leaderboard import LeaderboardResponse, LeaderboardPositionResponse
+from app.services.leaderboard import LEADERBOARD_CACHE_TTL, current_key, get_top, get_around
+
+router = APIRouter(prefix="/leaderboards", tags=["leaderboards"])
+
+@router.get("/{metric}", response_model=LeaderboardResponse)
+async def top_leaderboard(
+    request: Request,
+    metric: LeaderboardMetric,
+    window: LeaderboardWindow = LeaderboardWindow.all,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Obtiene una página de la tabla de posiciones.
+    """
+    async def build():
+        total, entries = await get_top(db, metric, window, offset, limit)
+        return LeaderboardResponse(metric=metric, window=window, total=total, entries=entries)
+
+    # La llave del sorted set incluye el periodo, así la semana nueva no
+    # reutiliza la respuesta de la anterior
+    return await response_cache.respond(
+        request,
+        cache_key("leaderboard", current_key(metric, window), offset, limit),
+        [LEADERBOARDS_TAG],
+        build,
+        ttl=LEADERBOARD_CACHE_TTL,
+    )
+
+@router.get("/{metric}/me", response_model=LeaderboardPositionResponse)
+async def my_leaderboard_position(
+    request: Request,
+    metric: LeaderboardMetric,
+    window: LeaderboardWindow = LeaderboardWindow.all,
+    radius: int = Query(5, ge=0, le=50),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Obtiene la posición del usuario actual y sus vecinos en la tabla.
+    """
+    async def build():
+        total, rank, entries = await get_around(db, metric, window, user_id, radius)
+        return LeaderboardPositionResponse(
+            metric=metric,
+            window=window,
+            total=total,
+            rank=rank,
+            entries=entries
+        )
+
+    return await response_cache.respond(
+        request,
+        cache_key("leaderboard-position", current_key(metric, window), user_id, radius),
+        [LEADERBOARDS_TAG, user_tag(user_id)],
+        build,
+        ttl=LEADERBOARD_CACHE_TTL,
+    )
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Depends
+
+from app.core.cache import response_cache
+from app.core.database import engine
+from app.core.hashing import password_hasher
+from app.jobs.sweep import aggregation_sweeper
+from app.jobs.worker import job_worker
+from app.core.security import require_monitoring_token, token_cache
+from app.core.sqlLogging import sql_logger
+from app.services.ledger import ledger_settler
+from app.services.session import session_audit
+from app.services.tiles import tile_cache
+
+# Rutas internas: exponen el estado de los procesos y algunas consultan la
+# base de datos, así que exigen MONITORING_TOKEN
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["monitoring"],
+    dependencies=[Depends(require_monitoring_token)],
+)
+
+@router.get("/hashing")
+async def hashing_metrics():
+    """
+    Métricas del pool de hashing de contraseñas.
+    """
+    return password_hasher.snapshot()
+
+@router.get("/token-cache")
+async def token_cache_metrics():
+    """
+    Métricas del caché de tokens verificados.
+    """
+    return token_cache.snapshot()
+
+@router.get("/session-audit")
+async def session_audit_metrics():
+    """
+    Estado de la escritura por lotes de la auditoría de sesiones.
+    """
+    return session_audit.snapshot()
+
+@router.get("/db-pool")
+async def db_pool_metrics():
+    """
+    Métricas del pool de conexiones a Postgres de este proceso.
+    """
+    return engine.pool.snapshot()
+
+@router.get("/tile-cache")
+async def tile_cache_metrics():
+    """
+    Métricas del caché de teselas vectoriales.
+    """
+    return tile_cache.snapshot()
+
+@router.get("/response-cache")
+async def response_cache_metrics():
+    """
+    Métricas del caché de respuestas y de las respuestas 304.
+    """
+    return response_cache.snapshot()
+
+@router.get("/jobs")
+async def job_metrics():
+    """
+    Colas de trabajos en segundo plano: lag, pendientes, reintentos,
+    stream de trabajos fallidos y viajes que siguen sin agregarse.
+    """
+    return {**await job_worker.snapshot(), "sweep": await aggregation_sweeper.snapshot()}
+
+@router.get("/ledger")
+async def ledger_metrics():
+    """
+    Movimientos del libro de puntos pendientes de asentar y contadores
+    del asentamiento de este proceso.
+    """
+    return await ledger_settler.snapshot()
+
+@router.get("/sql-log")
+async def sql_log_metrics():
+    """
+    Sentencias registradas (muestreadas y lentas), planes obtenidos y
+    registros descartados con la cola de salida llena.
+    """
+    return sql_logger.snapshot()
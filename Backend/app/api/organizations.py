@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import cache_key, organization_tag, response_cache
 from app.core.database import get_db
 from app.core.security import get_current_user
-from app.schemas.organization import OrganizationCreate, OrganizationResponse
+from app.schemas.organization import OrganizationAnalyticsResponse, OrganizationCreate, OrganizationResponse
 from app.schemas.auth import LoginRequest
-from app.services.organization import register_organization_user, login_organization_user
+from app.models.dataTypes import MemberImportFormat
+from app.services.organization import register_organization_user, login_organization_user, get_organization_id
+from app.services.memberImport import spool_upload, import_members
+from app.services.organizationAnalytics import get_organization_analytics, validate_range
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -19,6 +27,8 @@ async def create_new_organization(
     """
     try:
         return await register_organization_user(db, organization_data)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -39,4 +49,58 @@ async def organization_login(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
-        ) 
\ No newline at end of file
+        ) 
+
+@router.post("/members/import")
+async def import_organization_members(
+    request: Request,
+    format: MemberImportFormat = MemberImportFormat.csv,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Importa miembros de la organización desde el cuerpo de la petición:
+    CSV con encabezado `email,full_name,password` o JSONL con esas llaves.
+    Los miembros sin contraseña reciben un token de invitación.
+
+    Responde con un flujo NDJSON de eventos `error`, `invite`, `progress`
+    y un `done` final con el resumen.
+    """
+    organization_id = await get_organization_id(db, user_id)
+    spool = await spool_upload(request.stream())
+    return StreamingResponse(
+        import_members(organization_id, spool, format),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.get("/analytics", response_model=OrganizationAnalyticsResponse)
+async def organization_analytics(
+    request: Request,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Actividad diaria de los miembros por modo de transporte y miembros
+    activos entre `start` y `end` (UTC, incluidos). Por defecto, los
+    últimos 30 días.
+    """
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    try:
+        validate_range(start, end)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    organization_id = await get_organization_id(db, user_id)
+    return await response_cache.respond(
+        request,
+        cache_key("organization-analytics", organization_id, start, end),
+        [organization_tag(organization_id)],
+        lambda: get_organization_analytics(db, organization_id, start, end),
+    )
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.services.organization import get_organization_id
+from app.services.tiles import TILE_MEDIA_TYPE, get_tile, tile_ttl
+
+router = APIRouter(prefix="/tiles", tags=["tiles"])
+
+@router.get("/{z}/{x}/{y}")
+async def activity_tile(
+    z: int,
+    x: int,
+    y: int,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Tesela vectorial (MVT) con el mapa de calor de caminatas y recorridos
+    en bicicleta de los miembros de la organización.
+    """
+    organization_id = await get_organization_id(db, user_id)
+    try:
+        tile, cached = await get_tile(db, organization_id, z, x, y)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    headers = {
+        "Cache-Control": f"private, max-age={tile_ttl(z) or 0}",
+        "X-Tile-Cache": "hit" if cached else "miss",
+    }
+    if not tile:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return Response(content=tile, media_type=TILE_MEDIA_TYPE, headers=headers)
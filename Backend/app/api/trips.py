@@ -0,0 +1,195 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache_key, response_cache, user_tag
+from app.core.database import get_db
+from app.core.responses import JSONResponse
+from app.core.security import get_current_user
+from app.models.dataTypes import TripAnchor
+from app.schemas.trip import (
+    Location, PolygonQuery, SegmentHistoryPage, TripBatchCreate, TripBatchResponse, TripCorrection,
+    TripHistoryPage, TripListResponse
+)
+from app.services.trip import ingest_trips, correct_trip, delete_trip
+from app.services.tripHistory import get_trip_history, get_trip_segments
+from app.services.tripSpatial import trips_near, nearest_trips, trips_in_bbox, trips_in_polygon
+
+router = APIRouter(prefix="/trips", tags=["trips"])
+
+@router.get("", response_model=TripHistoryPage, response_model_exclude_unset=True)
+async def list_trips(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, max_length=200),
+    fields: Optional[str] = Query(None, description="Campos separados por comas; por defecto todos"),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Historial de viajes del usuario, más recientes primero. Para seguir,
+    enviar el `next_cursor` de la página anterior.
+    """
+    try:
+        return await response_cache.respond(
+            request,
+            cache_key("trip-history", user_id, limit, cursor, fields),
+            [user_tag(user_id)],
+            lambda: get_trip_history(db, user_id, limit, cursor, fields),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/batch", response_model=TripBatchResponse, status_code=status.HTTP_201_CREATED)
+async def create_trips_batch(
+    batch: TripBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Registra un lote de viajes con sus segmentos de actividad.
+    """
+    try:
+        return await ingest_trips(db, user_id, batch)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/near", response_model=TripListResponse)
+async def list_trips_near(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    radius_meters: float = Query(1000, gt=0, le=100_000),
+    anchor: TripAnchor = TripAnchor.start,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Viajes del usuario que empiezan (o terminan) dentro de un radio.
+    """
+    point = Location(latitude=latitude, longitude=longitude)
+    trips = await trips_near(db, user_id, point, radius_meters, anchor, limit)
+    return JSONResponse({"trips": trips})
+
+@router.get("/nearest", response_model=TripListResponse)
+async def list_nearest_trips(
+    latitude: float = Query(..., ge=-90, le=90),
+    longitude: float = Query(..., ge=-180, le=180),
+    anchor: TripAnchor = TripAnchor.start,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Los viajes del usuario más cercanos a un punto.
+    """
+    point = Location(latitude=latitude, longitude=longitude)
+    trips = await nearest_trips(db, user_id, point, anchor, limit)
+    return JSONResponse({"trips": trips})
+
+@router.get("/within-bbox", response_model=TripListResponse)
+async def list_trips_within_bbox(
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    anchor: TripAnchor = TripAnchor.start,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Viajes del usuario dentro de un rectángulo de coordenadas.
+    """
+    try:
+        trips = await trips_in_bbox(db, user_id, west, south, east, north, anchor, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return JSONResponse({"trips": trips})
+
+@router.post("/within-polygon", response_model=TripListResponse)
+async def list_trips_within_polygon(
+    polygon: PolygonQuery,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Viajes del usuario dentro de un polígono GeoJSON.
+    """
+    trips = await trips_in_polygon(db, user_id, polygon)
+    return JSONResponse({"trips": trips})
+
+@router.get("/{trip_id}/segments", response_model=SegmentHistoryPage, response_model_exclude_unset=True)
+async def list_trip_segments(
+    request: Request,
+    trip_id: int,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, max_length=200),
+    fields: Optional[str] = Query(None, description="Campos separados por comas; por defecto todos"),
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Segmentos de un viaje del usuario en orden cronológico.
+    """
+    try:
+        return await response_cache.respond(
+            request,
+            cache_key("trip-segments", user_id, trip_id, limit, cursor, fields),
+            [user_tag(user_id)],
+            lambda: get_trip_segments(db, user_id, trip_id, limit, cursor, fields),
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.patch("/{trip_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def update_trip(
+    trip_id: int,
+    correction: TripCorrection,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Corrige el modo de transporte de segmentos de un viaje del usuario
+    actual; su carbono, puntos y acumulados se ajustan a la diferencia.
+    """
+    try:
+        found = await correct_trip(db, user_id, trip_id, correction)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Viaje no encontrado"
+        )
+
+@router.delete("/{trip_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_trip(
+    trip_id: int,
+    db: AsyncSession = Depends(get_db),
+    user_id: int = Depends(get_current_user)
+):
+    """
+    Elimina un viaje del usuario actual y descuenta sus puntos y carbono.
+    """
+    if not await delete_trip(db, user_id, trip_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Viaje no encontrado"
+        )
@@ -0,0 +1,93 @@
+"""
+Reconstruye los acumulados diarios de las organizaciones desde `trips`.
+
+Recorre las organizaciones por llave y, para cada una, los meses entre
+--since y --until; cada mes se borra y se recalcula en su propia
+transacción, así los bloqueos duran poco y cada consulta lee una sola
+partición mensual. Por defecto cubre desde la primera partición de
+`trips` hasta el mes en curso.
+
+Puede correr con la ingesta activa. Mientras se reconstruye un mes de una
+organización, las agregaciones, correcciones y borrados de viajes de sus
+miembros esperan a ese commit (un candado consultivo por organización), y
+después suman sus deltas sobre el resultado. Ninguna se pierde ni se
+cuenta dos veces. Esa espera dura lo que el recálculo de un mes.
+
+Uso:
+    python -m app.commands.backfill_organization_rollups [--organization-id 7] [--since 2025-01]
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import select
+
+from app.core.cache import organization_tag, response_cache
+from app.core.database import AsyncSessionLocal, engine
+from app.core.redis import redis
+from app.models.organization import Organization
+from app.services.organizationAnalytics import rebuild_organization_rollups
+from app.services.partitions import add_months, list_partition_months, month_start
+
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+async def backfill(
+    organization_ids: Optional[List[int]],
+    since: Optional[date],
+    until: Optional[date],
+    chunk_size: int = 500
+) -> dict:
+    report = {"organizations": 0, "months": 0}
+    async with AsyncSessionLocal() as db:
+        if since is None:
+            months = await list_partition_months(await db.connection(), "trips")
+            since = months[0] if months else month_start(datetime.now(timezone.utc))
+        await db.rollback()
+    until = until or add_months(month_start(datetime.now(timezone.utc)), 1)
+
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(Organization.id).where(Organization.id > last_id).order_by(Organization.id).limit(chunk_size)
+            if organization_ids:
+                query = query.where(Organization.id.in_(organization_ids))
+            chunk = (await db.execute(query)).scalars().all()
+        if not chunk:
+            break
+        last_id = chunk[-1]
+
+        for organization_id in chunk:
+            month = since
+            while month < until:
+                async with AsyncSessionLocal() as db:
+                    await rebuild_organization_rollups(db, organization_id, month, add_months(month, 1))
+                    await db.commit()
+                report["months"] += 1
+                month = add_months(month, 1)
+            await response_cache.safe_invalidate(organization_tag(organization_id))
+            report["organizations"] += 1
+            print(f"organización {organization_id}: {since.isoformat()} a {until.isoformat()}", flush=True)
+
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--organization-id", type=int, action="append", default=[])
+    parser.add_argument("--since", type=_month, help="Primer mes (AAAA-MM)")
+    parser.add_argument("--until", type=_month, help="Mes final, excluido (AAAA-MM)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Organizaciones por consulta")
+    args = parser.parse_args()
+
+    report = await backfill(args.organization_id, args.since, args.until, args.chunk_size)
+    await engine.dispose()
+    await redis.aclose()
+    print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
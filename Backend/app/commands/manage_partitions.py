@@ -0,0 +1,69 @@
+"""
+Mantenimiento de las particiones mensuales de `trips` y `activitySegment`.
+
+Crea por adelantado las particiones de los próximos meses y archiva las
+más antiguas que el periodo de retención: se desprenden de la tabla y se
+mueven al esquema `archive`, de donde pueden respaldarse y borrarse.
+Pensado para correr a diario desde cron.
+
+Uso:
+    python -m app.commands.manage_partitions [--months-ahead 3] [--retention-months 24] [--dry-run]
+    python -m app.commands.manage_partitions --create 2024-01
+"""
+import argparse
+import asyncio
+from datetime import date, datetime
+
+from app.core.database import engine
+from app.services.partitions import (
+    PARTITION_MONTHS_AHEAD, PARTITION_RETENTION_MONTHS,
+    archive_expired_partitions, create_month_partitions, ensure_future_partitions
+)
+
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--retention-months", type=int, default=PARTITION_RETENTION_MONTHS)
+    parser.add_argument(
+        "--create", type=_month, action="append", default=[],
+        help="Crear la partición de un mes pasado (AAAA-MM), moviendo sus filas de la partición por defecto"
+    )
+    parser.add_argument("--no-archive", action="store_true", help="Solo crear particiones")
+    parser.add_argument("--dry-run", action="store_true", help="Ejecutar y deshacer al final")
+    args = parser.parse_args()
+
+    report = {}
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            report["created"] = [
+                month.isoformat() for month in args.create
+                if await create_month_partitions(connection, month)
+            ]
+            report["created"] += [
+                month.isoformat()
+                for month in await ensure_future_partitions(connection, args.months_ahead)
+            ]
+            if not args.no_archive:
+                report["archived"] = [
+                    month.isoformat()
+                    for month in await archive_expired_partitions(connection, args.retention_months)
+                ]
+        except Exception:
+            await transaction.rollback()
+            raise
+        if args.dry_run:
+            await transaction.rollback()
+        else:
+            await transaction.commit()
+    await engine.dispose()
+    print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Reconstruye las tablas de posiciones de Redis desde Postgres.
+
+La tabla global sale de los totales de `individuals` (más los movimientos
+del libro aún sin asentar) y las de la semana y
+el mes en curso de `userActivityRollups`. Cada tabla se llena en una llave
+temporal y se publica con RENAME, así las lecturas nunca ven una tabla a
+medio construir.
+
+Uso:
+    python -m app.commands.rebuild_leaderboards [--chunk-size 5000]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LEADERBOARDS_TAG, response_cache
+from app.core.database import AsyncSessionLocal, engine
+from app.core.redis import redis
+from app.models.activityRollups import UserActivityRollup
+from app.models.dataTypes import LeaderboardMetric, LeaderboardWindow
+from app.models.individual import Individual
+from app.services.aggregation import period_starts
+from app.services.leaderboard import WINDOW_TTL_SECONDS, WINDOW_PERIODS, leaderboard_key
+from app.services.ledger import total_columns
+
+
+async def _publish(db: AsyncSession, query, key_column, chunk_size: int, keys: dict, ttl=None) -> int:
+    """
+    Llena las llaves temporales por bloques con ZADD y las publica.
+
+    `keys` relaciona cada métrica con su llave final; `query` debe devolver
+    la columna de llave (`key_column`) y una columna por métrica.
+    """
+    staging = {metric: f"{key}:rebuild" for metric, key in keys.items()}
+    await redis.delete(*staging.values())
+
+    members = 0
+    last_key = 0
+    while True:
+        result = await db.execute(
+            query.where(key_column > last_key).order_by(key_column).limit(chunk_size)
+        )
+        rows = result.all()
+        if not rows:
+            break
+        last_key = rows[-1][0]
+
+        pipe = redis.pipeline(transaction=False)
+        for metric, staging_key in staging.items():
+            scores = {
+                row[0]: getattr(row, metric.value)
+                for row in rows
+                if getattr(row, metric.value)
+            }
+            if scores:
+                pipe.zadd(staging_key, scores)
+        await pipe.execute()
+        members += len(rows)
+
+    pipe = redis.pipeline(transaction=True)
+    for metric, key in keys.items():
+        # RENAME falla si la llave temporal no existe (tabla vacía)
+        if await redis.exists(staging[metric]):
+            pipe.rename(staging[metric], key)
+            if ttl:
+                pipe.expire(key, ttl)
+        else:
+            pipe.delete(key)
+    await pipe.execute()
+    return members
+
+
+async def rebuild_leaderboards(db: AsyncSession, chunk_size: int = 5000) -> dict:
+    report = {}
+
+    total_points, total_carbon = total_columns(Individual.user_id)
+    all_query = select(
+        Individual.user_id,
+        total_points.label(LeaderboardMetric.points.value),
+        total_carbon.label(LeaderboardMetric.carbon.value),
+    )
+    report[LeaderboardWindow.all.value] = await _publish(
+        db,
+        all_query,
+        Individual.user_id,
+        chunk_size,
+        {metric: leaderboard_key(metric, LeaderboardWindow.all) for metric in LeaderboardMetric},
+    )
+
+    starts = period_starts(datetime.now(timezone.utc))
+    for window, period in WINDOW_PERIODS.items():
+        window_query = select(
+            UserActivityRollup.user_id,
+            UserActivityRollup.points.label(LeaderboardMetric.points.value),
+            UserActivityRollup.carbon_saved_grams.label(LeaderboardMetric.carbon.value),
+        ).where(
+            UserActivityRollup.period == period,
+            UserActivityRollup.period_start == starts[period],
+        )
+        report[window.value] = await _publish(
+            db,
+            window_query,
+            UserActivityRollup.user_id,
+            chunk_size,
+            {metric: leaderboard_key(metric, window, starts[period]) for metric in LeaderboardMetric},
+            ttl=WINDOW_TTL_SECONDS[window],
+        )
+
+    # Las respuestas cacheadas de las tablas anteriores dejan de ser válidas
+    await response_cache.invalidate(LEADERBOARDS_TAG)
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        report = await rebuild_leaderboards(db, chunk_size=args.chunk_size)
+    await engine.dispose()
+    await redis.aclose()
+    print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+"""
+Verifica y repara la deriva entre los totales de cada individuo y sus viajes.
+
+Recorre `individuals` por bloques de `--chunk-size` usuarios (paginación
+por llave) para acotar el trabajo y los bloqueos de cada transacción.
+
+Los meses cuyas particiones ya se archivaron cuentan con sus totales de
+`archivedTripTotals`; los acumulados por periodo solo se reconstruyen a
+partir del primer mes que sigue en `trips`.
+
+Uso:
+    python -m app.commands.reconcile_totals [--chunk-size 500] [--dry-run] [--rollups]
+"""
+import argparse
+import asyncio
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, literal, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache, user_tag
+from app.core.database import AsyncSessionLocal, engine
+from app.models.activityRollups import UserActivityRollup
+from app.models.archivedTripTotals import ArchivedTripTotal
+from app.models.dataTypes import LedgerReason, RollupPeriod, rollup_period_enum
+from app.models.individual import Individual
+from app.models.trips import Trip
+from app.services.ledger import append_entries, total_columns
+from app.services.partitions import add_months
+from app.services.tripMetrics import carbon_credits_for
+
+# Diferencia tolerada en gramos por errores de redondeo de coma flotante
+CARBON_TOLERANCE_GRAMS = 0.01
+
+
+async def _archive_boundary(db: AsyncSession) -> Optional[date]:
+    """
+    Primer mes que sigue en `trips` después de los ya archivados, o None.
+    """
+    result = await db.execute(select(func.max(ArchivedTripTotal.month)))
+    last_archived = result.scalar_one_or_none()
+    return add_months(last_archived, 1) if last_archived else None
+
+
+async def _rebuild_rollups(db: AsyncSession, user_ids: List[int], boundary: Optional[date]) -> None:
+    """
+    Recalcula desde `trips` los acumulados por periodo de un bloque de usuarios.
+
+    Con `boundary`, los periodos que empiezan antes de ese mes se dejan
+    intactos porque sus viajes ya no están en `trips`.
+    """
+    rollups = UserActivityRollup.__table__
+    trips = Trip.__table__
+    stale = delete(rollups).where(rollups.c.user_id.in_(user_ids))
+    if boundary is not None:
+        stale = stale.where(rollups.c.period_start >= boundary)
+    await db.execute(stale)
+
+    # Literales en línea: con parámetros, el SELECT y el GROUP BY recibirían
+    # placeholders distintos y Postgres no los reconocería como la misma expresión
+    utc_start = func.timezone(literal_column("'UTC'"), trips.c.start_time)
+    for period in RollupPeriod:
+        period_start = cast(func.date_trunc(literal_column(f"'{period.value}'"), utc_start), Date)
+        recent = trips.c.user_id.in_(user_ids) & trips.c.aggregated.is_(True)
+        if boundary is not None:
+            recent = recent & (period_start >= boundary)
+        await db.execute(
+            insert(rollups).from_select(
+                ["user_id", "period", "period_start", "trip_count", "distance_meters",
+                 "duration_seconds", "carbon_saved_grams", "points"],
+                select(
+                    trips.c.user_id,
+                    literal(period, rollup_period_enum),
+                    period_start,
+                    func.count(),
+                    func.coalesce(func.sum(trips.c.distance_meters), 0),
+                    func.coalesce(func.sum(trips.c.duration_seconds), 0),
+                    func.coalesce(func.sum(trips.c.carbon_saved_grams), 0),
+                    func.coalesce(func.sum(trips.c.points), 0),
+                )
+                .where(recent)
+                .group_by(trips.c.user_id, period_start)
+            )
+        )
+
+
+async def reconcile_individual_totals(
+    db: AsyncSession,
+    chunk_size: int = 500,
+    repair: bool = True,
+    rebuild_rollups: bool = False
+) -> dict:
+    """
+    Compara los totales vigentes de cada individuo (asentado + libro sin
+    asentar) con la suma de sus viajes y corrige los que derivaron con un
+    movimiento de ajuste en el libro: el asentamiento lleva la diferencia a
+    los totales y, con ella, a los saldos, así se conserva lo ya canjeado.
+    """
+    individuals = Individual.__table__
+    trips = Trip.__table__
+    archived = ArchivedTripTotal.__table__
+    report = {"checked": 0, "drifted": 0, "repaired": 0}
+    last_id = 0
+    boundary = await _archive_boundary(db) if rebuild_rollups else None
+
+    while True:
+        result = await db.execute(
+            select(
+                individuals.c.id,
+                individuals.c.user_id,
+                *total_columns(individuals.c.user_id),
+            )
+            .where(individuals.c.id > last_id)
+            .order_by(individuals.c.id)
+            .limit(chunk_size)
+        )
+        chunk = result.all()
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        user_ids = [row.user_id for row in chunk]
+
+        result = await db.execute(
+            select(
+                trips.c.user_id,
+                func.coalesce(func.sum(trips.c.carbon_saved_grams), 0).label("carbon"),
+                func.coalesce(func.sum(trips.c.points), 0).label("points"),
+            )
+            # Los viajes con su trabajo de agregación pendiente aún no suman
+            .where(trips.c.user_id.in_(user_ids), trips.c.aggregated.is_(True))
+            .group_by(trips.c.user_id)
+        )
+        expected = {row.user_id: (row.carbon, row.points) for row in result}
+
+        # Sumar lo que aportaron los meses archivados
+        result = await db.execute(
+            select(
+                archived.c.user_id,
+                func.sum(archived.c.carbon_saved_grams).label("carbon"),
+                func.sum(archived.c.points).label("points"),
+            )
+            .where(archived.c.user_id.in_(user_ids))
+            .group_by(archived.c.user_id)
+        )
+        for row in result:
+            carbon, points = expected.get(row.user_id, (0.0, 0))
+            expected[row.user_id] = (carbon + row.carbon, points + row.points)
+
+        adjustments = []
+        for row in chunk:
+            carbon, points = expected.get(row.user_id, (0.0, 0))
+            carbon_drift = carbon - row.total_carbon_reduction_grams
+            points_drift = points - row.total_points
+            if abs(carbon_drift) > CARBON_TOLERANCE_GRAMS or points_drift:
+                adjustments.append({
+                    "user_id": row.user_id,
+                    "points": points_drift,
+                    "carbon_saved_grams": carbon_drift,
+                    "carbon_credits": carbon_credits_for(carbon_drift),
+                    "reason": LedgerReason.adjustment,
+                })
+        repaired_users = [entry["user_id"] for entry in adjustments]
+
+        report["checked"] += len(chunk)
+        report["drifted"] += len(adjustments)
+
+        if repair:
+            if adjustments:
+                await append_entries(db, adjustments)
+                report["repaired"] += len(adjustments)
+            if rebuild_rollups:
+                await _rebuild_rollups(db, user_ids, boundary)
+            await db.commit()
+            if repaired_users:
+                await response_cache.safe_invalidate(*[user_tag(user_id) for user_id in repaired_users])
+        else:
+            await db.rollback()
+
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Solo reportar la deriva")
+    parser.add_argument("--rollups", action="store_true", help="Reconstruir también los acumulados por periodo")
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        report = await reconcile_individual_totals(
+            db,
+            chunk_size=args.chunk_size,
+            repair=not args.dry_run,
+            rebuild_rollups=args.rollups,
+        )
+    await engine.dispose()
+    print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
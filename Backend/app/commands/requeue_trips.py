@@ -0,0 +1,39 @@
+"""
+Reencola la agregación de los viajes que siguen con `aggregated = false`.
+
+La API y los workers ya barren periódicamente (JOBS_SWEEP_ENABLED); este
+comando sirve después de corregir la causa de trabajos en `jobs:dead`,
+sin esperar al siguiente barrido. Reencolar es seguro: la agregación y
+las tablas de posiciones son idempotentes por viaje.
+
+Uso:
+    python -m app.commands.requeue_trips [--older-than-seconds 0] [--batch-size 5000]
+"""
+import argparse
+import asyncio
+
+from app.core.database import AsyncSessionLocal, engine
+from app.core.redis import redis
+from app.jobs.sweep import JOBS_SWEEP_BATCH_SIZE, requeue_unaggregated_trips
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--older-than-seconds", type=float, default=0,
+        help="Solo viajes ingresados hace más de estos segundos"
+    )
+    parser.add_argument("--batch-size", type=int, default=JOBS_SWEEP_BATCH_SIZE)
+    args = parser.parse_args()
+
+    # Un solo lote: los viajes siguen sin agregar hasta que un worker los
+    # procesa, y un segundo lote volvería a tomar los mismos
+    async with AsyncSessionLocal() as db:
+        requeued = await requeue_unaggregated_trips(db, args.older_than_seconds, args.batch_size)
+    await engine.dispose()
+    await redis.aclose()
+    print({"requeued": requeued})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
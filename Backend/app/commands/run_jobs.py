@@ -0,0 +1,47 @@
+"""
+Worker dedicado de trabajos en segundo plano.
+
+Consume los mismos streams que los workers dentro de la API; con
+JOBS_WORKER_ENABLED=False en la API, todo el procesamiento queda en estos
+procesos. También barren los viajes sin agregar (JOBS_SWEEP_ENABLED); un
+candado en Redis evita barridos simultáneos con la API. La concurrencia por tipo se ajusta con JOBS_CONCURRENCY_<TIPO>
+(por ejemplo JOBS_CONCURRENCY_TRIPS_AGGREGATE=8).
+
+Uso:
+    python -m app.commands.run_jobs [--consumer nombre]
+"""
+import argparse
+import asyncio
+import signal
+
+from app.core.database import engine
+from app.core.redis import redis, redis_binary
+from app.jobs.sweep import aggregation_sweeper
+from app.jobs.worker import JobWorker
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consumer", help="Nombre del consumidor en el grupo (por defecto host-pid)")
+    args = parser.parse_args()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    worker = JobWorker(consumer=args.consumer)
+    await worker.start()
+    await aggregation_sweeper.start()
+    print(f"worker {worker.consumer} en marcha")
+    await stop.wait()
+
+    await aggregation_sweeper.stop()
+    await worker.stop()
+    await engine.dispose()
+    await redis.aclose()
+    await redis_binary.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
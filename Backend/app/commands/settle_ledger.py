@@ -0,0 +1,32 @@
+"""
+Asienta en los saldos y totales de `individuals` los movimientos pendientes
+de `pointsLedger`.
+
+La API ya asienta periódicamente (LEDGER_SETTLE_ENABLED); este comando
+sirve para vaciar la cola a mano o desde un cron cuando el asentamiento
+de la API está desactivado. Puede correr junto a otros asentamientos:
+cada lote toma sus movimientos con FOR UPDATE SKIP LOCKED.
+
+Uso:
+    python -m app.commands.settle_ledger [--batch-size 5000]
+"""
+import argparse
+import asyncio
+
+from app.core.database import engine
+from app.services.ledger import LEDGER_SETTLE_BATCH_SIZE, LedgerSettler
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=LEDGER_SETTLE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    settler = LedgerSettler(enabled=True, interval_seconds=0, batch_size=args.batch_size)
+    settled = await settler.run_once()
+    await engine.dispose()
+    print({"settled": settled, "batches": settler.batches})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
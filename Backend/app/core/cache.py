@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import orjson
+from fastapi import Request, Response, status
+
+from app.core.redis import redis
+from app.core.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# Las respuestas son por usuario: el cliente puede guardarlas pero debe
+# revalidarlas con If-None-Match antes de usarlas
+CACHE_CONTROL = "private, no-cache"
+
+
+def user_tag(user_id: int) -> str:
+    """
+    Etiqueta de todo lo que depende de un usuario: perfil, totales y viajes.
+    """
+    return f"user:{user_id}"
+
+
+def organization_tag(organization_id: int) -> str:
+    """
+    Etiqueta de los tableros de una organización; cambia con los viajes de sus miembros.
+    """
+    return f"organization:{organization_id}"
+
+
+LEADERBOARDS_TAG = "leaderboards"
+
+
+def _tag_key(tag: str) -> str:
+    return f"cache:tag:{tag}"
+
+
+def cache_key(name: str, *parts: Any) -> str:
+    """
+    Llave de una respuesta a partir del nombre del endpoint y sus parámetros.
+    """
+    digest = hashlib.blake2b(
+        json.dumps(parts, default=str, separators=(",", ":")).encode(), digest_size=12
+    ).hexdigest()
+    return f"cache:response:{name}:{digest}"
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Compara el ETag con If-None-Match (comparación débil, admite listas y *).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+
+class ResponseCache:
+    """
+    Caché de respuestas JSON en Redis invalidado por etiquetas.
+
+    Cada etiqueta tiene un contador de versión. Una entrada guarda las
+    versiones de sus etiquetas al momento de construirse y solo es válida
+    mientras coincidan; invalidar es incrementar el contador, sin buscar ni
+    borrar llaves. La entrada y las versiones se leen en un solo pipeline.
+    """
+
+    def __init__(self, enabled: bool, default_ttl: int) -> None:
+        self.enabled = enabled
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def _lookup(self, key: str, tags: Sequence[str]):
+        """
+        Devuelve (entrada válida o None, versiones actuales o None si Redis falló).
+        """
+        try:
+            pipe = redis.pipeline(transaction=False)
+            pipe.get(key)
+            for tag in tags:
+                pipe.get(_tag_key(tag))
+            cached, *versions = await pipe.execute()
+        except Exception:
+            self.errors += 1
+            logger.warning("No se pudo leer el caché de respuestas", exc_info=True)
+            return None, None
+
+        if cached is not None:
+            entry = orjson.loads(cached)
+            if entry["versions"] == versions:
+                return entry, versions
+        return None, versions
+
+    async def _store(self, key: str, versions: List[Optional[str]], etag: str, body: bytes, ttl: int) -> None:
+        entry = {"versions": versions, "etag": etag, "body": body.decode()}
+        try:
+            await redis.set(key, orjson.dumps(entry), ex=ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("No se pudo escribir el caché de respuestas", exc_info=True)
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        tags: Sequence[str],
+        build: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None
+    ) -> Response:
+        """
+        Sirve la respuesta desde Redis o la construye con `build` y la guarda.
+
+        Las versiones se leen antes de construir: si una invalidación llega
+        mientras tanto, la entrada nace vieja y la siguiente lectura la descarta.
+        """
+        entry, versions = (None, None)
+        if self.enabled:
+            entry, versions = await self._lookup(key, tags)
+
+        if entry is not None:
+            self.hits += 1
+            etag, body, source = entry["etag"], entry["body"].encode(), "hit"
+        else:
+            self.misses += 1
+            value = await build()
+            body = dumps(value)
+            etag, source = make_etag(body), "miss"
+            if versions is not None:
+                await self._store(key, versions, etag, body, ttl or self.default_ttl)
+
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Cache": source}
+        if etag_matches(request, etag):
+            self.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *tags: str) -> None:
+        if not tags:
+            return
+        pipe = redis.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(_tag_key(tag))
+        await pipe.execute()
+        self.invalidations += len(tags)
+
+    async def safe_invalidate(self, *tags: str) -> None:
+        """
+        Igual que `invalidate`, pero una falla de Redis solo se registra. Las
+        entradas afectadas expiran a más tardar con su TTL.
+        """
+        try:
+            await self.invalidate(*tags)
+        except Exception:
+            self.errors += 1
+            logger.warning("No se pudo invalidar el caché de respuestas", exc_info=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "invalidated_tags": self.invalidations,
+            "errors": self.errors,
+            "default_ttl": self.default_ttl,
+        }
+
+
+response_cache = ResponseCache(enabled=RESPONSE_CACHE_ENABLED, default_ttl=RESPONSE_CACHE_TTL)
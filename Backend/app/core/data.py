@@ -1,12 +1,15 @@
 from pydantic import BaseModel
+from typing import Optional
 from app.models.dataTypes import UserType
 
 class TokenInformation(BaseModel):
     id: int
     type: UserType
+    sid: Optional[str] = None
     token_type: str = "access"
 
 class RefreshTokenInformation(BaseModel):
     id: int
     type: UserType
+    sid: Optional[str] = None
     token_type: str = "refresh"
@@ -1,14 +1,26 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
+from app.core.metrics import Gauge, instrument_engine, registry
+from app.core.pool import InstrumentedAsyncQueuePool
+from app.core.sqlLogging import sql_logger
+
 # Configuración de la base de datos desde variables de entorno
 DB_USER = os.getenv("POSTGRES_USER", "user")
 DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
 DB_HOST = os.getenv("POSTGRES_HOST", "db")
 DB_PORT = os.getenv("POSTGRES_PORT", "5432")
 DB_NAME = os.getenv("POSTGRES_DB", "mydb")
-DB_ECHO = os.getenv("DB_ECHO", "True").lower() == "true"
+
+# Configuración del pool de conexiones (por proceso de uvicorn)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
 
 # Construir la URL de la base de datos
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
@@ -16,10 +28,27 @@ DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 # Crear el motor de la base de datos
 engine = create_async_engine(
     DATABASE_URL,
-    echo=DB_ECHO,
-    future=True
+    future=True,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
 )
 
+# Sentencias y tiempo en la base de datos, por petición y del proceso (/metrics)
+instrument_engine(engine.sync_engine)
+registry.register(Gauge(
+    "db_pool_checked_out",
+    "Conexiones del pool en uso.",
+    lambda: engine.pool.checkedout(),
+))
+
+# Registro estructurado de sentencias muestreadas y lentas (reemplaza a echo)
+sql_logger.install(engine)
+
 # Crear la sesión
 AsyncSessionLocal = sessionmaker(
     engine,
@@ -42,3 +71,29 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+class QueryCounter:
+    """
+    Cuenta las sentencias SQL que ejecuta el engine mientras está activo.
+
+    Uso:
+        with QueryCounter() as counter:
+            await login_individual_user(db, data)
+        assert counter.count == 1
+    """
+
+    def __init__(self, target=None) -> None:
+        self.target = (target or engine).sync_engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.target, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.target, "before_cursor_execute", self._on_execute)
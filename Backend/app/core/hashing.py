@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.metrics import Gauge, password_hash_seconds, registry
+
+# Configuración de bcrypt
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Configuración del pool de hashing
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread").lower()
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return pwd_context.verify(plain_password, hashed_password)
+    except ValueError:
+        # Hash no reconocido (por ejemplo, cuentas sin contraseña)
+        return False
+
+
+class HashingStats:
+    """
+    Métricas acumuladas por operación (hash / verify).
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rejected = 0
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total_seconds += elapsed
+        if elapsed > self.max_seconds:
+            self.max_seconds = elapsed
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "total_seconds": round(self.total_seconds, 6),
+            "avg_seconds": round(self.total_seconds / self.calls, 6) if self.calls else 0.0,
+            "max_seconds": round(self.max_seconds, 6),
+        }
+
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt fuera del event loop en un pool acotado.
+
+    Si hay más de `max_queue` operaciones en curso se rechaza la petición
+    con un 503 en lugar de acumular latencia para todo el worker.
+    """
+
+    def __init__(self, executor_type: str, workers: int, max_queue: int) -> None:
+        self.executor_type = executor_type
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.stats: Dict[str, HashingStats] = {
+            "hash": HashingStats(),
+            "verify": HashingStats(),
+        }
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="bcrypt"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable, *args, shed: bool = True):
+        operation_stats = self.stats[operation]
+        if shed and self.in_flight >= self.max_queue:
+            operation_stats.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio saturado, intenta de nuevo más tarde",
+                headers={"Retry-After": "1"}
+            )
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+            elapsed = time.perf_counter() - start
+            operation_stats.record(elapsed)
+            password_hash_seconds.observe((operation,), elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hashea un lote repartiéndolo entre los workers del pool.
+
+        Pensado para procesos por lotes: espera turno en lugar de
+        rechazar con 503.
+        """
+        if not passwords:
+            return []
+        chunk_size = max(1, -(-len(passwords) // self.workers))
+        chunks = [
+            passwords[i:i + chunk_size]
+            for i in range(0, len(passwords), chunk_size)
+        ]
+        results = await asyncio.gather(*[
+            self._run("hash", _hash_many, chunk, shed=False)
+            for chunk in chunks
+        ])
+        return [hashed for chunk in results for hashed in chunk]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", _verify, plain_password, hashed_password)
+
+    def snapshot(self) -> dict:
+        return {
+            "executor": self.executor_type,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "operations": {
+                name: operation_stats.as_dict()
+                for name, operation_stats in self.stats.items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=PASSWORD_HASH_EXECUTOR,
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+)
+
+registry.register(Gauge(
+    "password_hash_in_flight",
+    "Operaciones de bcrypt en curso o esperando en el pool.",
+    lambda: password_hasher.in_flight,
+))
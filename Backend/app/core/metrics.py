@@ -0,0 +1,257 @@
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+# Métricas de este proceso en formato de texto de Prometheus (GET /metrics).
+# Cada worker de uvicorn tiene su propio registro: Prometheus debe
+# consultar a cada proceso por separado.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+JWT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+BCRYPT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Sin etiquetas la serie se exporta desde el arranque, aunque valga 0
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge:
+    """
+    Valor instantáneo que se lee al exportar desde `callback`.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_format_value(self.callback())}"
+
+
+class Histogram:
+    """
+    Histograma con cubetas fijas. `observe` solo hace una búsqueda binaria y
+    tres sumas; los acumulados por cubeta se calculan al exportar.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Por combinación de etiquetas: [conteos por cubeta..., +Inf, suma]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, INF_LABEL)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta y código de estado.",
+    ("method", "route", "status"),
+))
+http_request_queries = registry.register(Histogram(
+    "http_request_db_queries",
+    "Sentencias SQL ejecutadas por petición.",
+    ("method", "route"),
+    QUERY_COUNT_BUCKETS,
+))
+http_request_db_seconds = registry.register(Histogram(
+    "http_request_db_seconds",
+    "Tiempo en la base de datos por petición.",
+    ("method", "route"),
+))
+db_queries_total = registry.register(Counter(
+    "db_queries_total",
+    "Sentencias SQL ejecutadas por el proceso, incluidas las de trabajos en segundo plano.",
+))
+db_query_seconds_total = registry.register(Counter(
+    "db_query_seconds_total",
+    "Tiempo acumulado de las sentencias SQL del proceso.",
+))
+jwt_seconds = registry.register(Histogram(
+    "jwt_duration_seconds",
+    "Tiempo de firmar (encode) y verificar (decode) tokens JWT.",
+    ("operation",),
+    JWT_BUCKETS,
+))
+password_hash_seconds = registry.register(Histogram(
+    "password_hash_duration_seconds",
+    "Tiempo de bcrypt por operación, incluida la espera en el pool de hashing.",
+    ("operation",),
+    BCRYPT_BUCKETS,
+))
+
+
+class RequestDbStats:
+    __slots__ = ("queries", "seconds", "scope")
+
+    def __init__(self, scope: Optional[dict] = None) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+        self.scope = scope
+
+
+# Acumulado de la petición en curso; las sentencias fuera de una petición
+# (trabajos, comandos) solo cuentan en los totales del proceso
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def record_query(elapsed: float) -> None:
+    db_queries_total.inc()
+    db_query_seconds_total.inc(amount=elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+
+
+def current_route() -> Optional[str]:
+    """
+    Plantilla de la ruta de la petición en curso, o None fuera de una petición.
+    """
+    stats = request_db_stats.get()
+    if stats is None or stats.scope is None:
+        return None
+    route = stats.scope.get("route")
+    return getattr(route, "path", None) or stats.scope.get("path")
+
+
+def instrument_engine(sync_engine) -> None:
+    """
+    Mide cada sentencia con los eventos before/after_cursor_execute del engine.
+    """
+    def before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("metrics_started")
+        if started:
+            record_query(time.perf_counter() - started.pop())
+
+    event.listen(sync_engine, "before_cursor_execute", before)
+    event.listen(sync_engine, "after_cursor_execute", after)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra latencia, estado y sentencias SQL de cada
+    petición HTTP.
+
+    La ruta se etiqueta con su plantilla (`/trips/{trip_id}/segments`), no
+    con la URL, para que el número de series no crezca con los ids; las
+    peticiones que no coinciden con ninguna ruta comparten `unmatched`.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestDbStats(scope)
+        token = request_db_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_db_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_request_seconds.observe((method, path, str(status_code)), elapsed)
+            http_request_queries.observe((method, path), stats.queries)
+            http_request_db_seconds.observe((method, path), stats.seconds)
@@ -0,0 +1,73 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """
+    Métricas acumuladas del pool de conexiones.
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+        self.overflow_events = 0
+
+    def record_wait(self, elapsed: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += elapsed
+        if elapsed > self.wait_seconds_max:
+            self.wait_seconds_max = elapsed
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Pool asíncrono que mide cuánto tarda cada checkout, cuántas veces se
+    agotó el tiempo de espera y cuántas conexiones se abrieron por encima
+    de `pool_size`.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_wait(time.perf_counter() - start)
+
+    def _inc_overflow(self):
+        created = super()._inc_overflow()
+        # _overflow arranca en -pool_size: solo es positivo por encima del tamaño base
+        if created and self._overflow > 0:
+            self.stats.overflow_events += 1
+        return created
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def snapshot(self) -> dict:
+        stats = self.stats
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": stats.checkouts,
+            "wait_seconds_total": round(stats.wait_seconds_total, 6),
+            "wait_seconds_avg": round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+            "wait_seconds_max": round(stats.wait_seconds_max, 6),
+            "timeouts": stats.timeouts,
+            "overflow_events": stats.overflow_events,
+        }
@@ -1,4 +1,4 @@
-import aioredis
+from redis import asyncio as aioredis
 import os
 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis")
@@ -6,4 +6,7 @@ REDIS_PORT = os.getenv("REDIS_PORT", "6379")
 
 REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}"
 
-redis = aioredis.from_url(REDIS_URL)
+redis = aioredis.from_url(REDIS_URL, decode_responses=True)
+
+# Cliente sin decodificación para valores binarios (teselas vectoriales)
+redis_binary = aioredis.from_url(REDIS_URL)
@@ -0,0 +1,38 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+# orjson serializa de forma nativa dict, list, datetime, date, UUID, Enum,
+# dataclasses y arreglos de numpy; lo demás (modelos de Pydantic, Decimal)
+# pasa por `_default`. OPT_UTC_Z escribe UTC como "Z", igual que Pydantic.
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return jsonable_encoder(value)
+
+
+def dumps(value: Any) -> bytes:
+    """
+    JSON compacto en bytes, listo para el cuerpo de una respuesta.
+    """
+    return orjson.dumps(value, default=_default, option=JSON_OPTIONS)
+
+
+class JSONResponse(ORJSONResponse):
+    """
+    Clase de respuesta por defecto de la API.
+
+    Con `response_model`, FastAPI valida y convierte el valor antes de
+    llegar aquí. Las listas grandes se devuelven como `JSONResponse` ya
+    construida a partir de las filas: FastAPI no la vuelve a validar y
+    orjson escribe los dicts directamente.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,15 +1,18 @@
-from passlib.context import CryptContext
+from collections import OrderedDict
 from datetime import datetime, timedelta, UTC
 from typing import Optional, Tuple
+import hashlib
+import secrets
+import time
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.data import TokenInformation, RefreshTokenInformation
 import os
 from app.models.user import User
-
-# Configuración de bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.hashing import password_hasher
+from app.core.metrics import jwt_seconds
+from app.core.sessions import SessionStore
 
 # Configuración de JWT
 SECRET_KEY = os.getenv("SECRET_KEY", "tu_clave_secreta_aqui")
@@ -17,9 +20,100 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
-def get_password_hash(password: str) -> str:
+# Token interno de /monitoring; sin él, esas rutas no se montan
+MONITORING_TOKEN = os.getenv("MONITORING_TOKEN", "")
+
+# Tamaño máximo del caché de tokens ya verificados
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+class TokenCache:
+    """
+    Caché LRU de payloads de tokens ya verificados.
+
+    La llave es el SHA-256 del token, así que solo un token idéntico al
+    verificado puede reutilizar el resultado. Cada entrada se descarta al
+    llegar al `exp` del token.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def set(self, token: str, payload: dict) -> None:
+        expires_at = payload.get("exp")
+        if self.max_size <= 0 or not isinstance(expires_at, (int, float)):
+            return
+
+        key = self._key(token)
+        self._entries[key] = (payload, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+# Las sesiones viven lo mismo que su refresh token
+session_store = SessionStore(ttl_seconds=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60)
+
+def _encode(claims: dict) -> str:
+    start = time.perf_counter()
+    try:
+        return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+    finally:
+        jwt_seconds.observe(("encode",), time.perf_counter() - start)
+
+def _decode(token: str) -> dict:
+    start = time.perf_counter()
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    finally:
+        jwt_seconds.observe(("decode",), time.perf_counter() - start)
+
+async def get_password_hash(password: str) -> str:
     """
-    Genera un hash de la contraseña.
+    Genera un hash de la contraseña en el pool de hashing.
     
     Args:
         password: Contraseña en texto plano
@@ -27,11 +121,11 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Hash de la contraseña
     """
-    return pwd_context.hash(password)
+    return await password_hasher.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verifica si la contraseña coincide con el hash.
+    Verifica si la contraseña coincide con el hash en el pool de hashing.
     
     Args:
         plain_password: Contraseña en texto plano
@@ -40,7 +134,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True si la contraseña coincide, False en caso contrario
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hasher.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -60,7 +154,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.now(UTC) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 def create_refresh_token(data: dict) -> str:
@@ -76,7 +170,7 @@ def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.now(UTC) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 def create_tokens(data: TokenInformation) -> Tuple[str, str]:
@@ -95,19 +189,25 @@ def create_tokens(data: TokenInformation) -> Tuple[str, str]:
 
 def verify_token(token: str) -> dict:
     """
-    Verifica y decodifica un token JWT.
+    Verifica y decodifica un token JWT. Los tokens ya verificados se
+    sirven desde `token_cache` hasta su expiración.
     
     Args:
         token: Token JWT a verificar
         
     Returns:
-        dict: Datos decodificados del token
+        dict: Datos decodificados del token (compartidos, no modificar)
         
     Raises:
         HTTPException: Si el token es inválido o ha expirado
     """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode(token)
+        token_cache.set(token, payload)
         return payload
     except JWTError:
         raise HTTPException(
@@ -115,12 +215,13 @@ def verify_token(token: str) -> dict:
             detail="Token inválido o expirado"
         ) 
 
-def refresh_tokens_action(refresh_token: str) -> Tuple[str, str, int]:
+def refresh_tokens_action(refresh_token: str) -> Tuple[str, str, int, Optional[str]]:
     """
-    Refresca Tokens en caso que el de acceso este vencido 
+    Refresca Tokens en caso que el de acceso este vencido.
+    Devuelve (access_token, refresh_token, user_id, sid).
     """
     try:
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode(refresh_token)
         #si el refresh_token es valido todavia, manda a llamar a create_tokens
         if payload.get("token_type") != "refresh":
             raise HTTPException(
@@ -131,18 +232,20 @@ def refresh_tokens_action(refresh_token: str) -> Tuple[str, str, int]:
         # Crear nuevos tokens usando la información del payload
         token_info = TokenInformation(
             id=payload.get("id"),
-            type=payload.get("type")
+            type=payload.get("type"),
+            sid=payload.get("sid")
         )
         refresh_info = RefreshTokenInformation(
             id=payload.get("id"),
-            type=payload.get("type")
+            type=payload.get("type"),
+            sid=payload.get("sid")
         )
 
         access_token = create_access_token(token_info.model_dump())
         refresh_token_created = create_refresh_token(refresh_info.model_dump())
         
-        # Devolver los tokens junto con el ID del usuario
-        return access_token, refresh_token_created, int(payload.get("id"))
+        # Devolver los tokens junto con el ID del usuario y su sesión
+        return access_token, refresh_token_created, int(payload.get("id")), payload.get("sid")
         
     except JWTError:
         raise HTTPException(
@@ -151,16 +254,49 @@ def refresh_tokens_action(refresh_token: str) -> Tuple[str, str, int]:
         )
 
 security = HTTPBearer()
+monitoring_security = HTTPBearer(auto_error=False)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+async def get_current_session(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> TokenInformation:
     """
-    Obtiene el ID del usuario actual desde el token JWT.
+    Obtiene la información del token de acceso actual y verifica que su
+    sesión no haya sido cerrada.
     """
     try:
         payload = verify_token(credentials.credentials)
-        return int(payload.get("id"))
-    except Exception as e:
+        token_info = TokenInformation(
+            id=payload.get("id"),
+            type=payload.get("type"),
+            sid=payload.get("sid")
+        )
+    except Exception:
+        token_info = None
+
+    if token_info is None or not await session_store.is_active(token_info.sid):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado"
-        ) 
+        )
+    return token_info
+
+async def get_current_user(session: TokenInformation = Depends(get_current_session)) -> int:
+    """
+    Obtiene el ID del usuario actual desde el token JWT.
+    """
+    return session.id
+
+async def require_monitoring_token(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(monitoring_security)
+) -> None:
+    """
+    Restringe las rutas internas de /monitoring a quien presente
+    MONITORING_TOKEN como Bearer.
+    """
+    if not MONITORING_TOKEN or credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), MONITORING_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de monitoreo inválido"
+        )
@@ -0,0 +1,111 @@
+import hashlib
+from typing import Optional
+
+from app.core.redis import redis
+
+# Reemplaza el hash del refresh token solo si coincide con el presentado,
+# de forma atómica, para que dos refresh concurrentes no roten la misma sesión.
+# El índice del usuario se renueva en el mismo bloque: si expirara antes que
+# una sesión que se sigue renovando, cerrar todas las sesiones no la vería
+_ROTATE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'refresh') == ARGV[1] then
+    redis.call('HSET', KEYS[1], 'refresh', ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    redis.call('SADD', KEYS[2], ARGV[4])
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionStore:
+    """
+    Sesiones en Redis.
+
+    Cada sesión es un hash `session:{sid}` que vive lo mismo que su refresh
+    token; `user_sessions:{user_id}` agrupa las sesiones de un usuario para
+    poder cerrarlas todas y vive al menos lo que la más reciente de ellas.
+    Revisar si una sesión sigue activa es un EXISTS.
+    """
+
+    def __init__(self, ttl_seconds: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._rotate = redis.register_script(_ROTATE_SCRIPT)
+
+    @staticmethod
+    def session_key(sid: str) -> str:
+        return f"session:{sid}"
+
+    @staticmethod
+    def user_sessions_key(user_id: int) -> str:
+        return f"user_sessions:{user_id}"
+
+    async def create(self, sid: str, user_id: int, user_type: str, refresh_token: str) -> None:
+        session_key = self.session_key(sid)
+        user_sessions_key = self.user_sessions_key(user_id)
+        pipe = redis.pipeline(transaction=True)
+        pipe.hset(session_key, mapping={
+            "user_id": user_id,
+            "type": user_type,
+            "refresh": _digest(refresh_token),
+        })
+        pipe.expire(session_key, self.ttl_seconds)
+        pipe.sadd(user_sessions_key, sid)
+        pipe.expire(user_sessions_key, self.ttl_seconds)
+        await pipe.execute()
+        await self._prune(user_sessions_key)
+
+    async def _prune(self, user_sessions_key: str) -> None:
+        """
+        Quita del índice las sesiones que ya expiraron, para que no crezca
+        con cada inicio de sesión de un usuario que renueva otra sesión.
+        """
+        sids = list(await redis.smembers(user_sessions_key))
+        if not sids:
+            return
+        pipe = redis.pipeline(transaction=False)
+        for sid in sids:
+            pipe.exists(self.session_key(sid))
+        alive = await pipe.execute()
+        expired = [sid for sid, exists in zip(sids, alive) if not exists]
+        if expired:
+            await redis.srem(user_sessions_key, *expired)
+
+    async def is_active(self, sid: Optional[str]) -> bool:
+        if not sid:
+            return False
+        return await redis.exists(self.session_key(sid)) == 1
+
+    async def rotate(self, sid: str, user_id: int, old_refresh_token: str, new_refresh_token: str) -> bool:
+        """
+        Registra el nuevo refresh token y renueva la sesión junto con el
+        índice del usuario. Devuelve False si la sesión no existe o si el
+        refresh presentado ya fue usado.
+        """
+        rotated = await self._rotate(
+            keys=[self.session_key(sid), self.user_sessions_key(user_id)],
+            args=[_digest(old_refresh_token), _digest(new_refresh_token), self.ttl_seconds, sid],
+        )
+        return rotated == 1
+
+    async def revoke(self, user_id: int, sid: str) -> None:
+        pipe = redis.pipeline(transaction=True)
+        pipe.delete(self.session_key(sid))
+        pipe.srem(self.user_sessions_key(user_id), sid)
+        await pipe.execute()
+
+    async def revoke_all(self, user_id: int) -> int:
+        user_sessions_key = self.user_sessions_key(user_id)
+        sids = await redis.smembers(user_sessions_key)
+        pipe = redis.pipeline(transaction=True)
+        for sid in sids:
+            pipe.delete(self.session_key(sid))
+        pipe.delete(user_sessions_key)
+        deleted = await pipe.execute()
+        # Solo cuentan las sesiones que seguían activas
+        return sum(deleted[:-1])
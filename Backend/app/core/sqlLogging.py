@@ -0,0 +1,272 @@
+import asyncio
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+
+from app.core.metrics import current_route
+
+# Registro estructurado de SQL, en lugar del echo de SQLAlchemy (que escribe
+# cada sentencia de forma síncrona en stdout):
+#   - SQL_LOG_SAMPLE_RATE: fracción de sentencias que se registran siempre
+#   - SQL_LOG_SLOW_MS: las que tardan más se registran como lentas, con la
+#     forma de sus parámetros y la ruta que las originó (negativo: desactiva)
+#   - SQL_LOG_EXPLAIN: plan de las consultas lentas (SELECT), nunca con
+#     APP_ENV=production; SQL_LOG_EXPLAIN_ANALYZE lo ejecuta con ANALYZE,
+#     solo para las que no modifican datos (un WITH puede hacerlo)
+SQL_LOG_ENABLED = os.getenv("SQL_LOG_ENABLED", "True").lower() == "true"
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0"))
+SQL_LOG_SLOW_MS = float(os.getenv("SQL_LOG_SLOW_MS", "200"))
+SQL_LOG_MAX_STATEMENT_CHARS = int(os.getenv("SQL_LOG_MAX_STATEMENT_CHARS", "2000"))
+SQL_LOG_QUEUE_SIZE = int(os.getenv("SQL_LOG_QUEUE_SIZE", "10000"))
+APP_ENV = os.getenv("APP_ENV", "development").lower()
+SQL_LOG_EXPLAIN = os.getenv("SQL_LOG_EXPLAIN", "False").lower() == "true" and APP_ENV != "production"
+SQL_LOG_EXPLAIN_ANALYZE = os.getenv("SQL_LOG_EXPLAIN_ANALYZE", "False").lower() == "true"
+# Cada sentencia distinta se explica como máximo una vez en este intervalo
+SQL_LOG_EXPLAIN_INTERVAL_SECONDS = float(os.getenv("SQL_LOG_EXPLAIN_INTERVAL_SECONDS", "300"))
+SQL_LOG_EXPLAIN_TIMEOUT_MS = int(os.getenv("SQL_LOG_EXPLAIN_TIMEOUT_MS", "10000"))
+
+logger = logging.getLogger("app.sql")
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Una línea JSON por registro con los campos de `extra["sql"]`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": record.getMessage(),
+            **getattr(record, "sql", {}),
+        }
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Encola sin bloquear; con la cola llena descarta y cuenta, en lugar de
+    frenar las consultas de las peticiones.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}({len(value)})"
+    return type(value).__name__
+
+
+def parameters_shape(parameters: Any, executemany: bool) -> Any:
+    """
+    Tipos (y largos) de los parámetros, sin sus valores: suficiente para
+    reconocer la consulta sin escribir datos personales en el log.
+    """
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = parameters[0] if parameters else None
+        return {"rows": len(parameters), "row": parameters_shape(first, False)}
+    if isinstance(parameters, dict):
+        return {key: _type_name(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_type_name(value) for value in parameters]
+    return _type_name(parameters)
+
+
+# Un CTE puede modificar datos (WITH ... INSERT ... RETURNING): EXPLAIN
+# ANALYZE lo ejecutaría. Ante cualquiera de estas palabras solo se pide el plan
+_DATA_MODIFYING = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def _explainable(statement: str) -> bool:
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return head in ("SELECT", "WITH") and "FOR UPDATE" not in statement.upper()
+
+
+def _analyzable(statement: str) -> bool:
+    return _explainable(statement) and _DATA_MODIFYING.search(statement) is None
+
+
+class SqlLogger:
+    """
+    Engancha los eventos del engine para registrar sentencias muestreadas y
+    lentas. El registro solo encola: un hilo (QueueListener) escribe en
+    stdout fuera del event loop.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float,
+        slow_ms: float,
+        explain: bool,
+        explain_analyze: bool,
+        max_statement_chars: int,
+        queue_size: int,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_analyze = explain_analyze
+        self.max_statement_chars = max_statement_chars
+        self.queue_size = queue_size
+        self.engine = None
+        self.logged = 0
+        self.slow = 0
+        self.explained = 0
+        self._explained_at: Dict[str, float] = {}
+        self._explaining = 0
+        self._handler: Optional[DroppingQueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+
+    def install(self, engine) -> None:
+        """
+        Registra los eventos en `engine` (AsyncEngine) y arranca la salida.
+        """
+        if self.sample_rate <= 0 and self.slow_ms < 0:
+            return
+        self.engine = engine
+        self._start_output()
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _start_output(self) -> None:
+        if self._listener is not None:
+            return
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter())
+        self._handler = DroppingQueueHandler(queue.Queue(maxsize=self.queue_size))
+        self._listener = QueueListener(self._handler.queue, output)
+        self._listener.start()
+        logger.addHandler(self._handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """
+        Escribe lo que quede en la cola; se llama al apagar la API y al salir.
+        """
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            logger.removeHandler(self._handler)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_log_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("sql_log_started")
+        if not started:
+            return
+        elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+        slow = 0 <= self.slow_ms <= elapsed_ms
+        if not slow and not (self.sample_rate > 0 and random.random() < self.sample_rate):
+            return
+        if statement.startswith("EXPLAIN"):
+            return
+
+        self.logged += 1
+        fields = {
+            "duration_ms": round(elapsed_ms, 3),
+            "route": current_route(),
+            "statement": statement[:self.max_statement_chars],
+            "parameters": parameters_shape(parameters, executemany),
+            "rowcount": getattr(cursor, "rowcount", None),
+        }
+        if slow:
+            self.slow += 1
+            logger.warning("slow_query", extra={"sql": fields})
+            if self.explain and _explainable(statement):
+                self._schedule_explain(statement, parameters, fields)
+        else:
+            logger.info("sampled_query", extra={"sql": fields})
+
+    def _schedule_explain(self, statement: str, parameters: Any, fields: dict) -> None:
+        now = time.monotonic()
+        if now - self._explained_at.get(statement, -float("inf")) < SQL_LOG_EXPLAIN_INTERVAL_SECONDS:
+            return
+        # Uno a la vez: el plan es diagnóstico, no debe sumar carga
+        if self._explaining:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._explained_at[statement] = now
+        self._explaining += 1
+        loop.create_task(self._explain(statement, parameters, fields))
+
+    async def _explain(self, statement: str, parameters: Any, fields: dict) -> None:
+        """
+        Obtiene el plan en otra conexión, fuera de la transacción de la
+        petición, y siempre hace rollback. ANALYZE solo para sentencias que
+        no modifican datos.
+        """
+        analyze = self.explain_analyze and _analyzable(statement)
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        try:
+            async with self.engine.connect() as conn:
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SQL_LOG_EXPLAIN_TIMEOUT_MS}")
+                result = await conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)
+                plan = result.scalar()
+                await conn.rollback()
+            self.explained += 1
+            logger.warning("slow_query_plan", extra={"sql": {
+                "route": fields["route"],
+                "duration_ms": fields["duration_ms"],
+                "statement": fields["statement"],
+                "analyze": analyze,
+                "plan": plan if isinstance(plan, (list, dict)) else json.loads(plan),
+            }})
+        except Exception as e:
+            logger.warning("slow_query_plan_failed", extra={"sql": {
+                "statement": fields["statement"], "error": repr(e),
+            }})
+        finally:
+            self._explaining -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "explain": self.explain,
+            "explain_analyze": self.explain_analyze,
+            "logged": self.logged,
+            "slow": self.slow,
+            "explained": self.explained,
+            "queued": self._handler.queue.qsize() if self._handler else 0,
+            "dropped": self._handler.dropped if self._handler else 0,
+        }
+
+
+sql_logger = SqlLogger(
+    sample_rate=SQL_LOG_SAMPLE_RATE if SQL_LOG_ENABLED else 0,
+    slow_ms=SQL_LOG_SLOW_MS if SQL_LOG_ENABLED else -1,
+    explain=SQL_LOG_EXPLAIN,
+    explain_analyze=SQL_LOG_EXPLAIN_ANALYZE,
+    max_statement_chars=SQL_LOG_MAX_STATEMENT_CHARS,
+    queue_size=SQL_LOG_QUEUE_SIZE,
+)
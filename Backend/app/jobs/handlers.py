@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any, Dict
+
+from app.jobs.queue import LEADERBOARDS_UPDATE, TRIPS_AGGREGATE, job
+from app.services.aggregation import TripDelta
+from app.services.leaderboard import update_leaderboards_once
+from app.services.trip import aggregate_trips
+
+# Marca de los viajes ya sumados a las tablas: ZINCRBY no es idempotente,
+# un mensaje puede entregarse más de una vez y un viaje reencolado por el
+# barrido puede llegar en otro trabajo. La marca y los incrementos se
+# escriben juntos (`update_leaderboards_once`): un trabajo cancelado a la
+# mitad se reentrega sin perder ni repetir incrementos
+LEADERBOARD_MARKER_TTL = 24 * 60 * 60
+
+@job(TRIPS_AGGREGATE, concurrency=4)
+async def aggregate_trips_job(job_id: str, payload: Dict[str, Any]) -> None:
+    trip_keys = [(trip_id, datetime.fromisoformat(start_time)) for trip_id, start_time in payload["trips"]]
+    await aggregate_trips(job_id, payload["user_id"], trip_keys)
+
+
+@job(LEADERBOARDS_UPDATE, concurrency=2)
+async def update_leaderboards_job(job_id: str, payload: Dict[str, Any]) -> None:
+    deltas = [TripDelta.from_payload(delta) for delta in payload["deltas"]]
+    markers = [
+        f"jobs:done:leaderboards:{delta.trip_id}" if delta.trip_id is not None else f"jobs:done:{job_id}:{index}"
+        for index, delta in enumerate(deltas)
+    ]
+    await update_leaderboards_once(deltas, markers, LEADERBOARD_MARKER_TTL)
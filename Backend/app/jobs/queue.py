@@ -0,0 +1,92 @@
+import json
+import os
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.redis import redis
+
+# Un stream por tipo de trabajo, leído por un grupo de consumidores
+# compartido por todos los workers (API y procesos dedicados)
+JOBS_GROUP = os.getenv("JOBS_GROUP", "workers")
+JOBS_STREAM_MAXLEN = int(os.getenv("JOBS_STREAM_MAXLEN", "100000"))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", "5"))
+JOBS_BACKOFF_SECONDS = float(os.getenv("JOBS_BACKOFF_SECONDS", "2"))
+JOBS_BACKOFF_MAX_SECONDS = float(os.getenv("JOBS_BACKOFF_MAX_SECONDS", "300"))
+JOBS_DEFAULT_CONCURRENCY = int(os.getenv("JOBS_DEFAULT_CONCURRENCY", "2"))
+
+DEAD_LETTER_STREAM = "jobs:dead"
+# Reintentos programados: sorted set con la hora de ejecución como score
+DELAYED_KEY = "jobs:delayed"
+
+TRIPS_AGGREGATE = "trips.aggregate"
+LEADERBOARDS_UPDATE = "leaderboards.update"
+
+JobHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+@dataclass
+class JobType:
+    name: str
+    handler: JobHandler
+    concurrency: int
+
+
+JOB_TYPES: Dict[str, JobType] = {}
+
+
+def stream_key(job_type: str) -> str:
+    return f"jobs:stream:{job_type}"
+
+
+def job_concurrency(job_type: str, default: int) -> int:
+    """
+    Consumidores por tipo; `trips.aggregate` se ajusta con JOBS_CONCURRENCY_TRIPS_AGGREGATE.
+    """
+    variable = "JOBS_CONCURRENCY_" + job_type.upper().replace(".", "_")
+    return int(os.getenv(variable, str(default)))
+
+
+def job(name: str, concurrency: Optional[int] = None):
+    """
+    Registra el manejador de un tipo de trabajo. Los manejadores reciben
+    (job_id, payload) y deben ser idempotentes: la entrega es al menos una vez.
+    """
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_TYPES[name] = JobType(
+            name=name,
+            handler=handler,
+            concurrency=job_concurrency(name, concurrency or JOBS_DEFAULT_CONCURRENCY),
+        )
+        return handler
+    return register
+
+
+def backoff_seconds(attempt: int) -> float:
+    """
+    Espera exponencial antes del siguiente intento, con jitter para que los
+    reintentos de una misma falla no lleguen todos juntos.
+    """
+    delay = min(JOBS_BACKOFF_MAX_SECONDS, JOBS_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def job_fields(job_type: str, payload: Dict[str, Any], job_id: Optional[str] = None, attempt: int = 1) -> Dict[str, str]:
+    return {
+        "id": job_id or uuid.uuid4().hex,
+        "type": job_type,
+        "payload": json.dumps(payload, separators=(",", ":")),
+        "attempt": str(attempt),
+        "enqueued_at": repr(time.time()),
+    }
+
+
+async def enqueue(job_type: str, payload: Dict[str, Any], job_id: Optional[str] = None) -> str:
+    """
+    Agrega un trabajo a su stream y devuelve su id.
+    """
+    fields = job_fields(job_type, payload, job_id)
+    await redis.xadd(stream_key(job_type), fields, maxlen=JOBS_STREAM_MAXLEN, approximate=True)
+    return fields["id"]
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis import redis
+from app.jobs.queue import TRIPS_AGGREGATE, enqueue
+from app.models.trips import Trip
+from app.schemas.trip import MAX_TRIPS_PER_BATCH
+
+logger = logging.getLogger(__name__)
+
+# Viajes que siguen sin agregarse JOBS_SWEEP_AFTER_SECONDS después de
+# ingresarse se reencolan: su trabajo terminó en `jobs:dead`, o fallaron la
+# cola y la agregación en línea. Reencolar es seguro: la agregación es
+# idempotente por viaje y las tablas de posiciones también.
+JOBS_SWEEP_ENABLED = os.getenv("JOBS_SWEEP_ENABLED", "True").lower() == "true"
+JOBS_SWEEP_INTERVAL_SECONDS = float(os.getenv("JOBS_SWEEP_INTERVAL_SECONDS", "300"))
+JOBS_SWEEP_AFTER_SECONDS = float(os.getenv("JOBS_SWEEP_AFTER_SECONDS", "600"))
+JOBS_SWEEP_BATCH_SIZE = int(os.getenv("JOBS_SWEEP_BATCH_SIZE", "5000"))
+
+# Un solo proceso barre en cada intervalo
+SWEEP_LOCK_KEY = "jobs:sweep:lock"
+
+
+async def requeue_unaggregated_trips(
+    db: AsyncSession,
+    older_than_seconds: float = JOBS_SWEEP_AFTER_SECONDS,
+    batch_size: int = JOBS_SWEEP_BATCH_SIZE
+) -> int:
+    """
+    Encola trabajos trips.aggregate para los viajes ingresados hace más de
+    `older_than_seconds` que aún no se agregan, agrupados por usuario.
+    Devuelve cuántos viajes reencoló.
+    """
+    trips = Trip.__table__
+    result = await db.execute(
+        select(trips.c.user_id, trips.c.id, trips.c.start_time)
+        .where(
+            trips.c.aggregated.is_(False),
+            trips.c.created_at < func.now() - timedelta(seconds=older_than_seconds),
+        )
+        .order_by(trips.c.created_at)
+        .limit(batch_size)
+    )
+    by_user: Dict[int, List[list]] = defaultdict(list)
+    for row in result:
+        by_user[row.user_id].append([row.id, row.start_time.isoformat()])
+
+    for user_id, keys in by_user.items():
+        for start in range(0, len(keys), MAX_TRIPS_PER_BATCH):
+            await enqueue(
+                TRIPS_AGGREGATE,
+                {"user_id": user_id, "trips": keys[start:start + MAX_TRIPS_PER_BATCH]},
+                job_id=uuid.uuid4().hex,
+            )
+    return sum(len(keys) for keys in by_user.values())
+
+
+class AggregationSweeper:
+    """
+    Reencola periódicamente los viajes sin agregar. Con varios procesos,
+    un candado en Redis deja que solo uno barra por intervalo.
+    """
+
+    def __init__(self, enabled: bool, interval_seconds: float, after_seconds: float, batch_size: int) -> None:
+        self.enabled = enabled
+        self.interval_seconds = interval_seconds
+        self.after_seconds = after_seconds
+        self.batch_size = batch_size
+        self.requeued = 0
+        self.sweeps = 0
+        self.failures = 0
+        self.last_run: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        async with AsyncSessionLocal() as db:
+            requeued = await requeue_unaggregated_trips(db, self.after_seconds, self.batch_size)
+        self.sweeps += 1
+        self.requeued += requeued
+        self.last_run = datetime.now(timezone.utc)
+        if requeued:
+            logger.warning("Se reencolaron %d viajes sin agregar", requeued)
+        return requeued
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await redis.set(SWEEP_LOCK_KEY, 1, nx=True, ex=max(int(self.interval_seconds), 1)):
+                    await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.warning("No se pudieron reencolar los viajes sin agregar", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def snapshot(self) -> dict:
+        trips = Trip.__table__
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(func.count(), func.min(trips.c.created_at)).where(trips.c.aggregated.is_(False))
+            )
+            pending, oldest = result.one()
+        return {
+            "enabled": self.enabled,
+            "unaggregated_trips": pending,
+            "oldest_unaggregated_seconds": (
+                round((datetime.now(timezone.utc) - oldest).total_seconds(), 3) if oldest else None
+            ),
+            "requeued": self.requeued,
+            "sweeps": self.sweeps,
+            "failures": self.failures,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+
+aggregation_sweeper = AggregationSweeper(
+    enabled=JOBS_SWEEP_ENABLED,
+    interval_seconds=JOBS_SWEEP_INTERVAL_SECONDS,
+    after_seconds=JOBS_SWEEP_AFTER_SECONDS,
+    batch_size=JOBS_SWEEP_BATCH_SIZE,
+)
@@ -0,0 +1,221 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import ResponseError
+
+from app.core.redis import redis
+from app.jobs.queue import (
+    DEAD_LETTER_STREAM, DELAYED_KEY, JOB_TYPES, JOBS_GROUP, JOBS_MAX_ATTEMPTS, JOBS_STREAM_MAXLEN,
+    JobType, backoff_seconds, stream_key
+)
+
+logger = logging.getLogger(__name__)
+
+# Los workers corren dentro de la API salvo que se desactive aquí y se
+# usen procesos dedicados (python -m app.commands.run_jobs)
+JOBS_WORKER_ENABLED = os.getenv("JOBS_WORKER_ENABLED", "True").lower() == "true"
+JOBS_BLOCK_MS = int(os.getenv("JOBS_BLOCK_MS", "5000"))
+# Mensajes entregados a un consumidor que no los confirmó en este tiempo
+# (proceso caído) se reclaman con XAUTOCLAIM
+JOBS_CLAIM_IDLE_SECONDS = float(os.getenv("JOBS_CLAIM_IDLE_SECONDS", "60"))
+
+# Mueve de forma atómica un reintento vencido del sorted set a su stream:
+# solo el worker cuyo ZREM tuvo éxito lo publica
+_PROMOTE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+    return redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', unpack(ARGV, 3))
+end
+return false
+"""
+
+
+def load_job_types() -> None:
+    """
+    Importa los manejadores para que se registren en JOB_TYPES.
+    """
+    import app.jobs.handlers  # noqa: F401
+
+
+def _stream_timestamp(message_id: str) -> float:
+    return int(message_id.split("-")[0]) / 1000
+
+
+class JobWorker:
+    """
+    Consume los streams de trabajos con grupos de consumidores.
+
+    Cada tipo tiene `concurrency` tareas leyendo con XREADGROUP. Un trabajo
+    que falla se reprograma con espera exponencial en `jobs:delayed` y,
+    agotados los intentos, pasa al stream `jobs:dead` con el error.
+    """
+
+    def __init__(self, consumer: Optional[str] = None) -> None:
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"processed": 0, "retried": 0, "dead": 0, "seconds": 0.0}
+        )
+        self._tasks: List[asyncio.Task] = []
+        self._promote = redis.register_script(_PROMOTE_SCRIPT)
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        load_job_types()
+        for job_type in JOB_TYPES.values():
+            await self._ensure_group(job_type.name)
+            for _ in range(job_type.concurrency):
+                self._tasks.append(asyncio.create_task(self._consume(job_type)))
+        self._tasks.append(asyncio.create_task(self._promote_delayed()))
+        self._tasks.append(asyncio.create_task(self._reclaim_stale()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _ensure_group(self, job_type: str) -> None:
+        try:
+            await redis.xgroup_create(stream_key(job_type), JOBS_GROUP, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _consume(self, job_type: JobType) -> None:
+        stream = stream_key(job_type.name)
+        while True:
+            try:
+                response = await redis.xreadgroup(
+                    JOBS_GROUP, self.consumer, {stream: ">"}, count=1, block=JOBS_BLOCK_MS
+                )
+                for _, messages in response or []:
+                    for message_id, fields in messages:
+                        await self._run(job_type, message_id, fields)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Falla leyendo el stream %s", stream, exc_info=True)
+                await asyncio.sleep(1)
+
+    async def _run(self, job_type: JobType, message_id: str, fields: Dict[str, str]) -> None:
+        stream = stream_key(job_type.name)
+        attempt = int(fields.get("attempt", 1))
+        stats = self.stats[job_type.name]
+        started = time.perf_counter()
+        try:
+            await job_type.handler(fields["id"], json.loads(fields["payload"]))
+        except asyncio.CancelledError:
+            # Sin ACK: otro worker lo reclama cuando venza JOBS_CLAIM_IDLE_SECONDS
+            raise
+        except Exception as e:
+            pipe = redis.pipeline(transaction=True)
+            if attempt >= JOBS_MAX_ATTEMPTS:
+                pipe.xadd(
+                    DEAD_LETTER_STREAM,
+                    {**fields, "error": repr(e)[:1000], "failed_at": repr(time.time())},
+                    maxlen=JOBS_STREAM_MAXLEN,
+                    approximate=True,
+                )
+                stats["dead"] += 1
+                logger.error("Trabajo %s (%s) enviado a %s", fields["id"], job_type.name, DEAD_LETTER_STREAM, exc_info=True)
+            else:
+                retry = json.dumps({**fields, "attempt": str(attempt + 1)}, sort_keys=True)
+                pipe.zadd(DELAYED_KEY, {retry: time.time() + backoff_seconds(attempt)})
+                stats["retried"] += 1
+                logger.warning("Trabajo %s (%s) falló, intento %d", fields["id"], job_type.name, attempt, exc_info=True)
+            pipe.xack(stream, JOBS_GROUP, message_id)
+            await pipe.execute()
+        else:
+            await redis.xack(stream, JOBS_GROUP, message_id)
+            stats["processed"] += 1
+        finally:
+            stats["seconds"] += time.perf_counter() - started
+
+    async def _promote_delayed(self) -> None:
+        while True:
+            try:
+                due = await redis.zrangebyscore(DELAYED_KEY, 0, time.time(), start=0, num=100)
+                for entry in due:
+                    fields = json.loads(entry)
+                    flat = [value for item in fields.items() for value in item]
+                    await self._promote(
+                        keys=[DELAYED_KEY, stream_key(fields["type"])],
+                        args=[entry, JOBS_STREAM_MAXLEN, *flat],
+                    )
+                if len(due) == 100:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("No se pudieron reprogramar los reintentos", exc_info=True)
+            await asyncio.sleep(1)
+
+    async def _reclaim_stale(self) -> None:
+        idle_ms = int(JOBS_CLAIM_IDLE_SECONDS * 1000)
+        while True:
+            await asyncio.sleep(JOBS_CLAIM_IDLE_SECONDS / 2)
+            for job_type in list(JOB_TYPES.values()):
+                try:
+                    _, messages, *_ = await redis.xautoclaim(
+                        stream_key(job_type.name), JOBS_GROUP, self.consumer, idle_ms, start_id="0-0", count=50
+                    )
+                    for message_id, fields in messages:
+                        await self._run(job_type, message_id, fields)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.warning("No se pudieron reclamar trabajos de %s", job_type.name, exc_info=True)
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """
+        Estado de cada cola: pendientes de entregar (lag), entregados sin
+        confirmar, antigüedad del trabajo más viejo en espera y contadores
+        de este proceso.
+        """
+        load_job_types()
+        now = time.time()
+        queues = {}
+        for job_type in JOB_TYPES.values():
+            stream = stream_key(job_type.name)
+            try:
+                groups = await redis.xinfo_groups(stream)
+            except ResponseError:
+                # El stream aún no existe: ningún worker ha arrancado
+                groups = []
+            group = next((group for group in groups if group["name"] == JOBS_GROUP), None)
+            lag = group.get("lag") if group else None
+            oldest_waiting = None
+            if group and group.get("lag"):
+                # Primer mensaje después del último entregado
+                waiting = await redis.xrange(stream, min="(" + group["last-delivered-id"], count=1)
+                if waiting:
+                    oldest_waiting = round(now - _stream_timestamp(waiting[0][0]), 3)
+            stats = self.stats[job_type.name]
+            done = stats["processed"] + stats["retried"] + stats["dead"]
+            queues[job_type.name] = {
+                "concurrency": job_type.concurrency,
+                "length": await redis.xlen(stream),
+                "lag": lag,
+                "pending": group["pending"] if group else 0,
+                "oldest_waiting_seconds": oldest_waiting,
+                "processed": stats["processed"],
+                "retried": stats["retried"],
+                "dead": stats["dead"],
+                "mean_seconds": round(stats["seconds"] / done, 6) if done else 0.0,
+            }
+        return {
+            "consumer": self.consumer,
+            "running": bool(self._tasks),
+            "delayed": await redis.zcard(DELAYED_KEY),
+            "dead_letter": await redis.xlen(DEAD_LETTER_STREAM),
+            "queues": queues,
+        }
+
+
+job_worker = JobWorker()
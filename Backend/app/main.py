@@ -1,11 +1,47 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api import auth, individuals, organizations
+from app.api import auth, individuals, organizations, trips, leaderboards, tiles, monitoring
+from app.core.hashing import password_hasher
+from app.core.metrics import METRICS_ENABLED, MetricsMiddleware, registry
+from app.core.redis import redis, redis_binary
+from app.core.responses import JSONResponse
+from app.core.security import MONITORING_TOKEN
+from app.core.sqlLogging import sql_logger
+from app.jobs.sweep import aggregation_sweeper
+from app.jobs.worker import JOBS_WORKER_ENABLED, job_worker
+from app.services.ledger import ledger_settler
+from app.services.session import session_audit
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await session_audit.start()
+    if JOBS_WORKER_ENABLED:
+        await job_worker.start()
+    await aggregation_sweeper.start()
+    await ledger_settler.start()
+    yield
+    await ledger_settler.stop()
+    await aggregation_sweeper.stop()
+    await job_worker.stop()
+    await session_audit.stop()
+    # Liberar los workers de hashing y las conexiones a Redis al apagar
+    password_hasher.shutdown()
+    sql_logger.stop()
+    await redis.aclose()
+    await redis_binary.aclose()
+
 
 app = FastAPI(
     title="404 Carbon Reduction API",
     version=1.0,
+    lifespan=lifespan,
+    # Serialización con orjson en todas las respuestas JSON
+    default_response_class=JSONResponse,
 )
 
 # Configurar CORS
@@ -17,10 +53,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latencia por ruta, sentencias SQL por petición, bcrypt y JWT en /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(auth.router)
 app.include_router(individuals.router)
 app.include_router(organizations.router)
+app.include_router(trips.router)
+app.include_router(leaderboards.router)
+app.include_router(tiles.router)
+# Solo con MONITORING_TOKEN configurado
+if MONITORING_TOKEN:
+    app.include_router(monitoring.router)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas de este proceso en formato de texto de Prometheus.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
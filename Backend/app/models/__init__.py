@@ -5,6 +5,10 @@ from app.models.organization import Organization
 from app.models.authToken import AuthToken
 from app.models.trips import Trip
 from app.models.activitySegments import ActivitySegment
+from app.models.activityRollups import UserActivityRollup
+from app.models.archivedTripTotals import ArchivedTripTotal
+from app.models.organizationRollups import OrganizationModeRollup, OrganizationMemberDay
+from app.models.pointsLedger import PointsLedgerEntry
 
 # Importa aquí todos los modelos que crees
-__all__ = ["Base", "User", "Individual", "Organization", "AuthToken", "Trip", "ActivitySegment"]
+__all__ = ["Base", "User", "Individual", "Organization", "AuthToken", "Trip", "ActivitySegment", "UserActivityRollup", "ArchivedTripTotal", "OrganizationModeRollup", "OrganizationMemberDay", "PointsLedgerEntry"]
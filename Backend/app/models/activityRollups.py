@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey, Float, Date
+from app.models.base import Base
+from app.models.dataTypes import rollup_period_enum
+
+class UserActivityRollup(Base):
+    __tablename__ = "userActivityRollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period = Column(rollup_period_enum, primary_key=True)
+    period_start = Column(Date, primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+    distance_meters = Column(Float, nullable=False, default=0)
+    duration_seconds = Column(Float, nullable=False, default=0)
+    carbon_saved_grams = Column(Float, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
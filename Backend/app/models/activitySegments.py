@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Float, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, ForeignKeyConstraint, Float, DateTime, Index, LargeBinary
 from geoalchemy2 import Geography
 from app.models.base import Base
 from app.models.dataTypes import transportation_mode_enum, TransportationMode
@@ -6,13 +6,26 @@ from app.models.dataTypes import transportation_mode_enum, TransportationMode
 class ActivitySegment(Base):
     __tablename__ = "activitySegment"
 
-    id = Column(Integer, primary_key=True, index=True)
-    trip_id = Column(Integer, ForeignKey("trips.id"), nullable=False)
+    # Particionada por el mes de inicio de su viaje, así un viaje y sus
+    # segmentos siempre viven en la misma partición
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    trip_id = Column(Integer, nullable=False)
+    trip_start_time = Column(DateTime(timezone=True), primary_key=True, nullable=False)
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True))
-    start_location = Column(Geography(geometry_type='POINT', srid=4326), nullable=False)
-    end_location = Column(Geography(geometry_type='POINT', srid=4326))
+    start_location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=False)
+    end_location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False))
     distance_meters = Column(Float, default=0)
     duration_seconds = Column(Float, default=0)
     carbon_saved_grams = Column(Float, default=0)
-    transportation_mode = Column(transportation_mode_enum, nullable=False)
\ No newline at end of file
+    transportation_mode = Column(transportation_mode_enum, nullable=False)
+    # Traza GPS completa codificada con app.services.traceCodec
+    trace = Column(LargeBinary, nullable=True)
+
+    __table_args__ = (
+        ForeignKeyConstraint(["trip_id", "trip_start_time"], ["trips.id", "trips.start_time"]),
+        Index("ix_activitySegment_trip_id", "trip_id", "trip_start_time", "start_time", "id"),
+        Index("ix_activitySegment_start_location", "start_location", postgresql_using="gist"),
+        Index("ix_activitySegment_end_location", "end_location", postgresql_using="gist"),
+        {"postgresql_partition_by": "RANGE (trip_start_time)"},
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey, Float, Date
+from app.models.base import Base
+
+class ArchivedTripTotal(Base):
+    """
+    Totales por usuario de los meses de viajes ya archivados, para que la
+    conciliación siga cuadrando cuando esas particiones salen de `trips`.
+    """
+    __tablename__ = "archivedTripTotals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+    carbon_saved_grams = Column(Float, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
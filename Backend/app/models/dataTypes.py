@@ -35,4 +35,46 @@ transportation_mode_enum = SQLAlchemyEnum(
     name="transportation_mode_enum",
     create_type=True,
     validate_strings=True
-)
\ No newline at end of file
+)
+
+class RollupPeriod(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+rollup_period_enum = SQLAlchemyEnum(
+    RollupPeriod,
+    name="rollup_period_enum",
+    create_type=True,
+    validate_strings=True
+)
+
+class LeaderboardMetric(str, Enum):
+    points = "points"
+    carbon = "carbon"
+
+class LeaderboardWindow(str, Enum):
+    all = "all"
+    week = "week"
+    month = "month"
+
+class MemberImportFormat(str, Enum):
+    csv = "csv"
+    jsonl = "jsonl"
+
+class TripAnchor(str, Enum):
+    start = "start"
+    end = "end"
+
+class LedgerReason(str, Enum):
+    trip = "trip"
+    trip_deleted = "trip_deleted"
+    trip_corrected = "trip_corrected"
+    adjustment = "adjustment"
+
+ledger_reason_enum = SQLAlchemyEnum(
+    LedgerReason,
+    name="ledger_reason_enum",
+    create_type=True,
+    validate_strings=True
+)
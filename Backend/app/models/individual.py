@@ -5,7 +5,8 @@ class Individual(Base):
     __tablename__ = "individuals"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True, index=True)
     full_name = Column(String, nullable=False)
     total_carbon_reduction_grams = Column(Float, default=0.0)
     total_points = Column(Integer, default=0)
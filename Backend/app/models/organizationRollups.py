@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, ForeignKey, Float, Date
+from app.models.base import Base
+from app.models.dataTypes import transportation_mode_enum
+
+class OrganizationModeRollup(Base):
+    """
+    Acumulado diario (UTC) de los segmentos de los miembros de una
+    organización por modo de transporte. El día es el de inicio del viaje.
+    """
+    __tablename__ = "organizationModeRollups"
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    transportation_mode = Column(transportation_mode_enum, primary_key=True)
+    segment_count = Column(Integer, nullable=False, default=0)
+    distance_meters = Column(Float, nullable=False, default=0)
+    duration_seconds = Column(Float, nullable=False, default=0)
+    carbon_saved_grams = Column(Float, nullable=False, default=0)
+
+class OrganizationMemberDay(Base):
+    """
+    Actividad diaria de cada miembro: una fila por miembro y día con viajes.
+    Contar filas da los miembros activos de un día o de un rango.
+    """
+    __tablename__ = "organizationMemberDays"
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    trip_count = Column(Integer, nullable=False, default=0)
+    distance_meters = Column(Float, nullable=False, default=0)
+    carbon_saved_grams = Column(Float, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
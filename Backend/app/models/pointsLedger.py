@@ -0,0 +1,34 @@
+from sqlalchemy import BigInteger, Column, Integer, ForeignKey, Float, DateTime, Index, func, text
+from app.models.base import Base
+from app.models.dataTypes import ledger_reason_enum
+
+class PointsLedgerEntry(Base):
+    """
+    Movimiento de puntos, gramos de carbono y créditos de un individuo.
+
+    Solo se insertan filas; `settled_at` marca las que ya se sumaron a los
+    saldos y totales de `individuals`. El valor vigente de cada uno es el
+    asentado más las filas aún sin asentar.
+    """
+    __tablename__ = "pointsLedger"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    points = Column(Integer, nullable=False, default=0)
+    carbon_saved_grams = Column(Float, nullable=False, default=0)
+    carbon_credits = Column(Float, nullable=False, default=0)
+    reason = Column(ledger_reason_enum, nullable=False)
+    trip_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    settled_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Parcial: solo contiene la cola sin asentar, así la lectura de saldos
+        # y el asentamiento no recorren el historial completo
+        Index(
+            "ix_pointsLedger_unsettled",
+            "user_id",
+            "id",
+            postgresql_where=text("settled_at IS NULL"),
+        ),
+    )
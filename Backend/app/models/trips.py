@@ -1,16 +1,37 @@
-from sqlalchemy import Column, Integer, ForeignKey, Float, DateTime
+from sqlalchemy import Boolean, Column, Integer, ForeignKey, Float, DateTime, Index, func, text
 from geoalchemy2 import Geography
 from app.models.base import Base
 
 class Trip(Base):
     __tablename__ = "trips"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Particionada por mes de start_time: la llave primaria debe incluir
+    # la columna de partición
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    start_time = Column(DateTime(timezone=True), nullable=False)
+    start_time = Column(DateTime(timezone=True), primary_key=True, nullable=False)
     end_time = Column(DateTime(timezone=True))
-    start_location = Column(Geography(geometry_type='POINT', srid=4326), nullable=False)
-    end_location = Column(Geography(geometry_type='POINT', srid=4326))
+    start_location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False), nullable=False)
+    end_location = Column(Geography(geometry_type='POINT', srid=4326, spatial_index=False))
     distance_meters = Column(Float, default=0)
     duration_seconds = Column(Float, default=0)
     carbon_saved_grams = Column(Float, default=0)
+    points = Column(Integer, default=0)
+    # Si su aporte ya está en los totales y acumulados; lo marca el trabajo
+    # trips.aggregate en la misma transacción que aplica los deltas
+    aggregated = Column(Boolean, nullable=False, default=False, server_default="false")
+    # Momento de la ingesta; el barrido reencola los viajes que siguen sin
+    # agregarse un tiempo después
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        # Historial paginado por llave (user_id, start_time, id), recorrido hacia atrás
+        Index("ix_trips_user_id_start_time_id", "user_id", "start_time", "id"),
+        # GiST compuestos (btree_gist): filtran por usuario y por ubicación en
+        # el mismo recorrido del índice, incluido el KNN con <->
+        Index("ix_trips_user_id_start_location", "user_id", "start_location", postgresql_using="gist"),
+        Index("ix_trips_user_id_end_location", "user_id", "end_location", postgresql_using="gist"),
+        # Solo los viajes pendientes de agregar: el índice queda casi vacío
+        Index("ix_trips_unaggregated", "created_at", postgresql_where=text("NOT aggregated")),
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
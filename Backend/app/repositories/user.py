@@ -0,0 +1,191 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import String, cast, column, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from app.models.user import User
+from app.models.individual import Individual
+from app.models.organization import Organization
+from app.models.dataTypes import UserType
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """
+    Busca un usuario por email (índice único ix_users_email).
+    """
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+async def get_user_with_individual(
+    db: AsyncSession,
+    email: str
+) -> Tuple[Optional[User], Optional[Individual]]:
+    """
+    Carga el usuario y su perfil individual en una sola consulta.
+    """
+    result = await db.execute(
+        select(User, Individual)
+        .outerjoin(Individual, Individual.user_id == User.id)
+        .where(User.email == email)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row.User, row.Individual
+
+async def get_user_with_organization(
+    db: AsyncSession,
+    email: str
+) -> Tuple[Optional[User], Optional[Organization]]:
+    """
+    Carga el usuario y su organización en una sola consulta.
+    """
+    result = await db.execute(
+        select(User, Organization)
+        .outerjoin(Organization, Organization.user_id == User.id)
+        .where(User.email == email)
+    )
+    row = result.first()
+    if row is None:
+        return None, None
+    return row.User, row.Organization
+
+async def create_user_with_profile(
+    db: AsyncSession,
+    email: str,
+    hashed_password: str,
+    user_type: UserType,
+    profile_model,
+    profile_values: Dict[str, Any]
+) -> Optional[Row]:
+    """
+    Inserta el usuario y su perfil en una sola sentencia (dos CTEs con
+    RETURNING) y devuelve una fila con `user_id`, `email`, `type`,
+    `created_at` y las columnas del perfil.
+
+    Si el email ya existe, ON CONFLICT (email) DO NOTHING deja ambas
+    inserciones vacías y se devuelve None: no hace falta un SELECT previo
+    ni hay carrera entre la verificación y la inserción. No hace commit.
+    """
+    users = User.__table__
+    profiles = profile_model.__table__
+
+    new_user = (
+        pg_insert(users)
+        .values(email=email, hashed_password=hashed_password, type=user_type)
+        .on_conflict_do_nothing(index_elements=[users.c.email])
+        .returning(users.c.id, users.c.email, users.c.type, users.c.created_at)
+        .cte("new_user")
+    )
+
+    columns = list(profile_values)
+    new_profile = (
+        insert(profiles)
+        .from_select(
+            ["user_id", *columns],
+            select(
+                new_user.c.id,
+                *(literal(profile_values[name], profiles.c[name].type) for name in columns)
+            )
+        )
+        .returning(profiles.c.user_id, *(profiles.c[name] for name in columns))
+        .cte("new_profile")
+    )
+
+    result = await db.execute(
+        select(
+            new_user.c.id.label("user_id"),
+            new_user.c.email,
+            new_user.c.type,
+            new_user.c.created_at,
+            *(new_profile.c[name] for name in columns)
+        ).join_from(new_user, new_profile, new_profile.c.user_id == new_user.c.id)
+    )
+    return result.first()
+
+async def create_users_with_profiles(
+    db: AsyncSession,
+    user_type: UserType,
+    profile_model,
+    rows: List[Dict[str, Any]]
+) -> Dict[str, int]:
+    """
+    Versión por lotes de `create_user_with_profile`: cada fila trae `email`,
+    `hashed_password` y las columnas del perfil. Todo el lote se inserta en
+    una sentencia y se devuelve {email: user_id} de los usuarios creados;
+    los emails que ya existían no aparecen. No hace commit.
+    """
+    if not rows:
+        return {}
+
+    users = User.__table__
+    profiles = profile_model.__table__
+    profile_columns = [name for name in rows[0] if name not in ("email", "hashed_password")]
+
+    # Una columna por arreglo con unnest: el número de parámetros no crece
+    # con el tamaño del lote
+    column_types = {
+        "email": String(),
+        "hashed_password": String(),
+        **{name: profiles.c[name].type for name in profile_columns},
+    }
+    incoming = (
+        func.unnest(*(
+            cast(literal([row[name] for row in rows], ARRAY(column_type)), ARRAY(column_type))
+            for name, column_type in column_types.items()
+        ))
+        .table_valued(*(column(name, column_type) for name, column_type in column_types.items()))
+        .render_derived(name="incoming", with_types=False)
+    )
+
+    new_users = (
+        pg_insert(users)
+        .from_select(
+            ["email", "hashed_password", "type"],
+            select(incoming.c.email, incoming.c.hashed_password, literal(user_type, users.c.type.type))
+        )
+        .on_conflict_do_nothing(index_elements=[users.c.email])
+        .returning(users.c.id, users.c.email)
+        .cte("new_users")
+    )
+
+    new_profiles = (
+        insert(profiles)
+        .from_select(
+            ["user_id", *profile_columns],
+            select(new_users.c.id, *(incoming.c[name] for name in profile_columns))
+            .join_from(new_users, incoming, incoming.c.email == new_users.c.email)
+        )
+        .returning(profiles.c.user_id)
+        .cte("new_profiles")
+    )
+
+    result = await db.execute(
+        select(new_users.c.email, new_users.c.id)
+        .join_from(new_users, new_profiles, new_profiles.c.user_id == new_users.c.id)
+    )
+    return dict(result.all())
+
+async def set_password_if_invited(
+    db: AsyncSession,
+    user_id: int,
+    hashed_password: str,
+    invite_marker: str
+) -> Optional[Row]:
+    """
+    Define la contraseña de una cuenta invitada que aún no la tiene y
+    devuelve sus datos junto con el nombre del perfil individual.
+    No hace commit.
+    """
+    users = User.__table__
+    individuals = Individual.__table__
+    result = await db.execute(
+        update(users)
+        .where(
+            users.c.id == user_id,
+            users.c.hashed_password == invite_marker,
+            individuals.c.user_id == users.c.id,
+        )
+        .values(hashed_password=hashed_password)
+        .returning(users.c.id, users.c.email, users.c.type, users.c.created_at, individuals.c.full_name)
+    )
+    return result.first()
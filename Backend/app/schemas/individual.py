@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, constr
 from datetime import datetime
+from typing import Optional
 from app.models.dataTypes import UserType
 
 class IndividualUserCreate(BaseModel):
@@ -19,6 +20,25 @@ class IndividualUserResponse(BaseModel):
     class Config:
         from_attributes = True 
 
+class IndividualProfileResponse(BaseModel):
+    """
+    Perfil y totales del usuario individual actual.
+    """
+    id: int
+    email: str
+    type: UserType
+    full_name: str
+    organization_id: Optional[int] = None
+    total_points: int
+    total_carbon_reduction_grams: float
+    points_balance: int
+    carbon_credits_balance: float
+    created_at: datetime
+
+class AcceptInviteRequest(BaseModel):
+    token: str
+    password: constr(min_length=8)
+
 class GoogleUserInfo(BaseModel):
     email: str
     name: str
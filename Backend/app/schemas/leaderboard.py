@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from app.models.dataTypes import LeaderboardMetric, LeaderboardWindow
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    full_name: Optional[str] = None
+    score: float
+
+class LeaderboardResponse(BaseModel):
+    metric: LeaderboardMetric
+    window: LeaderboardWindow
+    total: int
+    entries: List[LeaderboardEntry]
+
+class LeaderboardPositionResponse(LeaderboardResponse):
+    rank: Optional[int] = None
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from datetime import datetime
-from app.models.dataTypes import UserType, PackageType
+from typing import List, Optional
+from pydantic import BaseModel, EmailStr, constr
+from datetime import date, datetime
+from app.models.dataTypes import UserType, PackageType, TransportationMode
 
 class OrganizationCreate(BaseModel):
     email: EmailStr
@@ -20,3 +21,45 @@ class OrganizationResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MemberImportRow(BaseModel):
+    """
+    Una fila del archivo de importación de miembros. Sin contraseña se
+    emite una invitación para que el miembro la defina.
+    """
+    email: EmailStr
+    full_name: constr(min_length=2)
+    password: Optional[constr(min_length=8)] = None
+
+
+class ModeActivity(BaseModel):
+    transportation_mode: TransportationMode
+    segment_count: int
+    distance_meters: float
+    duration_seconds: float
+    carbon_saved_grams: float
+
+class OrganizationDayActivity(BaseModel):
+    day: date
+    active_members: int
+    trip_count: int
+    distance_meters: float
+    carbon_saved_grams: float
+    points: int
+    modes: List[ModeActivity]
+
+class OrganizationAnalyticsResponse(BaseModel):
+    """
+    Actividad de los miembros en un rango de días (UTC, ambos incluidos).
+    `active_members` cuenta miembros distintos en todo el rango.
+    """
+    start: date
+    end: date
+    active_members: int
+    trip_count: int
+    distance_meters: float
+    carbon_saved_grams: float
+    points: int
+    modes: List[ModeActivity]
+    days: List[OrganizationDayActivity]
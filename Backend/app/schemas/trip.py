@@ -0,0 +1,153 @@
+from pydantic import BaseModel, Field, confloat, model_validator
+from datetime import datetime
+from typing import List, Literal, Optional
+from app.models.dataTypes import TransportationMode, TripAnchor
+
+MAX_TRIPS_PER_BATCH = 500
+MAX_SEGMENTS_PER_BATCH = 10000
+MAX_POINTS_PER_TRACK = 20000
+MAX_POLYGON_VERTICES = 1000
+
+class Location(BaseModel):
+    latitude: confloat(ge=-90, le=90)
+    longitude: confloat(ge=-180, le=180)
+
+class Track(BaseModel):
+    """
+    Lecturas GPS del segmento como arreglos paralelos (timestamps en segundos epoch).
+    """
+    latitudes: List[confloat(ge=-90, le=90)] = Field(min_length=2, max_length=MAX_POINTS_PER_TRACK)
+    longitudes: List[confloat(ge=-180, le=180)] = Field(min_length=2, max_length=MAX_POINTS_PER_TRACK)
+    timestamps: List[float] = Field(min_length=2, max_length=MAX_POINTS_PER_TRACK)
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not len(self.latitudes) == len(self.longitudes) == len(self.timestamps):
+            raise ValueError("latitudes, longitudes y timestamps deben tener la misma longitud")
+        return self
+
+class ActivitySegmentCreate(BaseModel):
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    start_location: Location
+    end_location: Optional[Location] = None
+    transportation_mode: TransportationMode
+    track: Optional[Track] = None
+
+class TripCreate(BaseModel):
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    start_location: Location
+    end_location: Optional[Location] = None
+    segments: List[ActivitySegmentCreate] = Field(default_factory=list)
+
+class TripBatchCreate(BaseModel):
+    trips: List[TripCreate] = Field(min_length=1, max_length=MAX_TRIPS_PER_BATCH)
+
+    @model_validator(mode="after")
+    def check_segment_count(self):
+        total_segments = sum(len(trip.segments) for trip in self.trips)
+        if total_segments > MAX_SEGMENTS_PER_BATCH:
+            raise ValueError(
+                f"El lote no puede tener más de {MAX_SEGMENTS_PER_BATCH} segmentos"
+            )
+        return self
+
+class TripIngestResult(BaseModel):
+    id: int
+    segment_ids: List[int]
+
+class TripBatchResponse(BaseModel):
+    trips: List[TripIngestResult]
+
+
+class SegmentCorrection(BaseModel):
+    id: int
+    transportation_mode: TransportationMode
+
+class TripCorrection(BaseModel):
+    """
+    Modos de transporte corregidos de segmentos del viaje. Distancias y
+    tiempos no cambian; el carbono y los puntos se recalculan.
+    """
+    segments: List[SegmentCorrection] = Field(min_length=1, max_length=MAX_SEGMENTS_PER_BATCH)
+
+    @model_validator(mode="after")
+    def check_unique(self):
+        if len({segment.id for segment in self.segments}) != len(self.segments):
+            raise ValueError("Cada segmento puede corregirse una sola vez")
+        return self
+
+
+class TripSummary(BaseModel):
+    id: int
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    start_location: Location
+    end_location: Optional[Location] = None
+    distance_meters: float
+    duration_seconds: float
+    carbon_saved_grams: float
+    points: int
+    # Distancia al punto de búsqueda, solo en consultas por cercanía
+    distance_to_point_meters: Optional[float] = None
+
+class TripListResponse(BaseModel):
+    trips: List[TripSummary]
+
+class PolygonQuery(BaseModel):
+    """
+    Polígono GeoJSON (un solo anillo exterior, posiciones [lon, lat]).
+    """
+    type: Literal["Polygon"] = "Polygon"
+    coordinates: List[List[List[float]]] = Field(min_length=1, max_length=1)
+    anchor: TripAnchor = TripAnchor.start
+    limit: int = Field(100, ge=1, le=1000)
+
+    @model_validator(mode="after")
+    def check_ring(self):
+        ring = self.coordinates[0]
+        if not 4 <= len(ring) <= MAX_POLYGON_VERTICES:
+            raise ValueError(f"El anillo debe tener entre 4 y {MAX_POLYGON_VERTICES} posiciones")
+        if any(len(position) != 2 for position in ring):
+            raise ValueError("Cada posición debe ser [longitud, latitud]")
+        if any(not (-180 <= lon <= 180 and -90 <= lat <= 90) for lon, lat in ring):
+            raise ValueError("Coordenadas fuera de rango")
+        if ring[0] != ring[-1]:
+            raise ValueError("El anillo debe cerrarse: la primera y la última posición deben coincidir")
+        return self
+
+class TripHistoryItem(BaseModel):
+    """
+    Viaje del historial. Solo `id` y `start_time` son fijos; el resto
+    depende de los campos pedidos en `fields`.
+    """
+    id: int
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    start_location: Optional[Location] = None
+    end_location: Optional[Location] = None
+    distance_meters: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    carbon_saved_grams: Optional[float] = None
+    points: Optional[int] = None
+
+class TripHistoryPage(BaseModel):
+    trips: List[TripHistoryItem]
+    # Cursor opaco de la página siguiente; None en la última
+    next_cursor: Optional[str] = None
+
+class SegmentHistoryItem(BaseModel):
+    id: int
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    start_location: Optional[Location] = None
+    end_location: Optional[Location] = None
+    distance_meters: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    carbon_saved_grams: Optional[float] = None
+    transportation_mode: Optional[TransportationMode] = None
+
+class SegmentHistoryPage(BaseModel):
+    segments: List[SegmentHistoryItem]
+    next_cursor: Optional[str] = None
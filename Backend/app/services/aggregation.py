@@ -0,0 +1,152 @@
+from collections import defaultdict
+from dataclasses import asdict, dataclass, replace
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activityRollups import UserActivityRollup
+from app.models.dataTypes import LedgerReason, RollupPeriod
+from app.services.ledger import append_entries, trip_entries
+
+ROLLUP_COLUMNS = (
+    "trip_count",
+    "distance_meters",
+    "duration_seconds",
+    "carbon_saved_grams",
+    "points",
+)
+
+
+@dataclass
+class TripDelta:
+    """
+    Cambio que un viaje aporta (o retira) a los acumulados de su usuario.
+    """
+    user_id: int
+    start_time: datetime
+    trip_count: int
+    distance_meters: float
+    duration_seconds: float
+    carbon_saved_grams: float
+    points: int
+    trip_id: Optional[int] = None
+
+    @classmethod
+    def from_trip(cls, trip) -> "TripDelta":
+        """
+        Construye el delta positivo de un viaje (modelo o fila con las mismas columnas).
+        """
+        return cls(
+            user_id=trip.user_id,
+            start_time=trip.start_time,
+            trip_count=1,
+            distance_meters=trip.distance_meters or 0.0,
+            duration_seconds=trip.duration_seconds or 0.0,
+            carbon_saved_grams=trip.carbon_saved_grams or 0.0,
+            points=trip.points or 0,
+            trip_id=getattr(trip, "id", None),
+        )
+
+    def to_payload(self) -> dict:
+        """
+        Forma serializable en JSON, para enviarlo en un trabajo en segundo plano.
+        """
+        return {**asdict(self), "start_time": self.start_time.isoformat()}
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "TripDelta":
+        return cls(**{**payload, "start_time": datetime.fromisoformat(payload["start_time"])})
+
+    def difference(self, previous: "TripDelta") -> "TripDelta":
+        """
+        Delta de corregir un viaje: valores nuevos (`self`) menos `previous`.
+        """
+        return replace(
+            self,
+            trip_count=self.trip_count - previous.trip_count,
+            distance_meters=self.distance_meters - previous.distance_meters,
+            duration_seconds=self.duration_seconds - previous.duration_seconds,
+            carbon_saved_grams=self.carbon_saved_grams - previous.carbon_saved_grams,
+            points=self.points - previous.points,
+        )
+
+    def negated(self) -> "TripDelta":
+        return replace(
+            self,
+            trip_count=-self.trip_count,
+            distance_meters=-self.distance_meters,
+            duration_seconds=-self.duration_seconds,
+            carbon_saved_grams=-self.carbon_saved_grams,
+            points=-self.points,
+        )
+
+
+def period_starts(moment: datetime) -> Dict[RollupPeriod, date]:
+    """
+    Inicio del día, semana (lunes) y mes UTC al que pertenece un instante.
+    """
+    day = moment.astimezone(timezone.utc).date() if moment.tzinfo else moment.date()
+    return {
+        RollupPeriod.day: day,
+        RollupPeriod.week: day - timedelta(days=day.weekday()),
+        RollupPeriod.month: day.replace(day=1),
+    }
+
+
+async def apply_trip_deltas(
+    db: AsyncSession,
+    deltas: Iterable[TripDelta],
+    reason: LedgerReason = LedgerReason.trip
+) -> None:
+    """
+    Registra los deltas en el libro y los suma a los acumulados diarios,
+    semanales y mensuales de cada individuo. Los totales y saldos de
+    `individuals` se asientan después, por lotes (`settle_ledger`): esta
+    función no toca la fila del individuo, así que escrituras concurrentes
+    del mismo usuario no esperan su bloqueo.
+
+    No hace commit: se ejecuta dentro de la transacción que escribe o
+    borra los viajes, de modo que viajes, libro y acumulados nunca divergen.
+    """
+    deltas = list(deltas)
+    rollups: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0])
+
+    for delta in deltas:
+        for period, period_start in period_starts(delta.start_time).items():
+            values = rollups[(delta.user_id, period, period_start)]
+            values[0] += delta.trip_count
+            values[1] += delta.distance_meters
+            values[2] += delta.duration_seconds
+            values[3] += delta.carbon_saved_grams
+            values[4] += delta.points
+
+    if not rollups:
+        return
+
+    await append_entries(db, trip_entries(deltas, reason))
+
+    # Orden estable por llave para que lotes concurrentes bloqueen filas
+    # en el mismo orden y no se produzcan deadlocks
+    rollup_table = UserActivityRollup.__table__
+    rows = [
+        {
+            "user_id": user_id,
+            "period": period,
+            "period_start": period_start,
+            **dict(zip(ROLLUP_COLUMNS, values)),
+        }
+        for (user_id, period, period_start), values in sorted(
+            rollups.items(), key=lambda item: (item[0][0], item[0][1].value, item[0][2])
+        )
+    ]
+    statement = insert(rollup_table).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[rollup_table.c.user_id, rollup_table.c.period, rollup_table.c.period_start],
+        set_={
+            column: rollup_table.c[column] + statement.excluded[column]
+            for column in ROLLUP_COLUMNS
+        },
+    )
+    await db.execute(statement)
@@ -3,12 +3,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.user import User
 from app.models.individual import Individual
-from app.models.authToken import AuthToken
 from app.models.dataTypes import UserType
-from app.core.security import get_password_hash, create_tokens, verify_password, create_access_token, create_refresh_token
-from app.schemas.individual import IndividualUserCreate, IndividualUserResponse
+from app.core.security import get_password_hash, verify_password
+from app.schemas.individual import IndividualProfileResponse, IndividualUserCreate, IndividualUserResponse
 from app.schemas.auth import LoginRequest
-from app.core.data import TokenInformation, RefreshTokenInformation
+from app.services.ledger import balance_columns, total_columns
+from app.services.session import create_session
+from app.repositories.user import create_user_with_profile, get_user_with_individual
 
 async def register_individual_user(
     db: AsyncSession,
@@ -17,65 +18,36 @@ async def register_individual_user(
     """
     Registra un nuevo usuario individual y devuelve sus datos y un token JWT.
     """
-    # Verificar si el email ya existe
-    query = select(User).where(User.email == user_data.email)
-    result = await db.execute(query)
-    existing_user = result.scalar_one_or_none()
-    
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El correo electrónico ya está registrado"
-        )
-    
-    # Crear el usuario
-    hashed_password = get_password_hash(user_data.password)
-    db_user = User(
+    # Usuario y perfil se insertan en una sola sentencia; si el email ya
+    # existe ON CONFLICT no inserta nada y no se devuelve ninguna fila
+    hashed_password = await get_password_hash(user_data.password)
+    created = await create_user_with_profile(
+        db,
         email=user_data.email,
         hashed_password=hashed_password,
-        type=UserType.individual
-    )
-    db.add(db_user)
-    await db.flush()  # Para obtener el ID del usuario
-    
-    # Crear el perfil individual
-    db_individual = Individual(
-        user_id=db_user.id,
-        full_name=user_data.full_name
+        user_type=UserType.individual,
+        profile_model=Individual,
+        profile_values={"full_name": user_data.full_name},
     )
-    db.add(db_individual)
-    await db.flush()  # Para obtener el ID del individual
     
-    # Crear los tokens
-    access_token, refresh_token = create_tokens(
-        TokenInformation(
-            id=str(db_user.id),
-            type=db_user.type
+    if created is None:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El correo electrónico ya está registrado"
         )
-    )
-    
-    # Crear el registro de tokens
-    db_auth_token = AuthToken(
-        user_id=db_user.id,
-        token=access_token,
-        refresh_token=refresh_token
-    )
-    db.add(db_auth_token)
     
-    # Guardar todos los cambios
     await db.commit()
     
-    # Refrescar los objetos para obtener los datos actualizados
-    await db.refresh(db_user)
-    await db.refresh(db_individual)
-    await db.refresh(db_auth_token)
+    # Abrir la sesión en Redis con los tokens
+    access_token, refresh_token = await create_session(created.user_id, created.type)
     
     return IndividualUserResponse(
-        id=db_user.id,
-        email=db_user.email,
-        type=db_user.type,
-        full_name=db_individual.full_name,
-        created_at=db_user.created_at,
+        id=created.user_id,
+        email=created.email,
+        type=created.type,
+        full_name=created.full_name,
+        created_at=created.created_at,
         access_token=access_token,
         refresh_token=refresh_token,
     )
@@ -88,13 +60,11 @@ async def login_individual_user(
     """
     Autentica a un usuario individual y devuelve los tokens de acceso.
     """
-    # Buscar usuario por email
-    query = select(User).where(User.email == user_data.email)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+    # Buscar usuario y perfil individual en una sola consulta
+    user, individual = await get_user_with_individual(db, user_data.email)
     
     # Verificar credenciales y tipo de usuario
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if not user or not await verify_password(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Credenciales inválidas"
@@ -106,32 +76,8 @@ async def login_individual_user(
             detail="Este endpoint es solo para usuarios individuales"
         )
     
-    # Buscar usuario por email
-    query = select(Individual).where(User.email == user_data.email)
-    result = await db.execute(query)
-    individual = result.scalar_one_or_none()
-
-    # Crear tokens con la información correcta
-    token_info = TokenInformation(
-        id=str(user.id),
-        type=user.type
-    )
-    refresh_info = RefreshTokenInformation(
-        id=str(user.id),
-        type=user.type
-    )
-    
-    access_token = create_access_token(token_info.model_dump())
-    refresh_token = create_refresh_token(refresh_info.model_dump())
-    
-    # Guardar tokens en la base de datos
-    auth_token = AuthToken(
-        user_id=user.id,
-        token=access_token,
-        refresh_token=refresh_token
-    )
-    db.add(auth_token)
-    await db.commit()
+    # Abrir la sesión en Redis con los tokens
+    access_token, refresh_token = await create_session(user.id, user.type)
     
     return IndividualUserResponse(
         id=user.id,
@@ -144,6 +90,38 @@ async def login_individual_user(
     )
 
 
+async def get_individual_profile(db: AsyncSession, user_id: int) -> IndividualProfileResponse:
+    """
+    Devuelve el perfil y los totales del usuario individual actual.
+    """
+    # Totales y saldos vigentes: lo asentado más los movimientos del libro sin asentar
+    result = await db.execute(
+        select(User, Individual, *total_columns(User.id), *balance_columns(User.id))
+        .join(Individual, Individual.user_id == User.id)
+        .where(User.id == user_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Este endpoint es solo para usuarios individuales"
+        )
+
+    user, individual = row.User, row.Individual
+    return IndividualProfileResponse(
+        id=user.id,
+        email=user.email,
+        type=user.type,
+        full_name=individual.full_name,
+        organization_id=individual.organization_id,
+        total_points=row.total_points,
+        total_carbon_reduction_grams=row.total_carbon_reduction_grams,
+        points_balance=row.points_balance,
+        carbon_credits_balance=row.carbon_credits_balance,
+        created_at=user.created_at,
+    )
+
+
 """
 async def login_with_google(
     db: AsyncSession,
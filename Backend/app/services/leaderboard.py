@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import redis
+from app.models.dataTypes import LeaderboardMetric, LeaderboardWindow, RollupPeriod
+from app.models.individual import Individual
+from app.schemas.leaderboard import LeaderboardEntry
+from app.services.aggregation import TripDelta, period_starts
+
+logger = logging.getLogger(__name__)
+
+# Las tablas de semanas y meses pasados se conservan un tiempo y luego expiran
+WINDOW_TTL_SECONDS = {
+    LeaderboardWindow.week: int(timedelta(weeks=5).total_seconds()),
+    LeaderboardWindow.month: int(timedelta(days=400).total_seconds()),
+}
+
+# Las tablas cambian con cada viaje de cualquier usuario: sus respuestas
+# se cachean poco tiempo en vez de invalidarse en cada ingesta
+LEADERBOARD_CACHE_TTL = int(os.getenv("LEADERBOARD_CACHE_TTL", "30"))
+
+WINDOW_PERIODS = {
+    LeaderboardWindow.week: RollupPeriod.week,
+    LeaderboardWindow.month: RollupPeriod.month,
+}
+
+
+def leaderboard_key(
+    metric: LeaderboardMetric,
+    window: LeaderboardWindow,
+    period_start: Optional[date] = None
+) -> str:
+    """
+    Llave del sorted set de una tabla; las ventanas incluyen el inicio del periodo.
+    """
+    if window == LeaderboardWindow.all:
+        return f"leaderboard:{metric.value}:all"
+    return f"leaderboard:{metric.value}:{window.value}:{period_start.isoformat()}"
+
+
+def current_key(metric: LeaderboardMetric, window: LeaderboardWindow) -> str:
+    if window == LeaderboardWindow.all:
+        return leaderboard_key(metric, window)
+    period_start = period_starts(datetime.now(timezone.utc))[WINDOW_PERIODS[window]]
+    return leaderboard_key(metric, window, period_start)
+
+
+# Marca cada viaje y aplica sus incrementos en un mismo bloque atómico: una
+# cancelación o una caída no puede dejar la marca sin los incrementos (que
+# se perderían al reentregar el mensaje) ni los incrementos sin la marca.
+# KEYS: las marcas y luego las tablas; ARGV[1]: TTL de las marcas; ARGV[2]:
+# por marca, sus [índice de tabla, incremento, usuario], y las tablas con TTL.
+_APPLY_ONCE_SCRIPT = """
+local plan = cjson.decode(ARGV[2])
+local markers = #plan.trips
+local claimed = 0
+local emptied = {}
+for i, increments in ipairs(plan.trips) do
+    if redis.call('SET', KEYS[i], 1, 'NX', 'EX', ARGV[1]) then
+        claimed = claimed + 1
+        for _, increment in ipairs(increments) do
+            redis.call('ZINCRBY', KEYS[markers + increment[1]], increment[2], increment[3])
+            if tonumber(increment[2]) < 0 then
+                emptied[increment[1]] = true
+            end
+        end
+    end
+end
+if claimed > 0 then
+    for _, expiry in ipairs(plan.expire) do
+        redis.call('EXPIRE', KEYS[markers + expiry[1]], expiry[2])
+    end
+    -- Quien se queda sin puntos (viajes eliminados) sale de la tabla
+    for index in pairs(emptied) do
+        redis.call('ZREMRANGEBYSCORE', KEYS[markers + index], '-inf', 0)
+    end
+end
+return claimed
+"""
+_apply_once = redis.register_script(_APPLY_ONCE_SCRIPT)
+
+
+def _delta_scores(delta: TripDelta) -> Dict[LeaderboardMetric, float]:
+    return {
+        LeaderboardMetric.points: delta.points,
+        LeaderboardMetric.carbon: delta.carbon_saved_grams,
+    }
+
+
+def _delta_increments(delta: TripDelta, windowed_keys: Dict[str, int]) -> Dict[str, float]:
+    """
+    Incremento de cada tabla que toca un delta; anota en `windowed_keys`
+    las tablas por periodo con su TTL.
+    """
+    increments: Dict[str, float] = defaultdict(float)
+    starts = period_starts(delta.start_time)
+    for metric, score in _delta_scores(delta).items():
+        increments[leaderboard_key(metric, LeaderboardWindow.all)] += score
+        for window, period in WINDOW_PERIODS.items():
+            key = leaderboard_key(metric, window, starts[period])
+            increments[key] += score
+            windowed_keys[key] = WINDOW_TTL_SECONDS[window]
+    return increments
+
+
+async def update_leaderboards(deltas: Iterable[TripDelta]) -> None:
+    """
+    Aplica los deltas de viajes a las tablas global, semanal y mensual
+    en un solo pipeline.
+    """
+    increments: Dict[Tuple[str, int], float] = defaultdict(float)
+    windowed_keys: Dict[str, int] = {}
+    for delta in deltas:
+        for key, score in _delta_increments(delta, windowed_keys).items():
+            increments[(key, delta.user_id)] += score
+
+    increments = {target: score for target, score in increments.items() if score}
+    if not increments:
+        return
+
+    pipe = redis.pipeline(transaction=False)
+    for (key, user_id), score in increments.items():
+        pipe.zincrby(key, score, user_id)
+    for key, ttl in windowed_keys.items():
+        pipe.expire(key, ttl)
+    # Quien se queda sin puntos (viajes eliminados) sale de la tabla
+    for key in {key for (key, _), score in increments.items() if score < 0}:
+        pipe.zremrangebyscore(key, "-inf", 0)
+    await pipe.execute()
+
+
+async def update_leaderboards_once(deltas: List[TripDelta], markers: List[str], marker_ttl: int) -> int:
+    """
+    Aplica cada delta solo si su marca (`markers`, en el mismo orden) no
+    existía, y la deja con `marker_ttl`. Devuelve cuántos deltas aplicó.
+    """
+    windowed_keys: Dict[str, int] = {}
+    boards: Dict[str, int] = {}
+    trips = []
+    for delta in deltas:
+        trips.append([
+            [boards.setdefault(key, len(boards) + 1), repr(float(score)), str(delta.user_id)]
+            for key, score in _delta_increments(delta, windowed_keys).items()
+            if score
+        ])
+    plan = {
+        "trips": trips,
+        "expire": [[boards[key], ttl] for key, ttl in windowed_keys.items() if key in boards],
+    }
+    return await _apply_once(
+        keys=[*markers, *boards],
+        args=[marker_ttl, json.dumps(plan)],
+    )
+
+
+async def safe_update_leaderboards(deltas: List[TripDelta]) -> None:
+    """
+    Igual que `update_leaderboards`, pero una falla de Redis no rompe la
+    petición: las tablas se recuperan con `rebuild_leaderboards`.
+    """
+    try:
+        await update_leaderboards(deltas)
+    except Exception:
+        logger.warning("No se pudieron actualizar las tablas de posiciones", exc_info=True)
+
+
+async def _with_names(
+    db: AsyncSession,
+    rows: List[Tuple[str, float]],
+    first_rank: int
+) -> List[LeaderboardEntry]:
+    user_ids = [int(member) for member, _ in rows]
+    names = {}
+    if user_ids:
+        result = await db.execute(
+            select(Individual.user_id, Individual.full_name)
+            .where(Individual.user_id.in_(user_ids))
+        )
+        names = dict(result.all())
+    return [
+        LeaderboardEntry(
+            rank=first_rank + position,
+            user_id=user_id,
+            full_name=names.get(user_id),
+            score=score,
+        )
+        for position, (user_id, (_, score)) in enumerate(zip(user_ids, rows))
+    ]
+
+
+async def get_top(
+    db: AsyncSession,
+    metric: LeaderboardMetric,
+    window: LeaderboardWindow,
+    offset: int,
+    limit: int
+) -> Tuple[int, List[LeaderboardEntry]]:
+    """
+    Página de la tabla ordenada de mayor a menor. Devuelve (total, entradas).
+    """
+    key = current_key(metric, window)
+    pipe = redis.pipeline(transaction=False)
+    pipe.zcard(key)
+    pipe.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    total, rows = await pipe.execute()
+    return total, await _with_names(db, rows, offset + 1)
+
+
+async def get_around(
+    db: AsyncSession,
+    metric: LeaderboardMetric,
+    window: LeaderboardWindow,
+    user_id: int,
+    radius: int
+) -> Tuple[int, Optional[int], List[LeaderboardEntry]]:
+    """
+    Posición del usuario y sus vecinos inmediatos. Devuelve (total, posición, entradas).
+    """
+    key = current_key(metric, window)
+    pipe = redis.pipeline(transaction=False)
+    pipe.zcard(key)
+    pipe.zrevrank(key, user_id)
+    total, rank = await pipe.execute()
+    if rank is None:
+        return total, None, []
+
+    start = max(0, rank - radius)
+    rows = await redis.zrevrange(key, start, rank + radius, withscores=True)
+    return total, rank + 1, await _with_names(db, rows, start + 1)
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.models.dataTypes import LedgerReason
+from app.models.individual import Individual
+from app.models.pointsLedger import PointsLedgerEntry
+from app.services.tripMetrics import carbon_credits_for
+
+logger = logging.getLogger(__name__)
+
+# Asentamiento periódico de la cola del libro en los saldos y totales de `individuals`
+LEDGER_SETTLE_ENABLED = os.getenv("LEDGER_SETTLE_ENABLED", "True").lower() == "true"
+LEDGER_SETTLE_INTERVAL_SECONDS = float(os.getenv("LEDGER_SETTLE_INTERVAL_SECONDS", "5"))
+LEDGER_SETTLE_BATCH_SIZE = int(os.getenv("LEDGER_SETTLE_BATCH_SIZE", "5000"))
+
+
+def trip_entries(deltas: Iterable, reason: LedgerReason) -> List[dict]:
+    """
+    Un movimiento por viaje con los puntos, gramos y créditos de su delta
+    (`TripDelta`); los deltas negados producen movimientos negativos.
+    """
+    return [
+        {
+            "user_id": delta.user_id,
+            "points": int(delta.points),
+            "carbon_saved_grams": delta.carbon_saved_grams,
+            "carbon_credits": carbon_credits_for(delta.carbon_saved_grams),
+            "reason": reason,
+            "trip_id": delta.trip_id,
+        }
+        for delta in deltas
+        if delta.points or delta.carbon_saved_grams
+    ]
+
+
+async def append_entries(db: AsyncSession, entries: List[dict]) -> None:
+    """
+    Inserta movimientos en el libro. No hace commit ni bloquea filas de
+    `individuals`: escrituras concurrentes del mismo usuario no compiten.
+    """
+    if entries:
+        await db.execute(insert(PointsLedgerEntry).values(entries))
+
+
+def _unsettled(column, user_id_column):
+    ledger = PointsLedgerEntry.__table__
+    return (
+        select(func.coalesce(func.sum(column), 0))
+        .where(ledger.c.user_id == user_id_column, ledger.c.settled_at.is_(None))
+        .scalar_subquery()
+    )
+
+
+def balance_columns(user_id_column) -> Tuple:
+    """
+    Saldos vigentes (asentado + cola sin asentar) de la fila de `individuals`
+    cuyo usuario es `user_id_column`.
+
+    Ambos valores salen de la misma sentencia, así que ven la misma
+    instantánea: un asentamiento concurrente no cuenta un movimiento dos
+    veces ni lo omite.
+    """
+    ledger = PointsLedgerEntry.__table__
+    individuals = Individual.__table__
+    return (
+        (func.coalesce(individuals.c.points_balance, 0) + _unsettled(ledger.c.points, user_id_column))
+        .label("points_balance"),
+        (
+            func.coalesce(individuals.c.carbon_credits_balance, 0)
+            + _unsettled(ledger.c.carbon_credits, user_id_column)
+        ).label("carbon_credits_balance"),
+    )
+
+
+def total_columns(user_id_column) -> Tuple:
+    """
+    Totales históricos vigentes (asentado + cola sin asentar), con la misma
+    garantía de instantánea que `balance_columns`.
+    """
+    ledger = PointsLedgerEntry.__table__
+    individuals = Individual.__table__
+    return (
+        (func.coalesce(individuals.c.total_points, 0) + _unsettled(ledger.c.points, user_id_column))
+        .label("total_points"),
+        (
+            func.coalesce(individuals.c.total_carbon_reduction_grams, 0)
+            + _unsettled(ledger.c.carbon_saved_grams, user_id_column)
+        ).label("total_carbon_reduction_grams"),
+    )
+
+
+async def settle_ledger(db: AsyncSession, batch_size: int = LEDGER_SETTLE_BATCH_SIZE) -> int:
+    """
+    Suma un lote de movimientos sin asentar a los saldos y totales de
+    `individuals` y los marca como asentados en la misma transacción.
+    Devuelve cuántos asentó.
+
+    FOR UPDATE SKIP LOCKED permite varios procesos asentando a la vez sin
+    tomar dos veces el mismo movimiento; los saldos se actualizan en orden
+    de usuario para no producir deadlocks entre ellos.
+    """
+    ledger = PointsLedgerEntry.__table__
+    individuals = Individual.__table__
+    try:
+        result = await db.execute(
+            select(
+                ledger.c.id,
+                ledger.c.user_id,
+                ledger.c.points,
+                ledger.c.carbon_saved_grams,
+                ledger.c.carbon_credits,
+            )
+            .where(ledger.c.settled_at.is_(None))
+            .order_by(ledger.c.user_id, ledger.c.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows = result.all()
+        if not rows:
+            await db.rollback()
+            return 0
+
+        totals: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        for row in rows:
+            totals[row.user_id][0] += row.points
+            totals[row.user_id][1] += row.carbon_saved_grams
+            totals[row.user_id][2] += row.carbon_credits
+
+        await db.execute(
+            update(individuals)
+            .where(individuals.c.user_id == bindparam("b_user_id"))
+            .values(
+                points_balance=func.coalesce(individuals.c.points_balance, 0) + bindparam("b_points"),
+                carbon_credits_balance=func.coalesce(individuals.c.carbon_credits_balance, 0)
+                + bindparam("b_credits"),
+                total_points=func.coalesce(individuals.c.total_points, 0) + bindparam("b_points"),
+                total_carbon_reduction_grams=func.coalesce(individuals.c.total_carbon_reduction_grams, 0)
+                + bindparam("b_carbon"),
+            ),
+            [
+                {"b_user_id": user_id, "b_points": int(points), "b_carbon": carbon, "b_credits": credits}
+                for user_id, (points, carbon, credits) in sorted(totals.items())
+            ]
+        )
+        await db.execute(
+            update(ledger)
+            .where(ledger.c.id.in_([row.id for row in rows]))
+            .values(settled_at=func.now())
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return len(rows)
+
+
+class LedgerSettler:
+    """
+    Asienta el libro en segundo plano: lotes seguidos mientras haya cola y,
+    cuando se vacía, espera `interval_seconds` antes de volver a revisar.
+    """
+
+    def __init__(self, enabled: bool, interval_seconds: float, batch_size: int) -> None:
+        self.enabled = enabled
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.settled = 0
+        self.batches = 0
+        self.failures = 0
+        self.last_run: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> int:
+        """
+        Asienta lotes hasta vaciar la cola. Devuelve cuántos movimientos asentó.
+        """
+        total = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                settled = await settle_ledger(db, self.batch_size)
+            if settled:
+                self.batches += 1
+                self.settled += settled
+                total += settled
+            if settled < self.batch_size:
+                break
+        self.last_run = datetime.now(timezone.utc)
+        return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.warning("No se pudo asentar el libro de puntos", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def snapshot(self) -> dict:
+        ledger = PointsLedgerEntry.__table__
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(func.count(), func.min(ledger.c.created_at)).where(ledger.c.settled_at.is_(None))
+            )
+            unsettled, oldest = result.one()
+        return {
+            "enabled": self.enabled,
+            "running": self._task is not None,
+            "unsettled": unsettled,
+            "oldest_unsettled_seconds": (
+                round((datetime.now(timezone.utc) - oldest).total_seconds(), 3) if oldest else None
+            ),
+            "settled": self.settled,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+        }
+
+
+ledger_settler = LedgerSettler(
+    enabled=LEDGER_SETTLE_ENABLED,
+    interval_seconds=LEDGER_SETTLE_INTERVAL_SECONDS,
+    batch_size=LEDGER_SETTLE_BATCH_SIZE,
+)
@@ -0,0 +1,272 @@
+import csv
+import io
+import json
+import logging
+import os
+import secrets
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.core.hashing import password_hasher
+from app.core.redis import redis
+from app.core.security import get_password_hash
+from app.models.dataTypes import MemberImportFormat, UserType
+from app.models.individual import Individual
+from app.repositories.user import create_users_with_profiles, set_password_if_invited
+from app.schemas.individual import AcceptInviteRequest, IndividualUserResponse
+from app.schemas.organization import MemberImportRow
+from app.services.session import create_session
+
+logger = logging.getLogger(__name__)
+
+# Configuración de la importación de miembros
+MEMBER_IMPORT_BATCH_SIZE = int(os.getenv("MEMBER_IMPORT_BATCH_SIZE", "500"))
+MEMBER_IMPORT_MAX_BYTES = int(os.getenv("MEMBER_IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+MEMBER_IMPORT_SPOOL_BYTES = int(os.getenv("MEMBER_IMPORT_SPOOL_BYTES", str(1024 * 1024)))
+INVITE_TTL_SECONDS = int(os.getenv("INVITE_TTL_HOURS", "168")) * 3600
+
+# Valor de hashed_password de las cuentas que aún no aceptan su invitación;
+# no es un hash bcrypt válido, así que ningún login puede coincidir con él
+INVITE_MARKER = "!invite"
+
+
+def invite_key(token: str) -> str:
+    return f"invite:{token}"
+
+
+async def spool_upload(chunks: AsyncIterator[bytes]) -> SpooledTemporaryFile:
+    """
+    Copia el cuerpo de la petición a un archivo temporal que solo pasa a
+    disco cuando supera MEMBER_IMPORT_SPOOL_BYTES.
+
+    El archivo se procesa después, mientras se transmite la respuesta, sin
+    cargarlo completo en memoria.
+    """
+    spool = SpooledTemporaryFile(max_size=MEMBER_IMPORT_SPOOL_BYTES)
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > MEMBER_IMPORT_MAX_BYTES:
+            spool.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"El archivo supera el límite de {MEMBER_IMPORT_MAX_BYTES} bytes"
+            )
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def iter_rows(spool, import_format: MemberImportFormat) -> Iterator[Tuple[int, object]]:
+    """
+    Recorre el archivo fila por fila y devuelve (línea, fila). Las filas
+    JSONL que no son un objeto se devuelven como el error que produjeron.
+    """
+    text = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+    if import_format == MemberImportFormat.csv:
+        reader = csv.DictReader(text)
+        for row in reader:
+            # Celdas vacías (p. ej. sin contraseña) cuentan como ausentes
+            yield reader.line_num, {
+                key.strip(): value.strip() or None
+                for key, value in row.items()
+                if key and isinstance(value, str)
+            }
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ValueError("Cada línea debe ser un objeto JSON")
+            continue
+        yield line_number, row
+
+
+def _event(kind: str, **fields) -> bytes:
+    return (json.dumps({"event": kind, **fields}, ensure_ascii=False) + "\n").encode()
+
+
+def _row_error(line: int, error: Exception) -> bytes:
+    if isinstance(error, ValidationError):
+        detail = "; ".join(
+            f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+            for item in error.errors()
+        )
+    else:
+        detail = str(error)
+    return _event("error", line=line, detail=detail)
+
+
+async def _import_batch(
+    db: AsyncSession,
+    organization_id: int,
+    batch: List[Tuple[int, MemberImportRow]],
+    summary: Dict[str, int]
+) -> List[bytes]:
+    """
+    Hashea las contraseñas del lote en el pool de bcrypt, inserta usuarios
+    y perfiles en una sola sentencia y emite las invitaciones.
+    """
+    with_password = [row for _, row in batch if row.password]
+    hashed = iter(await password_hasher.hash_many([row.password for row in with_password]))
+
+    created = await create_users_with_profiles(
+        db,
+        user_type=UserType.individual,
+        profile_model=Individual,
+        rows=[
+            {
+                "email": row.email,
+                "hashed_password": next(hashed) if row.password else INVITE_MARKER,
+                "full_name": row.full_name,
+                "organization_id": organization_id,
+            }
+            for _, row in batch
+        ]
+    )
+    await db.commit()
+
+    events = []
+    invites = {}
+    for line, row in batch:
+        user_id = created.get(row.email)
+        if user_id is None:
+            summary["errors"] += 1
+            events.append(_event(
+                "error", line=line, email=row.email,
+                detail="El correo electrónico ya está registrado"
+            ))
+        elif not row.password:
+            token = secrets.token_urlsafe(32)
+            invites[token] = user_id
+            events.append(_event("invite", line=line, email=row.email, token=token))
+
+    if invites:
+        pipe = redis.pipeline(transaction=False)
+        for token, user_id in invites.items():
+            pipe.set(invite_key(token), user_id, ex=INVITE_TTL_SECONDS)
+        await pipe.execute()
+
+    summary["created"] += len(created)
+    summary["invited"] += len(invites)
+    events.append(_event("progress", **summary))
+    return events
+
+
+async def import_members(
+    organization_id: int,
+    spool,
+    import_format: MemberImportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Importa los miembros del archivo por lotes y va emitiendo eventos NDJSON:
+    `error` por fila rechazada, `invite` por cada invitación emitida,
+    `progress` al terminar cada lote y `done` al final.
+
+    Usa su propia sesión de base de datos porque corre mientras se
+    transmite la respuesta, después de que terminó el endpoint.
+    """
+    summary = {"processed": 0, "created": 0, "invited": 0, "errors": 0}
+    try:
+        async with AsyncSessionLocal() as db:
+            batch: List[Tuple[int, MemberImportRow]] = []
+            batch_emails = set()
+            for line, raw in iter_rows(spool, import_format):
+                summary["processed"] += 1
+                try:
+                    if isinstance(raw, Exception):
+                        raise raw
+                    row = MemberImportRow.model_validate(raw)
+                except (ValidationError, ValueError) as e:
+                    summary["errors"] += 1
+                    yield _row_error(line, e)
+                    continue
+
+                if row.email in batch_emails:
+                    summary["errors"] += 1
+                    yield _event("error", line=line, email=row.email, detail="Correo duplicado en el archivo")
+                    continue
+                batch_emails.add(row.email)
+                batch.append((line, row))
+
+                if len(batch) >= MEMBER_IMPORT_BATCH_SIZE:
+                    for event in await _import_batch(db, organization_id, batch, summary):
+                        yield event
+                    batch = []
+                    batch_emails = set()
+
+            if batch:
+                for event in await _import_batch(db, organization_id, batch, summary):
+                    yield event
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield _event("error", detail=f"No se pudo leer el archivo: {e}")
+    except Exception:
+        logger.exception("Falló la importación de miembros de la organización %s", organization_id)
+        yield _event("error", detail="Error interno durante la importación")
+    finally:
+        spool.close()
+
+    yield _event("done", **summary)
+
+
+async def accept_invite(db: AsyncSession, invite_data: AcceptInviteRequest) -> IndividualUserResponse:
+    """
+    Define la contraseña de un miembro invitado y le abre su primera sesión.
+    """
+    # El token se valida antes de bcrypt, y se consume solo después del
+    # commit: una falla de la base no deja al miembro sin invitación
+    key = invite_key(invite_data.token)
+    user_id = await redis.get(key)
+    if user_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La invitación no es válida o ya expiró"
+        )
+
+    hashed_password = await get_password_hash(invite_data.password)
+    try:
+        # Solo actualiza si la contraseña sigue siendo la marca de invitación:
+        # dos aceptaciones simultáneas del mismo token no pasan ambas
+        account = await set_password_if_invited(db, int(user_id), hashed_password, INVITE_MARKER)
+        if account is None:
+            await db.rollback()
+        else:
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    # Si el borrado falla, el token ya no sirve: la marca de invitación
+    # dejó de coincidir y expira con su TTL
+    try:
+        await redis.delete(key)
+    except Exception:
+        logger.warning("No se pudo borrar el token de invitación", exc_info=True)
+    if account is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="La invitación no es válida o ya expiró"
+        )
+
+    access_token, refresh_token = await create_session(account.id, account.type)
+
+    return IndividualUserResponse(
+        id=account.id,
+        email=account.email,
+        type=account.type,
+        full_name=account.full_name,
+        created_at=account.created_at,
+        access_token=access_token,
+        refresh_token=refresh_token,
+    )
@@ -0,0 +1,332 @@
+import os
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time, timezone
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import Date, cast, delete, func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activitySegments import ActivitySegment
+from app.models.dataTypes import RollupPeriod, TransportationMode
+from app.models.individual import Individual
+from app.models.organizationRollups import OrganizationMemberDay, OrganizationModeRollup
+from app.models.trips import Trip
+from app.schemas.organization import ModeActivity, OrganizationAnalyticsResponse, OrganizationDayActivity
+from app.services.aggregation import TripDelta, period_starts
+
+# Rango máximo de una consulta de tablero
+ORG_ANALYTICS_MAX_DAYS = int(os.getenv("ORG_ANALYTICS_MAX_DAYS", "366"))
+
+# Espacio de los candados consultivos por organización (primer argumento
+# de pg_advisory_xact_lock); el segundo es el id de la organización
+ORG_ROLLUP_LOCK_SPACE = 7401
+
+MODE_COLUMNS = ("segment_count", "distance_meters", "duration_seconds", "carbon_saved_grams")
+MEMBER_COLUMNS = ("trip_count", "distance_meters", "carbon_saved_grams", "points")
+
+
+@dataclass
+class SegmentDelta:
+    """
+    Cambio que un segmento aporta (o retira) al acumulado por modo. Usa el
+    inicio de su viaje para caer en el mismo día que el viaje.
+    """
+    user_id: int
+    trip_start_time: datetime
+    transportation_mode: TransportationMode
+    segment_count: int
+    distance_meters: float
+    duration_seconds: float
+    carbon_saved_grams: float
+
+    def negated(self) -> "SegmentDelta":
+        return replace(
+            self,
+            segment_count=-self.segment_count,
+            distance_meters=-self.distance_meters,
+            duration_seconds=-self.duration_seconds,
+            carbon_saved_grams=-self.carbon_saved_grams,
+        )
+
+
+async def _lock_organizations(db: AsyncSession, organization_ids: Iterable[int], shared: bool) -> None:
+    """
+    Candado consultivo de transacción sobre los acumulados de cada
+    organización. La ingesta lo toma compartido (no compite entre sí) y la
+    reconstrucción exclusivo, así ninguna escribe entre el borrado y la
+    inserción de la otra. Se toma en orden de id para no producir deadlocks.
+    """
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    for organization_id in sorted(organization_ids):
+        await db.execute(select(lock(ORG_ROLLUP_LOCK_SPACE, organization_id)))
+
+
+def _day(moment: datetime) -> date:
+    return period_starts(moment)[RollupPeriod.day]
+
+
+async def _upsert(db: AsyncSession, model, keys: List[str], columns: Iterable[str], rows: Dict[tuple, list]) -> None:
+    """
+    Suma los valores a las filas existentes (o las crea) y borra las que
+    quedan en cero o menos tras restar viajes eliminados.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    # Orden estable por llave para que lotes concurrentes no se bloqueen en cruz
+    values = [
+        {**dict(zip(keys, key)), **dict(zip(columns, totals))}
+        for key, totals in sorted(rows.items(), key=lambda item: tuple(str(part) for part in item[0]))
+    ]
+    statement = insert(table).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={column: table.c[column] + statement.excluded[column] for column in columns},
+    )
+    await db.execute(statement)
+
+    emptied = [key for key, totals in rows.items() if totals[0] < 0]
+    if emptied:
+        count_column = table.c[next(iter(columns))]
+        await db.execute(
+            delete(table)
+            .where(tuple_(*[table.c[key] for key in keys]).in_(emptied))
+            .where(count_column <= 0)
+        )
+
+
+async def apply_organization_deltas(
+    db: AsyncSession,
+    trip_deltas: Iterable[TripDelta],
+    segment_deltas: Iterable[SegmentDelta]
+) -> Set[int]:
+    """
+    Aplica los deltas a los acumulados diarios de las organizaciones de sus
+    usuarios y devuelve los ids de las organizaciones afectadas.
+
+    No hace commit: corre en la misma transacción que escribe los viajes,
+    igual que `apply_trip_deltas`. Espera a que termine una reconstrucción
+    en curso de esas organizaciones (`rebuild_organization_rollups`).
+    """
+    trip_deltas = list(trip_deltas)
+    segment_deltas = list(segment_deltas)
+    user_ids = {delta.user_id for delta in trip_deltas} | {delta.user_id for delta in segment_deltas}
+    if not user_ids:
+        return set()
+
+    result = await db.execute(
+        select(Individual.user_id, Individual.organization_id)
+        .where(Individual.user_id.in_(user_ids), Individual.organization_id.isnot(None))
+    )
+    organizations = dict(result.all())
+    if not organizations:
+        return set()
+
+    members: Dict[tuple, list] = defaultdict(lambda: [0, 0.0, 0.0, 0])
+    for delta in trip_deltas:
+        organization_id = organizations.get(delta.user_id)
+        if organization_id is None:
+            continue
+        values = members[(organization_id, _day(delta.start_time), delta.user_id)]
+        values[0] += delta.trip_count
+        values[1] += delta.distance_meters
+        values[2] += delta.carbon_saved_grams
+        values[3] += delta.points
+
+    modes: Dict[tuple, list] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for delta in segment_deltas:
+        organization_id = organizations.get(delta.user_id)
+        if organization_id is None:
+            continue
+        values = modes[(organization_id, _day(delta.trip_start_time), TransportationMode(delta.transportation_mode))]
+        values[0] += delta.segment_count
+        values[1] += delta.distance_meters
+        values[2] += delta.duration_seconds
+        values[3] += delta.carbon_saved_grams
+
+    await _lock_organizations(db, set(organizations.values()), shared=True)
+    await _upsert(db, OrganizationMemberDay, ["organization_id", "day", "user_id"], MEMBER_COLUMNS, members)
+    await _upsert(db, OrganizationModeRollup, ["organization_id", "day", "transportation_mode"], MODE_COLUMNS, modes)
+    return set(organizations.values())
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min, timezone.utc)
+
+
+async def rebuild_organization_rollups(db: AsyncSession, organization_id: int, start: date, end: date) -> None:
+    """
+    Recalcula desde `trips` los acumulados de una organización para los
+    días [start, end). El filtro sobre start_time y trip_start_time limita
+    la lectura a las particiones de esos meses. No hace commit.
+
+    Puede correr con la ingesta activa: toma el candado exclusivo de la
+    organización, que espera a las agregaciones en curso y hace esperar a
+    las nuevas hasta el commit. Las que esperan suman sus deltas sobre lo
+    reconstruido, que no incluía sus viajes aún sin confirmar.
+    """
+    await _lock_organizations(db, [organization_id], shared=False)
+    modes = OrganizationModeRollup.__table__
+    members = OrganizationMemberDay.__table__
+    for table in (modes, members):
+        await db.execute(
+            delete(table).where(
+                table.c.organization_id == organization_id,
+                table.c.day >= start,
+                table.c.day < end,
+            )
+        )
+
+    trips = Trip.__table__
+    segments = ActivitySegment.__table__
+    individuals = Individual.__table__
+    lower, upper = _utc_midnight(start), _utc_midnight(end)
+    # Literales en línea para que el SELECT y el GROUP BY usen la misma expresión
+    day = cast(func.date_trunc(literal_column("'day'"), func.timezone(literal_column("'UTC'"), trips.c.start_time)), Date)
+
+    await db.execute(
+        insert(members).from_select(
+            ["organization_id", "day", "user_id", *MEMBER_COLUMNS],
+            select(
+                individuals.c.organization_id,
+                day,
+                trips.c.user_id,
+                func.count(),
+                func.coalesce(func.sum(trips.c.distance_meters), 0),
+                func.coalesce(func.sum(trips.c.carbon_saved_grams), 0),
+                func.coalesce(func.sum(trips.c.points), 0),
+            )
+            .select_from(trips.join(individuals, individuals.c.user_id == trips.c.user_id))
+            .where(
+                individuals.c.organization_id == organization_id,
+                trips.c.start_time >= lower,
+                trips.c.start_time < upper,
+                trips.c.aggregated.is_(True),
+            )
+            .group_by(individuals.c.organization_id, day, trips.c.user_id)
+        )
+    )
+    await db.execute(
+        insert(modes).from_select(
+            ["organization_id", "day", "transportation_mode", *MODE_COLUMNS],
+            select(
+                individuals.c.organization_id,
+                day,
+                segments.c.transportation_mode,
+                func.count(),
+                func.coalesce(func.sum(segments.c.distance_meters), 0),
+                func.coalesce(func.sum(segments.c.duration_seconds), 0),
+                func.coalesce(func.sum(segments.c.carbon_saved_grams), 0),
+            )
+            .select_from(
+                segments
+                .join(
+                    trips,
+                    (trips.c.id == segments.c.trip_id) & (trips.c.start_time == segments.c.trip_start_time)
+                )
+                .join(individuals, individuals.c.user_id == trips.c.user_id)
+            )
+            .where(
+                individuals.c.organization_id == organization_id,
+                trips.c.start_time >= lower,
+                trips.c.start_time < upper,
+                trips.c.aggregated.is_(True),
+                segments.c.trip_start_time >= lower,
+                segments.c.trip_start_time < upper,
+            )
+            .group_by(individuals.c.organization_id, day, segments.c.transportation_mode)
+        )
+    )
+
+
+def validate_range(start: date, end: date) -> None:
+    if start > end:
+        raise ValueError("La fecha inicial debe ser anterior o igual a la final")
+    if (end - start).days + 1 > ORG_ANALYTICS_MAX_DAYS:
+        raise ValueError(f"El rango no puede exceder {ORG_ANALYTICS_MAX_DAYS} días")
+
+
+def _mode_activity(row) -> ModeActivity:
+    return ModeActivity(
+        transportation_mode=row.transportation_mode,
+        segment_count=row.segment_count,
+        distance_meters=row.distance_meters,
+        duration_seconds=row.duration_seconds,
+        carbon_saved_grams=row.carbon_saved_grams,
+    )
+
+
+async def get_organization_analytics(
+    db: AsyncSession,
+    organization_id: int,
+    start: date,
+    end: date
+) -> OrganizationAnalyticsResponse:
+    """
+    Tablero de un rango de días leído solo de los acumulados; cada consulta
+    recorre la llave primaria (organization_id, day, ...) del rango.
+    """
+    validate_range(start, end)
+    modes = OrganizationModeRollup.__table__
+    members = OrganizationMemberDay.__table__
+
+    result = await db.execute(
+        select(
+            modes.c.day,
+            modes.c.transportation_mode,
+            *[modes.c[column] for column in MODE_COLUMNS],
+        )
+        .where(modes.c.organization_id == organization_id, modes.c.day.between(start, end))
+        .order_by(modes.c.day, modes.c.transportation_mode)
+    )
+    modes_by_day: Dict[date, List[ModeActivity]] = defaultdict(list)
+    mode_totals: Dict[TransportationMode, list] = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+    for row in result:
+        modes_by_day[row.day].append(_mode_activity(row))
+        totals = mode_totals[TransportationMode(row.transportation_mode)]
+        for position, column in enumerate(MODE_COLUMNS):
+            totals[position] += getattr(row, column)
+
+    in_range = (members.c.organization_id == organization_id) & members.c.day.between(start, end)
+    result = await db.execute(
+        select(
+            members.c.day,
+            func.count().label("active_members"),
+            *[func.sum(members.c[column]).label(column) for column in MEMBER_COLUMNS],
+        )
+        .where(in_range)
+        .group_by(members.c.day)
+        .order_by(members.c.day)
+    )
+    days = [
+        OrganizationDayActivity(
+            day=row.day,
+            active_members=row.active_members,
+            trip_count=row.trip_count,
+            distance_meters=row.distance_meters,
+            carbon_saved_grams=row.carbon_saved_grams,
+            points=row.points,
+            modes=modes_by_day.get(row.day, []),
+        )
+        for row in result
+    ]
+
+    result = await db.execute(select(func.count(func.distinct(members.c.user_id))).where(in_range))
+    active_members = result.scalar_one()
+
+    return OrganizationAnalyticsResponse(
+        start=start,
+        end=end,
+        active_members=active_members,
+        trip_count=sum(day.trip_count for day in days),
+        distance_meters=sum(day.distance_meters for day in days),
+        carbon_saved_grams=sum(day.carbon_saved_grams for day in days),
+        points=sum(day.points for day in days),
+        modes=[
+            ModeActivity(transportation_mode=mode, **dict(zip(MODE_COLUMNS, totals)))
+            for mode, totals in sorted(mode_totals.items(), key=lambda item: item[0].value)
+        ],
+        days=days,
+    )
@@ -0,0 +1,171 @@
+import os
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+# Tablas particionadas por mes y su columna de partición. El orden importa:
+# los segmentos referencian a los viajes, así que se crean después y se
+# desprenden antes
+PARTITIONED_TABLES: Tuple[Tuple[str, str], ...] = (
+    ("trips", "start_time"),
+    ("activitySegment", "trip_start_time"),
+)
+
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "24"))
+ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "archive")
+# DETACH sin CONCURRENTLY bloquea la tabla padre; mejor fallar que esperar
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+
+
+def month_start(moment) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def default_partition_name(table: str) -> str:
+    return f"{table}_default"
+
+
+def _bounds(month: date) -> Tuple[str, str]:
+    # Los límites son medianoche UTC, igual que los acumulados por periodo
+    return f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+
+async def list_partition_months(connection: AsyncConnection, table: str) -> List[date]:
+    """
+    Meses con partición adjunta a la tabla (según la convención de nombres).
+    """
+    result = await connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": f'"{table}"'}
+    )
+    prefix = f"{table}_p"
+    months = []
+    for (name,) in result:
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split("_")
+            months.append(date(int(year), int(month), 1))
+    return sorted(months)
+
+
+async def create_month_partitions(connection: AsyncConnection, month: date) -> bool:
+    """
+    Crea las particiones de un mes en todas las tablas. Devuelve False si ya existían.
+
+    Las filas de ese mes que hubieran caído en la partición por defecto se
+    mueven a la nueva antes de adjuntarla; por eso cada tabla se llena
+    primero como tabla suelta y se adjunta al final, viajes antes que
+    segmentos para que la llave foránea se valide contra la partición nueva.
+    """
+    if month in await list_partition_months(connection, PARTITIONED_TABLES[0][0]):
+        return False
+
+    start, end = _bounds(month)
+    for table, column in reversed(PARTITIONED_TABLES):
+        name = partition_name(table, month)
+        await connection.execute(text(
+            f'CREATE TABLE "{name}" (LIKE "{table}" INCLUDING DEFAULTS INCLUDING STORAGE)'
+        ))
+        await connection.execute(text(
+            f'WITH moved AS ('
+            f'  DELETE FROM "{default_partition_name(table)}"'
+            f"  WHERE {column} >= '{start}' AND {column} < '{end}' RETURNING *"
+            f') INSERT INTO "{name}" SELECT * FROM moved'
+        ))
+
+    for table, _ in PARTITIONED_TABLES:
+        await connection.execute(text(
+            f'ALTER TABLE "{table}" ATTACH PARTITION "{partition_name(table, month)}" '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+    return True
+
+
+async def ensure_future_partitions(
+    connection: AsyncConnection,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    today: Optional[date] = None
+) -> List[date]:
+    """
+    Crea las particiones faltantes desde el mes actual hasta `months_ahead` meses adelante.
+    """
+    current = month_start(today or datetime.now(timezone.utc))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if await create_month_partitions(connection, month):
+            created.append(month)
+    return created
+
+
+async def archive_month_partitions(connection: AsyncConnection, month: date) -> None:
+    """
+    Desprende las particiones de un mes y las mueve al esquema de archivo.
+
+    Antes guarda los totales por usuario del mes en `archivedTripTotals`
+    para que la conciliación de totales siga cuadrando.
+    """
+    await connection.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+    await connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"'))
+
+    trips_partition = partition_name("trips", month)
+    await connection.execute(
+        text(
+            f'INSERT INTO "archivedTripTotals" (user_id, month, trip_count, carbon_saved_grams, points) '
+            f"SELECT user_id, :month, count(*), coalesce(sum(carbon_saved_grams), 0), "
+            f'coalesce(sum(points), 0) FROM "{trips_partition}" GROUP BY user_id '
+            f"ON CONFLICT (user_id, month) DO UPDATE SET "
+            f'trip_count = "archivedTripTotals".trip_count + excluded.trip_count, '
+            f'carbon_saved_grams = "archivedTripTotals".carbon_saved_grams + excluded.carbon_saved_grams, '
+            f'points = "archivedTripTotals".points + excluded.points'
+        ),
+        {"month": month}
+    )
+
+    for table, _ in reversed(PARTITIONED_TABLES):
+        name = partition_name(table, month)
+        await connection.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+        # La partición desprendida conserva sus llaves foráneas hacia las
+        # tablas vivas; se quitan para poder desprender después la referida
+        constraints = await connection.execute(
+            text(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'"
+            ),
+            {"name": f'"{name}"'}
+        )
+        for (constraint,) in constraints.all():
+            await connection.execute(text(f'ALTER TABLE "{name}" DROP CONSTRAINT "{constraint}"'))
+        await connection.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{ARCHIVE_SCHEMA}"'))
+
+
+async def archive_expired_partitions(
+    connection: AsyncConnection,
+    retention_months: int = PARTITION_RETENTION_MONTHS,
+    today: Optional[date] = None
+) -> List[date]:
+    """
+    Archiva los meses más antiguos que `retention_months`.
+    """
+    cutoff = add_months(month_start(today or datetime.now(timezone.utc)), -retention_months)
+    archived = []
+    for month in await list_partition_months(connection, PARTITIONED_TABLES[0][0]):
+        if month < cutoff:
+            await archive_month_partitions(connection, month)
+            archived.append(month)
+    return archived
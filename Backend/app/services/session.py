@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import secrets
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert
+
+from app.core.data import TokenInformation, RefreshTokenInformation
+from app.core.database import AsyncSessionLocal
+from app.core.security import (
+    create_access_token, create_refresh_token, refresh_tokens_action, session_store
+)
+from app.models.authToken import AuthToken
+from app.models.dataTypes import UserType
+
+logger = logging.getLogger(__name__)
+
+# Auditoría opcional de sesiones en la tabla authTokens
+SESSION_AUDIT_ENABLED = os.getenv("SESSION_AUDIT_ENABLED", "False").lower() == "true"
+SESSION_AUDIT_BATCH_SIZE = int(os.getenv("SESSION_AUDIT_BATCH_SIZE", "500"))
+SESSION_AUDIT_FLUSH_SECONDS = float(os.getenv("SESSION_AUDIT_FLUSH_SECONDS", "2"))
+SESSION_AUDIT_MAX_QUEUE = int(os.getenv("SESSION_AUDIT_MAX_QUEUE", "10000"))
+
+
+class SessionAuditSink:
+    """
+    Escribe los tokens emitidos en `authTokens` en segundo plano y por lotes.
+
+    Las peticiones solo encolan; si la cola se llena, los registros se
+    descartan y se cuentan en `dropped` en lugar de frenar los logins.
+    """
+
+    def __init__(self, enabled: bool, batch_size: int, flush_seconds: float, max_queue: int) -> None:
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.written = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[dict] = []
+        self._flushing: Optional[asyncio.Future] = None
+
+    def record(self, user_id: int, access_token: str, refresh_token: str) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "token": access_token,
+                "refresh_token": refresh_token,
+            })
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Detiene el escritor y escribe todo lo pendiente: el lote que tenía
+        en mano, el que estaba escribiendo y lo que quede en la cola.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+
+        rows, self._pending = self._pending, []
+        while True:
+            rows.extend(self._drain())
+            if not rows:
+                break
+            await self._flush(rows[:self.batch_size])
+            rows = rows[self.batch_size:]
+        self._queue = None
+
+    def _drain(self) -> List[dict]:
+        rows = []
+        while not self._queue.empty() and len(rows) < self.batch_size:
+            rows.append(self._queue.get_nowait())
+        return rows
+
+    async def _run(self) -> None:
+        while True:
+            # El lote vive en la instancia mientras espera: si se cancela
+            # durante la espera, `stop` lo escribe
+            self._pending.append(await self._queue.get())
+            await asyncio.sleep(self.flush_seconds)
+            self._pending.extend(self._drain())
+            rows, self._pending = self._pending, []
+            # Una escritura en curso termina aunque se cancele la tarea
+            self._flushing = asyncio.ensure_future(self._flush(rows))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _flush(self, rows: List[dict]) -> None:
+        if not rows:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(AuthToken).values(rows))
+                await db.commit()
+            self.written += len(rows)
+        except Exception:
+            self.dropped += len(rows)
+            logger.warning("No se pudo escribir la auditoría de sesiones", exc_info=True)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+
+session_audit = SessionAuditSink(
+    enabled=SESSION_AUDIT_ENABLED,
+    batch_size=SESSION_AUDIT_BATCH_SIZE,
+    flush_seconds=SESSION_AUDIT_FLUSH_SECONDS,
+    max_queue=SESSION_AUDIT_MAX_QUEUE,
+)
+
+
+async def create_session(user_id: int, user_type: UserType) -> Tuple[str, str]:
+    """
+    Abre una sesión nueva y devuelve su par (access_token, refresh_token).
+    """
+    sid = secrets.token_urlsafe(16)
+    access_token = create_access_token(
+        TokenInformation(id=user_id, type=user_type, sid=sid).model_dump()
+    )
+    refresh_token = create_refresh_token(
+        RefreshTokenInformation(id=user_id, type=user_type, sid=sid).model_dump()
+    )
+    await session_store.create(sid, user_id, UserType(user_type).value, refresh_token)
+    session_audit.record(user_id, access_token, refresh_token)
+    return access_token, refresh_token
+
+
+async def refresh_session(refresh_token: str) -> Tuple[str, str]:
+    """
+    Emite un nuevo par de tokens para una sesión activa. Un refresh token
+    que ya fue usado cierra la sesión completa.
+    """
+    access_token, new_refresh_token, user_id, sid = refresh_tokens_action(refresh_token)
+
+    if not sid or not await session_store.rotate(sid, user_id, refresh_token, new_refresh_token):
+        if sid:
+            await session_store.revoke(user_id, sid)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Sesión inválida o cerrada"
+        )
+
+    session_audit.record(user_id, access_token, new_refresh_token)
+    return access_token, new_refresh_token
+
+
+async def close_session(user_id: int, sid: str) -> None:
+    await session_store.revoke(user_id, sid)
+
+
+async def close_all_sessions(user_id: int) -> int:
+    return await session_store.revoke_all(user_id)
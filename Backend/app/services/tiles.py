@@ -0,0 +1,257 @@
+import logging
+import math
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import redis_binary
+from app.models.dataTypes import TransportationMode
+from app.models.individual import Individual
+
+logger = logging.getLogger(__name__)
+
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "18"))
+# Por encima de este zoom las teselas son baratas y no se guardan en caché
+TILE_CACHE_MAX_ZOOM = int(os.getenv("TILE_CACHE_MAX_ZOOM", "16"))
+
+# TTL por zoom: las teselas lejanas cubren mucha área, cuestan más de
+# calcular y cambian poco visualmente con cada viaje nuevo
+TILE_CACHE_TTLS = (
+    (int(os.getenv("TILE_CACHE_LOW_ZOOM", "8")), int(os.getenv("TILE_CACHE_LOW_ZOOM_TTL", "3600"))),
+    (int(os.getenv("TILE_CACHE_MID_ZOOM", "12")), int(os.getenv("TILE_CACHE_MID_ZOOM_TTL", "900"))),
+    (TILE_CACHE_MAX_ZOOM, int(os.getenv("TILE_CACHE_HIGH_ZOOM_TTL", "300"))),
+)
+
+# Resolución de la cuadrícula de agregación dentro de cada tesela
+TILE_EXTENT = 4096
+TILE_GRID_CELLS = 256
+WEB_MERCATOR_WORLD = 2 * 20037508.342789244
+
+# El mapa de calor muestra los traslados activos
+HEATMAP_MODES = (TransportationMode.walking, TransportationMode.bicycle)
+
+TILE_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+_TILE_SQL = text("""
+WITH bounds AS (
+    SELECT ST_TileEnvelope(:z, :x, :y) AS geom,
+           ST_Transform(ST_TileEnvelope(:z, :x, :y), 4326)::geography AS area
+),
+points AS (
+    SELECT s.transportation_mode, s.start_location AS location
+    FROM "activitySegment" s
+    JOIN trips t ON t.id = s.trip_id AND t.start_time = s.trip_start_time
+    JOIN individuals i ON i.user_id = t.user_id, bounds
+    WHERE i.organization_id = :organization_id
+      AND s.transportation_mode = ANY(CAST(:modes AS transportation_mode_enum[]))
+      AND s.start_location && bounds.area
+    UNION ALL
+    SELECT s.transportation_mode, s.end_location
+    FROM "activitySegment" s
+    JOIN trips t ON t.id = s.trip_id AND t.start_time = s.trip_start_time
+    JOIN individuals i ON i.user_id = t.user_id, bounds
+    WHERE i.organization_id = :organization_id
+      AND s.transportation_mode = ANY(CAST(:modes AS transportation_mode_enum[]))
+      AND s.end_location && bounds.area
+),
+cells AS (
+    SELECT ST_SnapToGrid(ST_Transform(location::geometry, 3857), :cell_size) AS geom,
+           transportation_mode::text AS mode,
+           count(*) AS count
+    FROM points
+    GROUP BY 1, 2
+),
+features AS (
+    SELECT ST_AsMVTGeom(cells.geom, bounds.geom, :extent, 0, true) AS geom, cells.mode, cells.count
+    FROM cells, bounds
+)
+SELECT ST_AsMVT(features, 'activity', :extent, 'geom')
+FROM features
+WHERE geom IS NOT NULL
+""")
+
+
+def tile_key(organization_id: int, z: int, x: int, y: int) -> str:
+    return f"tile:{organization_id}:{z}:{x}:{y}"
+
+
+def tile_ttl(z: int) -> Optional[int]:
+    """
+    TTL de caché para un zoom, o None si ese zoom no se guarda.
+    """
+    for max_zoom, ttl in TILE_CACHE_TTLS:
+        if z <= max_zoom:
+            return ttl
+    return None
+
+
+def validate_tile(z: int, x: int, y: int) -> None:
+    if not 0 <= z <= TILE_MAX_ZOOM:
+        raise ValueError(f"El zoom debe estar entre 0 y {TILE_MAX_ZOOM}")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise ValueError("Coordenadas de tesela fuera de rango para ese zoom")
+
+
+def tiles_for_points(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    max_zoom: int
+) -> Set[Tuple[int, int, int]]:
+    """
+    Teselas (z, x, y) que contienen cada punto, para todos los zooms hasta `max_zoom`.
+    """
+    if latitudes.size == 0:
+        return set()
+    # Límite de latitud de Web Mercator
+    latitudes = np.clip(latitudes, -85.0511, 85.0511)
+    x_fraction = (longitudes + 180.0) / 360.0
+    lat_radians = np.radians(latitudes)
+    y_fraction = (1.0 - np.log(np.tan(lat_radians) + 1.0 / np.cos(lat_radians)) / math.pi) / 2.0
+
+    tiles = set()
+    for z in range(max_zoom + 1):
+        scale = 2 ** z
+        xs = np.clip((x_fraction * scale).astype(np.int64), 0, scale - 1)
+        ys = np.clip((y_fraction * scale).astype(np.int64), 0, scale - 1)
+        for x, y in set(zip(xs.tolist(), ys.tolist())):
+            tiles.add((z, x, y))
+    return tiles
+
+
+class TileCache:
+    """
+    Caché de teselas MVT en Redis por organización, con TTL según el zoom.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def get(self, organization_id: int, z: int, x: int, y: int) -> Optional[bytes]:
+        if tile_ttl(z) is None:
+            return None
+        try:
+            tile = await redis_binary.get(tile_key(organization_id, z, x, y))
+        except Exception:
+            self.errors += 1
+            logger.warning("No se pudo leer el caché de teselas", exc_info=True)
+            return None
+        if tile is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tile
+
+    async def set(self, organization_id: int, z: int, x: int, y: int, tile: bytes) -> None:
+        ttl = tile_ttl(z)
+        if ttl is None:
+            return
+        try:
+            await redis_binary.set(tile_key(organization_id, z, x, y), tile, ex=ttl)
+        except Exception:
+            self.errors += 1
+            logger.warning("No se pudo escribir el caché de teselas", exc_info=True)
+
+    async def invalidate(self, organization_id: int, tiles: Iterable[Tuple[int, int, int]]) -> None:
+        keys = [tile_key(organization_id, z, x, y) for z, x, y in tiles]
+        if not keys:
+            return
+        pipe = redis_binary.pipeline(transaction=False)
+        for start in range(0, len(keys), 1000):
+            pipe.unlink(*keys[start:start + 1000])
+        await pipe.execute()
+        self.invalidations += len(keys)
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidated_keys": self.invalidations,
+            "errors": self.errors,
+            "max_cached_zoom": TILE_CACHE_MAX_ZOOM,
+        }
+
+
+tile_cache = TileCache()
+
+
+async def render_tile(db: AsyncSession, organization_id: int, z: int, x: int, y: int) -> bytes:
+    """
+    Agrega los puntos de los segmentos de los miembros de la organización
+    en una cuadrícula dentro de la tesela y la codifica con ST_AsMVT.
+    """
+    result = await db.execute(_TILE_SQL, {
+        "z": z,
+        "x": x,
+        "y": y,
+        "organization_id": organization_id,
+        "modes": [mode.value for mode in HEATMAP_MODES],
+        "cell_size": WEB_MERCATOR_WORLD / (2 ** z) / TILE_GRID_CELLS,
+        "extent": TILE_EXTENT,
+    })
+    tile = result.scalar()
+    return bytes(tile) if tile else b""
+
+
+async def get_tile(db: AsyncSession, organization_id: int, z: int, x: int, y: int) -> Tuple[bytes, bool]:
+    """
+    Devuelve (tesela, vino_del_caché).
+    """
+    validate_tile(z, x, y)
+    cached = await tile_cache.get(organization_id, z, x, y)
+    if cached is not None:
+        return cached, True
+
+    tile = await render_tile(db, organization_id, z, x, y)
+    await tile_cache.set(organization_id, z, x, y, tile)
+    return tile, False
+
+
+async def invalidate_user_tiles(
+    db: AsyncSession,
+    user_id: int,
+    latitudes: List[float],
+    longitudes: List[float]
+) -> None:
+    """
+    Borra del caché las teselas de la organización del usuario que
+    contienen alguno de los puntos nuevos.
+    """
+    if not latitudes:
+        return
+    result = await db.execute(
+        select(Individual.organization_id).where(Individual.user_id == user_id)
+    )
+    organization_id = result.scalar_one_or_none()
+    if organization_id is None:
+        return
+    tiles = tiles_for_points(
+        np.asarray(latitudes, dtype=np.float64),
+        np.asarray(longitudes, dtype=np.float64),
+        TILE_CACHE_MAX_ZOOM
+    )
+    await tile_cache.invalidate(organization_id, tiles)
+
+
+async def safe_invalidate_user_tiles(
+    db: AsyncSession,
+    user_id: int,
+    latitudes: List[float],
+    longitudes: List[float]
+) -> None:
+    """
+    Igual que `invalidate_user_tiles`, pero una falla no rompe la petición:
+    las teselas afectadas expiran solas con su TTL.
+    """
+    try:
+        await invalidate_user_tiles(db, user_id, latitudes, longitudes)
+    except Exception:
+        tile_cache.errors += 1
+        logger.warning("No se pudieron invalidar las teselas", exc_info=True)
@@ -0,0 +1,553 @@
+import logging
+import uuid
+from dataclasses import replace
+from datetime import datetime
+from typing import List, Optional, Tuple
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from app.core.cache import organization_tag, response_cache, user_tag
+from app.core.database import AsyncSessionLocal
+from app.jobs.queue import LEADERBOARDS_UPDATE, TRIPS_AGGREGATE, enqueue
+from app.models.dataTypes import LedgerReason
+from app.models.individual import Individual
+from app.models.trips import Trip
+from app.models.activitySegments import ActivitySegment
+from app.schemas.trip import (
+    ActivitySegmentCreate, Location, TripBatchCreate, TripBatchResponse, TripCorrection, TripIngestResult
+)
+from app.services.tripMetrics import (
+    SegmentMetrics, TrackBatch, carbon_saved_for, compute_segment_metrics, points_for_carbon,
+    rollup_trip_metrics
+)
+from app.services.aggregation import TripDelta, apply_trip_deltas
+from app.services.leaderboard import safe_update_leaderboards
+from app.services.organizationAnalytics import SegmentDelta, apply_organization_deltas
+from app.services.tiles import safe_invalidate_user_tiles
+from app.services.traceCodec import encode_trace
+
+logger = logging.getLogger(__name__)
+
+# Filas por sentencia INSERT: mantiene cada sentencia lejos del límite de
+# 32767 parámetros de Postgres
+INSERT_CHUNK_SIZE = 1000
+
+def to_wkt(location: Optional[Location]) -> Optional[str]:
+    """
+    Convierte una ubicación al formato EWKT que espera la columna Geography.
+    """
+    if location is None:
+        return None
+    return f"SRID=4326;POINT({location.longitude} {location.latitude})"
+
+def _segment_track(segment: ActivitySegmentCreate) -> tuple:
+    """
+    Lecturas GPS del segmento. Sin traza, se usan sus puntos de inicio y fin.
+    """
+    if segment.track is not None:
+        return (segment.track.latitudes, segment.track.longitudes, segment.track.timestamps)
+
+    latitudes = [segment.start_location.latitude]
+    longitudes = [segment.start_location.longitude]
+    timestamps = [segment.start_time.timestamp()]
+    if segment.end_location is not None and segment.end_time is not None:
+        latitudes.append(segment.end_location.latitude)
+        longitudes.append(segment.end_location.longitude)
+        timestamps.append(segment.end_time.timestamp())
+    return (latitudes, longitudes, timestamps)
+
+def compute_batch_metrics(batch: TripBatchCreate) -> tuple[SegmentMetrics, SegmentMetrics]:
+    """
+    Calcula las métricas de todos los segmentos del lote en una pasada y
+    las acumula por viaje. Devuelve (métricas por viaje, métricas por segmento).
+    """
+    segments = [segment for trip in batch.trips for segment in trip.segments]
+    track_batch = TrackBatch.from_tracks(
+        [_segment_track(segment) for segment in segments],
+        [segment.transportation_mode for segment in segments]
+    )
+    segment_metrics = compute_segment_metrics(track_batch)
+    segment_trip_index = np.repeat(
+        np.arange(len(batch.trips)),
+        [len(trip.segments) for trip in batch.trips]
+    )
+    trip_metrics = rollup_trip_metrics(segment_metrics, segment_trip_index, len(batch.trips))
+    return trip_metrics, segment_metrics
+
+def _segment_points(rows) -> Tuple[List[float], List[float]]:
+    """
+    Latitudes y longitudes de inicio y fin de los segmentos, para invalidar
+    las teselas que los contienen.
+    """
+    latitudes, longitudes = [], []
+    for row in rows:
+        for latitude, longitude in (
+            (row.start_latitude, row.start_longitude),
+            (row.end_latitude, row.end_longitude),
+        ):
+            if latitude is not None:
+                latitudes.append(latitude)
+                longitudes.append(longitude)
+    return latitudes, longitudes
+
+async def _insert_returning_ids(db: AsyncSession, model, rows: List[dict]) -> List[int]:
+    """
+    Inserta filas con INSERT multi-fila ... RETURNING id, por bloques.
+
+    Postgres devuelve las filas de un INSERT ... VALUES en el mismo orden
+    de VALUES, así que los ids corresponden posicionalmente a `rows`.
+    """
+    ids: List[int] = []
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        chunk = rows[start:start + INSERT_CHUNK_SIZE]
+        result = await db.execute(insert(model).values(chunk).returning(model.id))
+        ids.extend(result.scalars().all())
+    return ids
+
+async def ingest_trips(
+    db: AsyncSession,
+    user_id: int,
+    batch: TripBatchCreate
+) -> TripBatchResponse:
+    """
+    Inserta un lote de viajes con sus segmentos en una sola transacción y
+    encola su agregación (trabajo trips.aggregate).
+    """
+    trip_metrics, segment_metrics = compute_batch_metrics(batch)
+    trip_points = points_for_carbon(trip_metrics.carbon_saved_grams)
+
+    trip_rows = [
+        {
+            "user_id": user_id,
+            "start_time": trip.start_time,
+            "end_time": trip.end_time,
+            "start_location": to_wkt(trip.start_location),
+            "end_location": to_wkt(trip.end_location),
+            "distance_meters": distance,
+            "duration_seconds": duration,
+            "carbon_saved_grams": carbon_saved,
+            "points": points,
+        }
+        for trip, distance, duration, carbon_saved, points in zip(
+            batch.trips,
+            trip_metrics.distance_meters.tolist(),
+            trip_metrics.duration_seconds.tolist(),
+            trip_metrics.carbon_saved_grams.tolist(),
+            trip_points.tolist(),
+        )
+    ]
+
+    try:
+        trip_ids = await _insert_returning_ids(db, Trip, trip_rows)
+
+        # Cada segmento vive en la partición del mes en que inicia su viaje
+        segment_trips = [
+            (trip_id, trip.start_time)
+            for trip_id, trip in zip(trip_ids, batch.trips)
+            for _ in trip.segments
+        ]
+        segments = [segment for trip in batch.trips for segment in trip.segments]
+        segment_rows = [
+            {
+                "trip_id": trip_id,
+                "trip_start_time": trip_start_time,
+                "start_time": segment.start_time,
+                "end_time": segment.end_time,
+                "start_location": to_wkt(segment.start_location),
+                "end_location": to_wkt(segment.end_location),
+                "distance_meters": distance,
+                "duration_seconds": duration,
+                "carbon_saved_grams": carbon_saved,
+                "transportation_mode": segment.transportation_mode,
+                "trace": (
+                    encode_trace(segment.track.latitudes, segment.track.longitudes, segment.track.timestamps)
+                    if segment.track is not None else None
+                ),
+            }
+            for (trip_id, trip_start_time), segment, distance, duration, carbon_saved in zip(
+                segment_trips,
+                segments,
+                segment_metrics.distance_meters.tolist(),
+                segment_metrics.duration_seconds.tolist(),
+                segment_metrics.carbon_saved_grams.tolist(),
+            )
+        ]
+        segment_ids = await _insert_returning_ids(db, ActivitySegment, segment_rows)
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    # El historial ya cambió; totales, acumulados, tablas de posiciones y
+    # teselas se actualizan en segundo plano
+    await response_cache.safe_invalidate(user_tag(user_id))
+    trip_keys = [(trip_id, trip.start_time) for trip_id, trip in zip(trip_ids, batch.trips)]
+    job_id = uuid.uuid4().hex
+    try:
+        await enqueue(
+            TRIPS_AGGREGATE,
+            {"user_id": user_id, "trips": [[trip_id, start_time.isoformat()] for trip_id, start_time in trip_keys]},
+            job_id=job_id,
+        )
+    except Exception:
+        # Sin cola, se agrega dentro de la petición para no dejar viajes sin sumar
+        logger.warning("No se pudo encolar la agregación; se aplica en línea", exc_info=True)
+        try:
+            await aggregate_trips(job_id, user_id, trip_keys, inline=True)
+        except Exception:
+            # Los viajes ya están guardados: el barrido (app.jobs.sweep) los
+            # reencola, así que la petición no falla
+            logger.error("No se pudieron agregar los viajes %s", [trip_id for trip_id, _ in trip_keys], exc_info=True)
+
+    # Reagrupar los ids de segmentos por viaje, en el orden del payload
+    results = []
+    offset = 0
+    for trip_id, trip in zip(trip_ids, batch.trips):
+        count = len(trip.segments)
+        results.append(TripIngestResult(
+            id=trip_id,
+            segment_ids=segment_ids[offset:offset + count]
+        ))
+        offset += count
+
+    return TripBatchResponse(trips=results)
+
+async def delete_trip(db: AsyncSession, user_id: int, trip_id: int) -> bool:
+    """
+    Elimina un viaje del usuario con sus segmentos y descuenta su aporte
+    de los acumulados. Devuelve False si el viaje no existe.
+    """
+    trips = Trip.__table__
+    segments = ActivitySegment.__table__
+    owned_trip = select(trips.c.id, trips.c.start_time).where(trips.c.id == trip_id, trips.c.user_id == user_id)
+
+    try:
+        # Bloquear el viaje antes de tocarlo: si su agregación está en curso,
+        # se espera a que termine y se lee el valor final de `aggregated`
+        result = await db.execute(
+            select(trips.c.aggregated)
+            .where(trips.c.id == trip_id, trips.c.user_id == user_id)
+            .with_for_update()
+        )
+        aggregated = result.scalar_one_or_none()
+        if aggregated is None:
+            await db.rollback()
+            return False
+
+        result = await db.execute(
+            delete(segments)
+            .where(tuple_(segments.c.trip_id, segments.c.trip_start_time).in_(owned_trip))
+            .returning(
+                segments.c.trip_start_time,
+                segments.c.transportation_mode,
+                segments.c.distance_meters,
+                segments.c.duration_seconds,
+                segments.c.carbon_saved_grams,
+                func.ST_Y(func.geometry(segments.c.start_location)).label("start_latitude"),
+                func.ST_X(func.geometry(segments.c.start_location)).label("start_longitude"),
+                func.ST_Y(func.geometry(segments.c.end_location)).label("end_latitude"),
+                func.ST_X(func.geometry(segments.c.end_location)).label("end_longitude"),
+            )
+        )
+        deleted_segments = result.all()
+        segment_deltas = [
+            SegmentDelta(
+                user_id=user_id,
+                trip_start_time=segment.trip_start_time,
+                transportation_mode=segment.transportation_mode,
+                segment_count=1,
+                distance_meters=segment.distance_meters or 0.0,
+                duration_seconds=segment.duration_seconds or 0.0,
+                carbon_saved_grams=segment.carbon_saved_grams or 0.0,
+            ).negated()
+            for segment in deleted_segments
+        ]
+        result = await db.execute(
+            delete(trips)
+            .where(trips.c.id == trip_id, trips.c.user_id == user_id)
+            .returning(
+                trips.c.id,
+                trips.c.user_id,
+                trips.c.start_time,
+                trips.c.distance_meters,
+                trips.c.duration_seconds,
+                trips.c.carbon_saved_grams,
+                trips.c.points,
+            )
+        )
+        deleted = result.first()
+
+        # Un viaje que aún no se agregaba no aportó nada que descontar; su
+        # trabajo pendiente ya no lo encontrará
+        deltas, organization_ids = [], set()
+        if aggregated:
+            deltas = [TripDelta.from_trip(deleted).negated()]
+            await apply_trip_deltas(db, deltas, LedgerReason.trip_deleted)
+            organization_ids = await apply_organization_deltas(db, deltas, segment_deltas)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    await safe_update_leaderboards(deltas)
+    # Las teselas del mapa de calor que mostraban los segmentos borrados
+    await safe_invalidate_user_tiles(db, user_id, *_segment_points(deleted_segments))
+    await response_cache.safe_invalidate(
+        user_tag(user_id), *[organization_tag(organization_id) for organization_id in organization_ids]
+    )
+    return True
+
+
+async def correct_trip(
+    db: AsyncSession,
+    user_id: int,
+    trip_id: int,
+    correction: TripCorrection
+) -> bool:
+    """
+    Corrige el modo de transporte de segmentos de un viaje del usuario y
+    recalcula su carbono y sus puntos. Devuelve False si el viaje no existe.
+
+    Si el viaje ya estaba agregado, la diferencia (nuevo − anterior) se
+    aplica a totales, libro y acumulados en la misma transacción, y a las
+    tablas de posiciones después del commit. Si aún no se agregaba, su
+    trabajo pendiente leerá los valores corregidos.
+    """
+    trips = Trip.__table__
+    segments = ActivitySegment.__table__
+    modes = {segment.id: segment.transportation_mode for segment in correction.segments}
+
+    try:
+        # El bloqueo ordena la corrección con la agregación y el borrado del viaje
+        result = await db.execute(
+            select(
+                trips.c.id,
+                trips.c.user_id,
+                trips.c.start_time,
+                trips.c.distance_meters,
+                trips.c.duration_seconds,
+                trips.c.carbon_saved_grams,
+                trips.c.points,
+                trips.c.aggregated,
+            )
+            .where(trips.c.id == trip_id, trips.c.user_id == user_id)
+            .with_for_update()
+        )
+        trip = result.first()
+        if trip is None:
+            await db.rollback()
+            return False
+
+        result = await db.execute(
+            select(
+                segments.c.id,
+                segments.c.transportation_mode,
+                segments.c.distance_meters,
+                segments.c.duration_seconds,
+                segments.c.carbon_saved_grams,
+                func.ST_Y(func.geometry(segments.c.start_location)).label("start_latitude"),
+                func.ST_X(func.geometry(segments.c.start_location)).label("start_longitude"),
+                func.ST_Y(func.geometry(segments.c.end_location)).label("end_latitude"),
+                func.ST_X(func.geometry(segments.c.end_location)).label("end_longitude"),
+            )
+            .where(
+                segments.c.trip_id == trip_id,
+                segments.c.trip_start_time == trip.start_time,
+                segments.c.id.in_(list(modes)),
+            )
+        )
+        found = result.all()
+        missing = sorted(set(modes) - {row.id for row in found})
+        if missing:
+            raise ValueError(f"Segmentos que no pertenecen al viaje: {', '.join(map(str, missing))}")
+
+        changed = [row for row in found if row.transportation_mode != modes[row.id]]
+        if not changed:
+            await db.rollback()
+            return True
+
+        corrected_carbon = {row.id: carbon_saved_for(row.distance_meters or 0.0, modes[row.id]) for row in changed}
+        await db.execute(
+            update(segments)
+            .where(segments.c.id == bindparam("b_id"), segments.c.trip_start_time == bindparam("b_trip_start_time"))
+            .values(transportation_mode=bindparam("b_mode"), carbon_saved_grams=bindparam("b_carbon")),
+            [
+                {
+                    "b_id": row.id,
+                    "b_trip_start_time": trip.start_time,
+                    "b_mode": modes[row.id],
+                    "b_carbon": corrected_carbon[row.id],
+                }
+                for row in changed
+            ]
+        )
+
+        carbon_saved = (trip.carbon_saved_grams or 0.0) + sum(
+            corrected_carbon[row.id] - (row.carbon_saved_grams or 0.0) for row in changed
+        )
+        points = int(points_for_carbon(np.array([carbon_saved]))[0])
+        await db.execute(
+            update(trips)
+            .where(trips.c.id == trip_id, trips.c.start_time == trip.start_time)
+            .values(carbon_saved_grams=carbon_saved, points=points)
+        )
+
+        deltas, organization_ids = [], set()
+        if trip.aggregated:
+            previous = TripDelta.from_trip(trip)
+            deltas = [replace(previous, carbon_saved_grams=carbon_saved, points=points).difference(previous)]
+            segment_deltas = []
+            for row in changed:
+                before = SegmentDelta(
+                    user_id=user_id,
+                    trip_start_time=trip.start_time,
+                    transportation_mode=row.transportation_mode,
+                    segment_count=1,
+                    distance_meters=row.distance_meters or 0.0,
+                    duration_seconds=row.duration_seconds or 0.0,
+                    carbon_saved_grams=row.carbon_saved_grams or 0.0,
+                )
+                segment_deltas.append(before.negated())
+                segment_deltas.append(replace(
+                    before, transportation_mode=modes[row.id], carbon_saved_grams=corrected_carbon[row.id]
+                ))
+            await apply_trip_deltas(db, deltas, LedgerReason.trip_corrected)
+            organization_ids = await apply_organization_deltas(db, deltas, segment_deltas)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    await safe_update_leaderboards(deltas)
+    # El mapa de calor solo muestra algunos modos: las teselas de los
+    # segmentos corregidos pueden cambiar
+    await safe_invalidate_user_tiles(db, user_id, *_segment_points(changed))
+    await response_cache.safe_invalidate(
+        user_tag(user_id), *[organization_tag(organization_id) for organization_id in organization_ids]
+    )
+    return True
+
+
+async def aggregate_trips(
+    job_id: str,
+    user_id: int,
+    trip_keys: List[Tuple[int, datetime]],
+    inline: bool = False
+) -> None:
+    """
+    Suma los viajes ingresados a los totales del usuario, sus acumulados y
+    los de su organización, e invalida las teselas y respuestas afectadas.
+
+    Marcar `aggregated` en la misma transacción que aplica los deltas hace
+    el trabajo idempotente: un reintento solo suma los viajes que falten.
+    Lo que sigue al commit (tablas de posiciones, teselas y caché) se
+    repite en cada intento con los viajes ya agregados, así una caída
+    después del commit no lo pierde; el trabajo de tablas descarta los
+    viajes que ya sumó. Con `inline` (cola no disponible) las tablas se
+    actualizan aquí mismo.
+    """
+    trips = Trip.__table__
+    segments = ActivitySegment.__table__
+    trip_columns = (
+        trips.c.id,
+        trips.c.user_id,
+        trips.c.start_time,
+        trips.c.distance_meters,
+        trips.c.duration_seconds,
+        trips.c.carbon_saved_grams,
+        trips.c.points,
+    )
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await db.execute(
+                update(trips)
+                .where(
+                    trips.c.user_id == user_id,
+                    tuple_(trips.c.id, trips.c.start_time).in_(trip_keys),
+                    trips.c.aggregated.is_(False),
+                )
+                .values(aggregated=True)
+                .returning(*trip_columns)
+            )
+            aggregated = result.all()
+            pending = bool(aggregated)
+            if not pending:
+                # Ya agregados por un intento anterior, que pudo caer antes de
+                # terminar lo que sigue al commit: se repite con esos viajes
+                result = await db.execute(
+                    select(*trip_columns).where(
+                        trips.c.user_id == user_id,
+                        tuple_(trips.c.id, trips.c.start_time).in_(trip_keys),
+                        trips.c.aggregated.is_(True),
+                    )
+                )
+                aggregated = result.all()
+                if not aggregated:
+                    # Borrados antes de agregarse
+                    await db.rollback()
+                    return
+
+            deltas = [TripDelta.from_trip(row) for row in aggregated]
+            result = await db.execute(
+                select(
+                    segments.c.trip_start_time,
+                    segments.c.transportation_mode,
+                    segments.c.distance_meters,
+                    segments.c.duration_seconds,
+                    segments.c.carbon_saved_grams,
+                    func.ST_Y(func.geometry(segments.c.start_location)).label("start_latitude"),
+                    func.ST_X(func.geometry(segments.c.start_location)).label("start_longitude"),
+                    func.ST_Y(func.geometry(segments.c.end_location)).label("end_latitude"),
+                    func.ST_X(func.geometry(segments.c.end_location)).label("end_longitude"),
+                )
+                .where(tuple_(segments.c.trip_id, segments.c.trip_start_time).in_(
+                    [(row.id, row.start_time) for row in aggregated]
+                ))
+            )
+            segment_rows = result.all()
+
+            if pending:
+                segment_deltas = [
+                    SegmentDelta(
+                        user_id=user_id,
+                        trip_start_time=row.trip_start_time,
+                        transportation_mode=row.transportation_mode,
+                        segment_count=1,
+                        distance_meters=row.distance_meters or 0.0,
+                        duration_seconds=row.duration_seconds or 0.0,
+                        carbon_saved_grams=row.carbon_saved_grams or 0.0,
+                    )
+                    for row in segment_rows
+                ]
+                await apply_trip_deltas(db, deltas)
+                organization_ids = await apply_organization_deltas(db, deltas, segment_deltas)
+                await db.commit()
+            else:
+                result = await db.execute(
+                    select(Individual.organization_id)
+                    .where(Individual.user_id == user_id, Individual.organization_id.isnot(None))
+                )
+                organization_ids = set(result.scalars().all())
+                await db.rollback()
+        except Exception:
+            await db.rollback()
+            raise
+
+        # Las teselas del mapa de calor que contienen los segmentos nuevos
+        await safe_invalidate_user_tiles(db, user_id, *_segment_points(segment_rows))
+
+    await response_cache.safe_invalidate(
+        user_tag(user_id), *[organization_tag(organization_id) for organization_id in organization_ids]
+    )
+
+    try:
+        await enqueue(
+            LEADERBOARDS_UPDATE,
+            {"deltas": [delta.to_payload() for delta in deltas]},
+            job_id=f"{job_id}:leaderboards",
+        )
+    except Exception:
+        if not inline:
+            raise
+        await safe_update_leaderboards(deltas)
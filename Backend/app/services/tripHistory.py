@@ -0,0 +1,192 @@
+import base64
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.activitySegments import ActivitySegment
+from app.models.trips import Trip
+
+# Paginación por llave: cada página continúa después del último
+# (start_time, id) visto, así el costo no depende de cuántos viajes
+# tenga el usuario ni de qué tan atrás se esté leyendo. Las consultas
+# recorren ix_trips_user_id_start_time_id / ix_activitySegment_trip_id.
+#
+# Las páginas se arman como dicts directo de las filas, con la forma de
+# TripHistoryPage / SegmentHistoryPage, sin crear modelos de Pydantic.
+
+LOCATION_FIELDS = ("start_location", "end_location")
+TRIP_FIELDS = (
+    "end_time",
+    "start_location",
+    "end_location",
+    "distance_meters",
+    "duration_seconds",
+    "carbon_saved_grams",
+    "points",
+)
+SEGMENT_FIELDS = (
+    "end_time",
+    "start_location",
+    "end_location",
+    "distance_meters",
+    "duration_seconds",
+    "carbon_saved_grams",
+    "transportation_mode",
+)
+
+
+def encode_cursor(start_time: datetime, row_id: int) -> str:
+    payload = json.dumps([start_time.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Devuelve el (start_time, id) de un cursor o ValueError si no es válido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        start_time, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        start_time = datetime.fromisoformat(start_time)
+        if start_time.tzinfo is None or not isinstance(row_id, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    return start_time, row_id
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> List[str]:
+    """
+    Campos pedidos en `fields` (separados por comas); todos si no se indica.
+    `id` y `start_time` siempre se incluyen porque forman el cursor.
+    """
+    allowed = list(allowed)
+    if not fields:
+        return allowed
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed + ["id", "start_time"]]
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {', '.join(unknown)}")
+    return [field for field in allowed if field in requested]
+
+
+def _columns(model, fields: List[str]) -> list:
+    """
+    Columnas del SELECT; las ubicaciones solo se decodifican si se piden.
+    """
+    columns = [model.id, model.start_time]
+    for field in fields:
+        if field in LOCATION_FIELDS:
+            geometry = func.geometry(getattr(model, field))
+            columns.append(func.ST_Y(geometry).label(f"{field}_latitude"))
+            columns.append(func.ST_X(geometry).label(f"{field}_longitude"))
+        else:
+            columns.append(getattr(model, field))
+    return columns
+
+
+def _values(row, fields: List[str]) -> dict:
+    mapping = row._mapping
+    values = {"id": row.id, "start_time": row.start_time}
+    for field in fields:
+        if field in LOCATION_FIELDS:
+            latitude = mapping[f"{field}_latitude"]
+            values[field] = (
+                {"latitude": latitude, "longitude": mapping[f"{field}_longitude"]}
+                if latitude is not None else None
+            )
+        else:
+            values[field] = mapping[field]
+    return values
+
+
+def _next_cursor(rows: list, limit: int) -> Optional[str]:
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last.start_time, last.id)
+
+
+def trip_history_query(user_id: int, fields: List[str], limit: int, cursor: Optional[str] = None):
+    """
+    Página de viajes del usuario, más recientes primero. Pide una fila de
+    más para saber si hay página siguiente.
+    """
+    query = select(*_columns(Trip, fields)).where(Trip.user_id == user_id)
+    if cursor:
+        start_time, trip_id = decode_cursor(cursor)
+        # La comparación por fila usa el índice; el filtro simple sobre
+        # start_time además descarta las particiones de meses posteriores
+        query = query.where(
+            tuple_(Trip.start_time, Trip.id) < tuple_(start_time, trip_id),
+            Trip.start_time <= start_time,
+        )
+    return query.order_by(Trip.start_time.desc(), Trip.id.desc()).limit(limit + 1)
+
+
+def segment_history_query(
+    trip_id: int,
+    trip_start_time: datetime,
+    fields: List[str],
+    limit: int,
+    cursor: Optional[str] = None
+):
+    """
+    Página de segmentos de un viaje en orden cronológico. Filtrar por
+    `trip_start_time` limita la consulta a la partición del viaje.
+    """
+    query = select(*_columns(ActivitySegment, fields)).where(
+        ActivitySegment.trip_id == trip_id,
+        ActivitySegment.trip_start_time == trip_start_time,
+    )
+    if cursor:
+        start_time, segment_id = decode_cursor(cursor)
+        query = query.where(tuple_(ActivitySegment.start_time, ActivitySegment.id) > tuple_(start_time, segment_id))
+    return query.order_by(ActivitySegment.start_time, ActivitySegment.id).limit(limit + 1)
+
+
+async def get_trip_history(
+    db: AsyncSession,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+) -> dict:
+    selected = parse_fields(fields, TRIP_FIELDS)
+    result = await db.execute(trip_history_query(user_id, selected, limit, cursor))
+    rows = result.all()
+    return {
+        "trips": [_values(row, selected) for row in rows[:limit]],
+        "next_cursor": _next_cursor(rows, limit),
+    }
+
+
+async def get_trip_segments(
+    db: AsyncSession,
+    user_id: int,
+    trip_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+) -> dict:
+    selected = parse_fields(fields, SEGMENT_FIELDS)
+    result = await db.execute(
+        select(Trip.start_time).where(Trip.id == trip_id, Trip.user_id == user_id)
+    )
+    trip_start_time = result.scalar_one_or_none()
+    if trip_start_time is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Viaje no encontrado"
+        )
+
+    result = await db.execute(segment_history_query(trip_id, trip_start_time, selected, limit, cursor))
+    rows = result.all()
+    return {
+        "segments": [_values(row, selected) for row in rows[:limit]],
+        "next_cursor": _next_cursor(rows, limit),
+    }
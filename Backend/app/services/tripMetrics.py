@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from app.models.dataTypes import TransportationMode
+from app.services.traceCodec import decode_trace
+
+EARTH_RADIUS_METERS = 6371008.8
+
+# Velocidad mínima (m/s) para considerar que entre dos lecturas hubo movimiento
+MOVING_SPEED_THRESHOLD = 0.5
+
+# Emisiones de referencia de un auto particular (g CO2 / km)
+BASELINE_CAR_GRAMS_PER_KM = 192.0
+
+# Emisiones estimadas por modo de transporte (g CO2 / km)
+MODE_GRAMS_PER_KM = {
+    TransportationMode.bicycle: 0.0,
+    TransportationMode.walking: 0.0,
+    TransportationMode.public_transport: 105.0,
+    TransportationMode.other: BASELINE_CAR_GRAMS_PER_KM,
+}
+
+# Un punto por cada 100 g de CO2 ahorrados; un crédito de carbono por tonelada
+GRAMS_PER_POINT = 100.0
+GRAMS_PER_CARBON_CREDIT = 1_000_000.0
+
+_MODE_INDEX = {mode: index for index, mode in enumerate(TransportationMode)}
+_SAVED_GRAMS_PER_METER = np.array([
+    max(BASELINE_CAR_GRAMS_PER_KM - MODE_GRAMS_PER_KM[mode], 0.0) / 1000.0
+    for mode in TransportationMode
+])
+
+
+@dataclass
+class TrackBatch:
+    """
+    Lecturas GPS de varios segmentos concatenadas en arreglos planos.
+
+    `lengths[i]` es el número de lecturas del segmento i; sus lecturas
+    ocupan `lengths[i]` posiciones consecutivas de `latitudes`,
+    `longitudes` y `timestamps` (segundos epoch).
+    """
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    timestamps: np.ndarray
+    lengths: np.ndarray
+    modes: np.ndarray
+
+    @classmethod
+    def from_tracks(
+        cls,
+        tracks: Sequence[tuple],
+        modes: Sequence[TransportationMode]
+    ) -> "TrackBatch":
+        """
+        Construye el lote a partir de tuplas (latitudes, longitudes, timestamps).
+        """
+        lengths = np.fromiter((len(track[0]) for track in tracks), dtype=np.int64, count=len(tracks))
+        if len(tracks):
+            latitudes, longitudes, timestamps = (
+                np.concatenate([np.asarray(track[axis], dtype=np.float64) for track in tracks])
+                for axis in range(3)
+            )
+        else:
+            latitudes = longitudes = timestamps = np.empty(0, dtype=np.float64)
+        return cls(
+            latitudes=latitudes,
+            longitudes=longitudes,
+            timestamps=timestamps,
+            lengths=lengths,
+            modes=np.fromiter((_MODE_INDEX[mode] for mode in modes), dtype=np.int64, count=len(modes)),
+        )
+
+    @classmethod
+    def from_traces(
+        cls,
+        traces: Sequence[bytes],
+        modes: Sequence[TransportationMode]
+    ) -> "TrackBatch":
+        """
+        Construye el lote a partir de trazas guardadas en `activitySegment.trace`.
+        """
+        return cls.from_tracks([decode_trace(trace) for trace in traces], modes)
+
+    @property
+    def point_count(self) -> int:
+        return int(self.latitudes.shape[0])
+
+
+@dataclass
+class SegmentMetrics:
+    distance_meters: np.ndarray
+    duration_seconds: np.ndarray
+    carbon_saved_grams: np.ndarray
+
+
+def haversine_meters(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray
+) -> np.ndarray:
+    """
+    Distancia de gran círculo entre pares de puntos (grados) en metros.
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(values) for values in (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) * 0.5) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) * 0.5) ** 2
+    )
+    return 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def compute_segment_metrics(batch: TrackBatch) -> SegmentMetrics:
+    """
+    Calcula distancia, tiempo en movimiento y carbono ahorrado de todos los
+    segmentos del lote en una sola pasada vectorizada.
+    """
+    segment_count = batch.lengths.shape[0]
+    if batch.point_count < 2:
+        zeros = np.zeros(segment_count)
+        return SegmentMetrics(zeros, zeros.copy(), zeros.copy())
+
+    step_distance = haversine_meters(
+        batch.latitudes[:-1], batch.longitudes[:-1],
+        batch.latitudes[1:], batch.longitudes[1:]
+    )
+    step_seconds = np.diff(batch.timestamps)
+
+    # El paso k une la lectura k con la k+1; los pasos que cruzan de un
+    # segmento al siguiente no cuentan
+    starts = np.cumsum(batch.lengths) - batch.lengths
+    inner_starts = starts[1:]
+    boundaries = inner_starts[(inner_starts > 0) & (inner_starts < batch.point_count)] - 1
+    step_distance[boundaries] = 0.0
+    step_seconds[boundaries] = 0.0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moving = (step_seconds > 0) & (step_distance / step_seconds >= MOVING_SPEED_THRESHOLD)
+    moving_seconds = np.where(moving, step_seconds, 0.0)
+
+    step_segment = np.repeat(np.arange(segment_count), batch.lengths)[:-1]
+    distance = np.bincount(step_segment, weights=step_distance, minlength=segment_count)
+    duration = np.bincount(step_segment, weights=moving_seconds, minlength=segment_count)
+    carbon_saved = distance * _SAVED_GRAMS_PER_METER[batch.modes]
+
+    return SegmentMetrics(distance, duration, carbon_saved)
+
+
+def rollup_trip_metrics(
+    metrics: SegmentMetrics,
+    segment_trip_index: np.ndarray,
+    trip_count: int
+) -> SegmentMetrics:
+    """
+    Suma las métricas de los segmentos en su viaje padre.
+    """
+    return SegmentMetrics(*(
+        np.bincount(segment_trip_index, weights=values, minlength=trip_count)
+        for values in (
+            metrics.distance_meters,
+            metrics.duration_seconds,
+            metrics.carbon_saved_grams,
+        )
+    ))
+
+
+def carbon_saved_for(distance_meters: float, mode: TransportationMode) -> float:
+    """
+    Carbono ahorrado por un segmento ya medido con el modo indicado; sirve
+    para recalcularlo cuando se corrige el modo.
+    """
+    return float(distance_meters * _SAVED_GRAMS_PER_METER[_MODE_INDEX[TransportationMode(mode)]])
+
+
+def points_for_carbon(carbon_saved_grams: np.ndarray) -> np.ndarray:
+    """
+    Puntos otorgados por el carbono ahorrado en cada viaje.
+    """
+    return np.floor(carbon_saved_grams / GRAMS_PER_POINT).astype(np.int64)
+
+
+def carbon_credits_for(carbon_saved_grams: float) -> float:
+    """
+    Créditos de carbono equivalentes a los gramos ahorrados.
+    """
+    return carbon_saved_grams / GRAMS_PER_CARBON_CREDIT
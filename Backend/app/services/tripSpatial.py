@@ -0,0 +1,178 @@
+import json
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dataTypes import TripAnchor
+from app.models.trips import Trip
+from app.schemas.trip import Location, PolygonQuery
+from app.services.trip import to_wkt
+
+# Todas las consultas filtran por user_id y una condición espacial sobre la
+# misma columna, de modo que usan los índices GiST compuestos
+# ix_trips_user_id_start_location / ix_trips_user_id_end_location
+#
+# Los resultados son dicts con la forma de TripSummary armados desde las
+# filas; pueden ser cientos por consulta y no necesitan validarse de nuevo.
+
+
+def anchor_column(anchor: TripAnchor):
+    return Trip.start_location if anchor == TripAnchor.start else Trip.end_location
+
+
+def _point(location: Location):
+    return func.ST_GeogFromText(to_wkt(location))
+
+
+def _trip_query(user_id: int, distance=None):
+    columns = [
+        Trip.id,
+        Trip.start_time,
+        Trip.end_time,
+        func.ST_Y(func.geometry(Trip.start_location)).label("start_latitude"),
+        func.ST_X(func.geometry(Trip.start_location)).label("start_longitude"),
+        func.ST_Y(func.geometry(Trip.end_location)).label("end_latitude"),
+        func.ST_X(func.geometry(Trip.end_location)).label("end_longitude"),
+        Trip.distance_meters,
+        Trip.duration_seconds,
+        Trip.carbon_saved_grams,
+        Trip.points,
+    ]
+    if distance is not None:
+        columns.append(distance.label("distance_to_point_meters"))
+    return select(*columns).where(Trip.user_id == user_id)
+
+
+def trip_summary(row) -> dict:
+    """
+    Fila de `_trip_query` con la forma de TripSummary.
+    """
+    return {
+        "id": row.id,
+        "start_time": row.start_time,
+        "end_time": row.end_time,
+        "start_location": {"latitude": row.start_latitude, "longitude": row.start_longitude},
+        "end_location": (
+            {"latitude": row.end_latitude, "longitude": row.end_longitude}
+            if row.end_latitude is not None else None
+        ),
+        "distance_meters": row.distance_meters or 0.0,
+        "duration_seconds": row.duration_seconds or 0.0,
+        "carbon_saved_grams": row.carbon_saved_grams or 0.0,
+        "points": row.points or 0,
+        "distance_to_point_meters": row._mapping.get("distance_to_point_meters"),
+    }
+
+
+async def _fetch(db: AsyncSession, query) -> List[dict]:
+    result = await db.execute(query)
+    return [trip_summary(row) for row in result]
+
+
+def near_query(user_id: int, point: Location, radius_meters: float, anchor: TripAnchor, limit: int):
+    """
+    Viajes del usuario a menos de `radius_meters` del punto, del más cercano al más lejano.
+    """
+    column = anchor_column(anchor)
+    target = _point(point)
+    return (
+        _trip_query(user_id, func.ST_Distance(column, target))
+        .where(func.ST_DWithin(column, target, radius_meters))
+        .order_by(column.op("<->")(target))
+        .limit(limit)
+    )
+
+
+def nearest_query(user_id: int, point: Location, anchor: TripAnchor, limit: int):
+    """
+    Los `limit` viajes del usuario más cercanos al punto (KNN sobre el índice GiST).
+    """
+    column = anchor_column(anchor)
+    target = _point(point)
+    return (
+        _trip_query(user_id, func.ST_Distance(column, target))
+        .where(column.isnot(None))
+        .order_by(column.op("<->")(target))
+        .limit(limit)
+    )
+
+
+def bbox_query(
+    user_id: int,
+    west: float,
+    south: float,
+    east: float,
+    north: float,
+    anchor: TripAnchor,
+    limit: int
+):
+    """
+    Viajes del usuario dentro de un rectángulo de coordenadas, más recientes primero.
+
+    Los bordes del rectángulo se interpretan como geodésicas (geography);
+    no se admiten cajas que crucen el antimeridiano.
+    """
+    if west >= east or south >= north:
+        raise ValueError("La caja debe cumplir west < east y south < north")
+    column = anchor_column(anchor)
+    envelope = func.geography(func.ST_MakeEnvelope(west, south, east, north, 4326))
+    return (
+        _trip_query(user_id)
+        .where(func.ST_Intersects(column, envelope))
+        .order_by(Trip.start_time.desc(), Trip.id.desc())
+        .limit(limit)
+    )
+
+
+def polygon_query(user_id: int, polygon: PolygonQuery):
+    """
+    Viajes del usuario dentro de un polígono GeoJSON, más recientes primero.
+    """
+    column = anchor_column(polygon.anchor)
+    geojson = json.dumps({"type": polygon.type, "coordinates": polygon.coordinates})
+    area = func.geography(func.ST_SetSRID(func.ST_GeomFromGeoJSON(geojson), 4326))
+    return (
+        _trip_query(user_id)
+        .where(func.ST_Intersects(column, area))
+        .order_by(Trip.start_time.desc(), Trip.id.desc())
+        .limit(polygon.limit)
+    )
+
+
+async def trips_near(
+    db: AsyncSession,
+    user_id: int,
+    point: Location,
+    radius_meters: float,
+    anchor: TripAnchor,
+    limit: int
+) -> List[dict]:
+    return await _fetch(db, near_query(user_id, point, radius_meters, anchor, limit))
+
+
+async def nearest_trips(
+    db: AsyncSession,
+    user_id: int,
+    point: Location,
+    anchor: TripAnchor,
+    limit: int
+) -> List[dict]:
+    return await _fetch(db, nearest_query(user_id, point, anchor, limit))
+
+
+async def trips_in_bbox(
+    db: AsyncSession,
+    user_id: int,
+    west: float,
+    south: float,
+    east: float,
+    north: float,
+    anchor: TripAnchor,
+    limit: int
+) -> List[dict]:
+    return await _fetch(db, bbox_query(user_id, west, south, east, north, anchor, limit))
+
+
+async def trips_in_polygon(db: AsyncSession, user_id: int, polygon: PolygonQuery) -> List[dict]:
+    return await _fetch(db, polygon_query(user_id, polygon))
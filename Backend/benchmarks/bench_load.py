@@ -0,0 +1,374 @@
+"""
+Prueba de carga de la API con mezclas de tráfico realistas.
+
+Lanza `--concurrency` usuarios virtuales que, durante `--duration`
+segundos, eligen acciones según el escenario: registros
+(`/individuals/register`), logins (`/individuals/login`), renovación de
+tokens (`/auth/refresh`) y cargas de viajes (`/trips/batch`). Reporta
+por ruta el rendimiento (peticiones/s) y la latencia p50/p95/p99.
+
+Por defecto corre en el mismo proceso contra `app.main:app` (con su
+lifespan: workers de trabajos, asentamiento del libro, etc.) y necesita
+Postgres+PostGIS y Redis locales; con --base-url apunta a un servidor ya
+levantado. Usar una base de datos desechable: los usuarios creados
+(prefijo bench-load-) se borran solo con --cleanup.
+
+Con --save se guarda el resultado como línea base en JSON y con
+--compare se compara contra una línea base anterior; el comando termina
+con código 1 si el p95 o el p99 de alguna ruta empeoró más de
+--tolerance.
+
+Uso:
+    python -m benchmarks.bench_load --scenario mixed --duration 60 --concurrency 50
+    python -m benchmarks.bench_load --scenario signup-storm --save baseline.json
+    python -m benchmarks.bench_load --compare baseline.json --tolerance 0.15
+    python -m benchmarks.bench_load --cleanup
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from sqlalchemy import text
+
+from app.core.database import AsyncSessionLocal, engine
+
+EMAIL_PREFIX = "bench-load-"
+PASSWORD = "benchmark-password"
+CENTER_LATITUDE = 19.4
+CENTER_LONGITUDE = -99.1
+
+# Pesos relativos de cada acción por escenario
+SCENARIOS = {
+    "mixed": {"signup": 1, "login": 2, "refresh": 4, "upload": 3},
+    "signup-storm": {"signup": 1},
+    "login-burst": {"login": 1},
+    "refresh-churn": {"refresh": 1},
+    "trip-upload": {"upload": 1},
+}
+
+ROUTES = {
+    "signup": "POST /individuals/register",
+    "login": "POST /individuals/login",
+    "refresh": "POST /auth/refresh",
+    "upload": "POST /trips/batch",
+}
+
+
+class VirtualUser:
+    def __init__(self, email: str, access_token: str, refresh_token: str) -> None:
+        self.email = email
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+
+    def update_tokens(self, body: dict) -> None:
+        self.access_token = body["access_token"]
+        self.refresh_token = body["refresh_token"]
+
+
+class Recorder:
+    """
+    Latencias (ms) y códigos de estado por ruta, fuera del calentamiento.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errors: Dict[str, int] = defaultdict(int)
+        # Instante (perf_counter) a partir del cual se mide; lo anterior es calentamiento
+        self.measure_from = float("inf")
+
+    def add(self, route: str, started: float, status: Optional[int]) -> None:
+        if started < self.measure_from:
+            return
+        self.latencies[route].append((time.perf_counter() - started) * 1000)
+        if status is None:
+            self.errors[route] += 1
+        else:
+            self.statuses[route][status] += 1
+            if status >= 400:
+                self.errors[route] += 1
+
+    def summary(self, seconds: float) -> Dict[str, dict]:
+        report = {}
+        for route, samples in sorted(self.latencies.items()):
+            values = np.asarray(samples)
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            report[route] = {
+                "requests": len(samples),
+                "throughput": round(len(samples) / seconds, 2),
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(values.max()), 2),
+                "errors": self.errors[route],
+                "statuses": {str(code): count for code, count in sorted(self.statuses[route].items())},
+            }
+        return report
+
+
+def trip_batch(rng: random.Random, trips: int, segments: int, points: int) -> dict:
+    """
+    Lote sintético de viajes con segmentos y trazas GPS alrededor de la CDMX.
+    """
+    now = datetime.now(timezone.utc)
+    batch = []
+    for _ in range(trips):
+        start = now - timedelta(days=rng.uniform(0, 30))
+        latitude = CENTER_LATITUDE + rng.uniform(-0.3, 0.3)
+        longitude = CENTER_LONGITUDE + rng.uniform(-0.3, 0.3)
+        trip_segments = []
+        segment_start = start
+        for _ in range(segments):
+            latitudes = (latitude + np.cumsum(np.full(points, 2e-5))).round(7).tolist()
+            longitudes = (longitude + np.cumsum(np.full(points, 2e-5))).round(7).tolist()
+            timestamps = (segment_start.timestamp() + np.arange(points) * 5.0).tolist()
+            segment_end = segment_start + timedelta(seconds=5 * (points - 1))
+            trip_segments.append({
+                "start_time": segment_start.isoformat(),
+                "end_time": segment_end.isoformat(),
+                "start_location": {"latitude": latitudes[0], "longitude": longitudes[0]},
+                "end_location": {"latitude": latitudes[-1], "longitude": longitudes[-1]},
+                "transportation_mode": rng.choice(["bicycle", "walking", "public_transport"]),
+                "track": {"latitudes": latitudes, "longitudes": longitudes, "timestamps": timestamps},
+            })
+            latitude, longitude, segment_start = latitudes[-1], longitudes[-1], segment_end
+        batch.append({
+            "start_time": start.isoformat(),
+            "end_time": segment_start.isoformat(),
+            "start_location": trip_segments[0]["start_location"],
+            "end_location": trip_segments[-1]["end_location"],
+            "segments": trip_segments,
+        })
+    return {"trips": batch}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+        self.client = client
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.recorder = Recorder()
+        # Cada usuario lo usa un solo worker a la vez: dos renovaciones
+        # simultáneas del mismo refresh token cerrarían la sesión
+        self.pool: asyncio.Queue = asyncio.Queue()
+        self.signups = 0
+
+    def next_email(self) -> str:
+        self.signups += 1
+        return f"{EMAIL_PREFIX}{self.run_id}-{self.signups}@bench.example.com"
+
+    async def request(self, action: str, path: str, body: dict, token: Optional[str] = None):
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        start = time.perf_counter()
+        try:
+            response = await self.client.post(path, json=body, headers=headers)
+        except httpx.HTTPError:
+            self.recorder.add(ROUTES[action], start, None)
+            return None
+        self.recorder.add(ROUTES[action], start, response.status_code)
+        return response
+
+    async def signup(self) -> Optional[VirtualUser]:
+        email = self.next_email()
+        response = await self.request(
+            "signup",
+            "/individuals/register",
+            {"email": email, "password": PASSWORD, "full_name": "Benchmark"},
+        )
+        if response is None or response.status_code != 200:
+            return None
+        body = response.json()
+        return VirtualUser(email, body["access_token"], body["refresh_token"])
+
+    async def prepare(self) -> None:
+        """
+        Registra el grupo inicial de usuarios (no cuenta en las métricas).
+        """
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def one() -> None:
+            async with semaphore:
+                user = await self.signup()
+                if user:
+                    self.pool.put_nowait(user)
+
+        await asyncio.gather(*(one() for _ in range(self.args.users)))
+        if self.pool.empty():
+            raise RuntimeError("No se pudo registrar ningún usuario; ¿están arriba Postgres y Redis?")
+
+    async def act(self, action: str, rng: random.Random) -> None:
+        if action == "signup":
+            user = await self.signup()
+            if user:
+                self.pool.put_nowait(user)
+            return
+
+        user = await self.pool.get()
+        try:
+            if action == "login":
+                response = await self.request(
+                    "login", "/individuals/login", {"email": user.email, "password": PASSWORD}
+                )
+            elif action == "refresh":
+                response = await self.request("refresh", "/auth/refresh", {"refresh_token": user.refresh_token})
+            else:
+                body = trip_batch(rng, self.args.trips_per_batch, self.args.segments, self.args.points)
+                response = await self.request("upload", "/trips/batch", body, token=user.access_token)
+            if response is not None and response.status_code == 200 and action != "upload":
+                user.update_tokens(response.json())
+        finally:
+            self.pool.put_nowait(user)
+
+    async def worker(self, seed: int, deadline: float) -> None:
+        rng = random.Random(seed)
+        weights = SCENARIOS[self.args.scenario]
+        actions, action_weights = list(weights), list(weights.values())
+        while time.perf_counter() < deadline:
+            await self.act(rng.choices(actions, action_weights)[0], rng)
+
+    async def run(self) -> Dict[str, dict]:
+        await self.prepare()
+        self.recorder.measure_from = time.perf_counter() + self.args.warmup
+        deadline = self.recorder.measure_from + self.args.duration
+        await asyncio.gather(*(
+            self.worker(self.args.seed + index, deadline) for index in range(self.args.concurrency)
+        ))
+        return self.recorder.summary(time.perf_counter() - self.recorder.measure_from)
+
+
+async def cleanup() -> None:
+    """
+    Borra de Postgres los usuarios de carga y todo lo que generaron. Las
+    tablas de posiciones de Redis se limpian con rebuild_leaderboards.
+    """
+    bench_users = "SELECT id FROM users WHERE email LIKE :pattern"
+    pattern = {"pattern": f"{EMAIL_PREFIX}%"}
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(
+            'DELETE FROM "activitySegment" WHERE trip_id IN '
+            f"(SELECT id FROM trips WHERE user_id IN ({bench_users}))"
+        ), pattern)
+        for table in ("trips", '"userActivityRollups"', '"pointsLedger"', '"authTokens"', "individuals"):
+            await db.execute(text(f"DELETE FROM {table} WHERE user_id IN ({bench_users})"), pattern)
+        await db.execute(text("DELETE FROM users WHERE email LIKE :pattern"), pattern)
+        await db.commit()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict[str, dict]) -> None:
+    print(f"{'ruta':<28}{'peticiones':>11}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for route, stats in report.items():
+        print(
+            f"{route:<28}{stats['requests']:>11}{stats['throughput']:>9.1f}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['errors']:>9}"
+        )
+
+
+def compare(report: Dict[str, dict], baseline: dict, tolerance: float) -> bool:
+    """
+    Imprime la variación contra la línea base; False si alguna ruta empeoró
+    su p95 o p99 más de `tolerance` (fracción).
+    """
+    print(f"\ncomparación contra {baseline.get('commit') or 'línea base'} ({baseline['created_at']})")
+    ok = True
+    for route, stats in report.items():
+        previous = baseline["routes"].get(route)
+        if previous is None:
+            print(f"{route:<28} sin línea base")
+            continue
+        changes = []
+        for metric in ("throughput", "p50_ms", "p95_ms", "p99_ms"):
+            before, after = previous[metric], stats[metric]
+            change = (after - before) / before if before else 0.0
+            changes.append(f"{metric} {before:.1f} -> {after:.1f} ({change:+.0%})")
+            if metric in ("p95_ms", "p99_ms") and change > tolerance:
+                ok = False
+        print(f"{route:<28} " + "  ".join(changes))
+    print("sin regresiones" if ok else f"REGRESIÓN: latencia por encima de la tolerancia ({tolerance:.0%})")
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--duration", type=float, default=30, help="Segundos medidos")
+    parser.add_argument("--warmup", type=float, default=5, help="Segundos iniciales sin medir")
+    parser.add_argument("--concurrency", type=int, default=20, help="Usuarios virtuales simultáneos")
+    parser.add_argument("--users", type=int, default=50, help="Usuarios registrados antes de medir")
+    parser.add_argument("--trips-per-batch", type=int, default=20)
+    parser.add_argument("--segments", type=int, default=3, help="Segmentos por viaje")
+    parser.add_argument("--points", type=int, default=60, help="Lecturas GPS por segmento")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="Servidor ya levantado; por defecto, en proceso vía ASGI")
+    parser.add_argument("--save", help="Guardar el resultado como línea base JSON")
+    parser.add_argument("--compare", help="Línea base JSON contra la cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--cleanup", action="store_true", help="Borrar los usuarios de carga y salir")
+    args = parser.parse_args()
+
+    try:
+        if args.cleanup:
+            await cleanup()
+            return 0
+
+        if args.base_url:
+            async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+                report = await LoadTest(client, args).run()
+        else:
+            from app.main import app
+
+            transport = httpx.ASGITransport(app=app)
+            async with app.router.lifespan_context(app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                    report = await LoadTest(client, args).run()
+    finally:
+        await engine.dispose()
+
+    print_report(report)
+
+    result = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "scenario": args.scenario,
+        "parameters": {
+            key: getattr(args, key)
+            for key in ("duration", "warmup", "concurrency", "users", "trips_per_batch", "segments", "points", "seed")
+        },
+        "target": args.base_url or "asgi",
+        "routes": report,
+    }
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(result, file, indent=2)
+        print(f"\nlínea base guardada en {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline.get("scenario") != args.scenario or baseline.get("parameters") != result["parameters"]:
+            print("\naviso: la línea base usó otro escenario o parámetros")
+        if not compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,150 @@
+"""
+Verifica que las consultas de historial y de reportes solo lean las
+particiones mensuales que cubre su rango de fechas.
+
+Usa los datos sintéticos de `bench_spatial_queries` (ejecutar antes su
+--setup). Para cada consulta muestra con EXPLAIN las particiones que se
+recorren y termina con error si alguna lee más meses de los necesarios.
+
+Uso:
+    python -m benchmarks.bench_partition_pruning [--days 30] [--months 1]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Date, cast, func, literal_column, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.activitySegments import ActivitySegment
+from app.models.individual import Individual
+from app.models.trips import Trip
+from app.services.partitions import PARTITIONED_TABLES, add_months, month_start
+from benchmarks.bench_spatial_queries import EMAIL_PREFIX
+
+
+def history_query(user_id: int, since: datetime):
+    """
+    Historial reciente de un usuario, como lo pagina la app.
+    """
+    return (
+        select(Trip.id, Trip.start_time, Trip.distance_meters, Trip.points)
+        .where(Trip.user_id == user_id, Trip.start_time >= since)
+        .order_by(Trip.start_time.desc(), Trip.id.desc())
+        .limit(50)
+    )
+
+
+def org_report_query(organization_id: int, start: datetime, end: datetime):
+    """
+    Reporte diario por modo de transporte de los miembros de una organización.
+    """
+    day = cast(func.date_trunc(literal_column("'day'"), func.timezone(literal_column("'UTC'"), Trip.start_time)), Date)
+    return (
+        select(
+            day.label("day"),
+            ActivitySegment.transportation_mode,
+            func.count(func.distinct(Trip.id)).label("trips"),
+            func.coalesce(func.sum(ActivitySegment.carbon_saved_grams), 0).label("carbon_saved_grams"),
+        )
+        .select_from(Trip)
+        .join(Individual, Individual.user_id == Trip.user_id)
+        .join(
+            ActivitySegment,
+            (ActivitySegment.trip_id == Trip.id) & (ActivitySegment.trip_start_time == Trip.start_time)
+        )
+        .where(
+            Individual.organization_id == organization_id,
+            Trip.start_time >= start,
+            Trip.start_time < end,
+            ActivitySegment.trip_start_time >= start,
+            ActivitySegment.trip_start_time < end,
+        )
+        .group_by(day, ActivitySegment.transportation_mode)
+    )
+
+
+def scanned_partitions(plan: dict) -> set:
+    found = set()
+    relation = plan.get("Relation Name") or ""
+    if any(relation.startswith(f"{table}_") for table, _ in PARTITIONED_TABLES):
+        found.add(relation)
+    for child in plan.get("Plans", []):
+        found |= scanned_partitions(child)
+    return found
+
+
+def months_between(start: datetime, end: datetime) -> int:
+    months = 0
+    month = month_start(start)
+    while month < end.date():
+        months += 1
+        month = add_months(month, 1)
+    return months
+
+
+async def check(db, name: str, query, months: int, tables: int) -> bool:
+    """
+    Cada tabla puede leer los meses del rango y, si el rango cae fuera de
+    las particiones creadas, su partición por defecto.
+    """
+    # Parámetros con nombre: las fechas no se pueden renderizar como literales
+    compiled = query.compile(dialect=postgresql.dialect(paramstyle="named"))
+    start = time.perf_counter()
+    plan = (await db.execute(
+        text(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}"), compiled.params
+    )).scalar()[0]["Plan"]
+    elapsed = (time.perf_counter() - start) * 1000
+    partitions = scanned_partitions(plan)
+    allowed = (months + 1) * tables
+    ok = len(partitions) <= allowed
+    print(f"{name:>8}: {len(partitions)} particiones (máximo {allowed}), {elapsed:.2f} ms")
+    for partition in sorted(partitions):
+        print(f"          {partition}")
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=30, help="Días de historial del usuario")
+    parser.add_argument("--months", type=int, default=1, help="Meses del reporte de la organización")
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            user_id = (await db.execute(
+                text("SELECT id FROM users WHERE email LIKE :pattern ORDER BY id LIMIT 1"),
+                {"pattern": f"{EMAIL_PREFIX}%"}
+            )).scalar()
+            if user_id is None:
+                print("No hay datos de benchmark; ejecuta primero bench_spatial_queries --setup")
+                return 1
+            organization_id = (await db.execute(
+                select(Individual.organization_id)
+                .where(Individual.organization_id.isnot(None))
+                .limit(1)
+            )).scalar() or 0
+
+            now = datetime.now(timezone.utc)
+            since = now - timedelta(days=args.days)
+            report_end = datetime.combine(add_months(month_start(now), 1), datetime.min.time(), timezone.utc)
+            report_start = datetime.combine(
+                add_months(month_start(now), -args.months + 1), datetime.min.time(), timezone.utc
+            )
+
+            history_ok = await check(
+                db, "history", history_query(user_id, since), months_between(since, now + timedelta(days=1)), 1
+            )
+            report_ok = await check(
+                db, "report", org_report_query(organization_id, report_start, report_end), args.months, 2
+            )
+        return 0 if history_ok and report_ok else 1
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,104 @@
+"""
+Benchmark del registro de usuarios individuales contra Postgres.
+
+Compara el camino anterior (SELECT del email, dos flush, commit y dos
+refresh) con la inserción en una sola sentencia de
+`create_user_with_profile`. El hash de la contraseña se calcula una vez y
+se reutiliza, y no se abren sesiones en Redis: ambos caminos comparten
+ese costo, así que solo se mide la parte de base de datos.
+
+Uso:
+    python -m benchmarks.bench_registration --signups 500 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete, select
+
+from app.core.database import AsyncSessionLocal, QueryCounter, engine
+from app.core.security import get_password_hash
+from app.models.dataTypes import UserType
+from app.models.individual import Individual
+from app.models.user import User
+from app.repositories.user import create_user_with_profile
+
+
+async def legacy_signup(email: str, hashed_password: str) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(User).where(User.email == email))
+        if result.scalar_one_or_none():
+            raise RuntimeError("email duplicado")
+        db_user = User(email=email, hashed_password=hashed_password, type=UserType.individual)
+        db.add(db_user)
+        await db.flush()
+        db_individual = Individual(user_id=db_user.id, full_name="Benchmark")
+        db.add(db_individual)
+        await db.flush()
+        await db.commit()
+        await db.refresh(db_user)
+        await db.refresh(db_individual)
+
+
+async def single_statement_signup(email: str, hashed_password: str) -> None:
+    async with AsyncSessionLocal() as db:
+        created = await create_user_with_profile(
+            db,
+            email=email,
+            hashed_password=hashed_password,
+            user_type=UserType.individual,
+            profile_model=Individual,
+            profile_values={"full_name": "Benchmark"},
+        )
+        if created is None:
+            raise RuntimeError("email duplicado")
+        await db.commit()
+
+
+async def run(signup, prefix: str, hashed_password: str, signups: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            await signup(f"{prefix}-{index}@bench.local", hashed_password)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(signups)))
+    return time.perf_counter() - start
+
+
+async def cleanup(prefix: str) -> None:
+    async with AsyncSessionLocal() as db:
+        user_ids = select(User.id).where(User.email.like(f"{prefix}-%"))
+        await db.execute(delete(Individual).where(Individual.user_id.in_(user_ids)))
+        await db.execute(delete(User).where(User.email.like(f"{prefix}-%")))
+        await db.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--signups", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    hashed_password = await get_password_hash("benchmark-password")
+    paths = (("anterior", legacy_signup), ("una sentencia", single_statement_signup))
+
+    try:
+        for name, signup in paths:
+            prefix = f"bench-{uuid.uuid4().hex[:8]}"
+            with QueryCounter() as counter:
+                await signup(f"{prefix}-probe@bench.local", hashed_password)
+            elapsed = await run(signup, prefix, hashed_password, args.signups, args.concurrency)
+            await cleanup(prefix)
+            print(
+                f"{name:>14}: {counter.count} sentencias por registro  "
+                f"{args.signups / elapsed:,.0f} registros/s"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+"""
+Benchmark de las consultas espaciales de viajes contra Postgres/PostGIS.
+
+Con --setup genera usuarios y viajes sintéticos alrededor de la Ciudad de
+México (por defecto 10M viajes repartidos entre 10k usuarios). Después
+revisa con EXPLAIN que ninguna consulta recorra `trips` con Seq Scan y
+mide la latencia (p50/p95/p99) de cada una.
+
+Uso:
+    python -m benchmarks.bench_spatial_queries --setup --trips 10000000 --users 10000
+    python -m benchmarks.bench_spatial_queries --queries 200
+    python -m benchmarks.bench_spatial_queries --cleanup
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.dataTypes import TripAnchor
+from app.schemas.trip import Location, PolygonQuery
+from app.services.tripSpatial import bbox_query, near_query, nearest_query, polygon_query
+
+EMAIL_PREFIX = "bench-spatial-"
+CENTER_LATITUDE = 19.4
+CENTER_LONGITUDE = -99.1
+SPREAD_DEGREES = 0.6
+USERS_PER_CHUNK = 200
+
+
+async def setup(trips: int, users: int) -> None:
+    per_user = max(1, trips // users)
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            text(
+                "INSERT INTO users (email, hashed_password, type) "
+                "SELECT :prefix || g || '@bench.local', '!bench', 'individual' "
+                "FROM generate_series(1, :users) AS g "
+                "ON CONFLICT (email) DO NOTHING"
+            ),
+            {"prefix": EMAIL_PREFIX, "users": users}
+        )
+        await db.commit()
+        user_ids = (await db.execute(
+            text("SELECT id FROM users WHERE email LIKE :pattern ORDER BY id"),
+            {"pattern": f"{EMAIL_PREFIX}%"}
+        )).scalars().all()
+
+    for start in range(0, len(user_ids), USERS_PER_CHUNK):
+        chunk = user_ids[start:start + USERS_PER_CHUNK]
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                text(
+                    "INSERT INTO trips (user_id, start_time, end_time, start_location, end_location, "
+                    "distance_meters, duration_seconds, carbon_saved_grams, points) "
+                    "SELECT u.id, t.start_time, t.start_time + interval '20 minutes', "
+                    "ST_SetSRID(ST_MakePoint(:lon + (random() - 0.5) * :spread, "
+                    ":lat + (random() - 0.5) * :spread), 4326)::geography, "
+                    "ST_SetSRID(ST_MakePoint(:lon + (random() - 0.5) * :spread, "
+                    ":lat + (random() - 0.5) * :spread), 4326)::geography, "
+                    "3000, 1200, 576, 5 "
+                    "FROM unnest(CAST(:user_ids AS integer[])) AS u(id) "
+                    "CROSS JOIN LATERAL ("
+                    "  SELECT now() - random() * interval '365 days' AS start_time "
+                    "  FROM generate_series(1, :per_user)"
+                    ") AS t"
+                ),
+                {
+                    "user_ids": list(chunk),
+                    "per_user": per_user,
+                    "lat": CENTER_LATITUDE,
+                    "lon": CENTER_LONGITUDE,
+                    "spread": SPREAD_DEGREES,
+                }
+            )
+            await db.commit()
+        print(f"usuarios {start + len(chunk)}/{len(user_ids)}", end="\r", flush=True)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("ANALYZE trips"))
+        await db.commit()
+    print(f"\n{len(user_ids) * per_user} viajes generados")
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        bench_users = "SELECT id FROM users WHERE email LIKE :pattern"
+        await db.execute(text(f"DELETE FROM trips WHERE user_id IN ({bench_users})"), {"pattern": f"{EMAIL_PREFIX}%"})
+        await db.execute(text("DELETE FROM users WHERE email LIKE :pattern"), {"pattern": f"{EMAIL_PREFIX}%"})
+        await db.commit()
+
+
+def random_point(rng: random.Random) -> Location:
+    return Location(
+        latitude=CENTER_LATITUDE + (rng.random() - 0.5) * SPREAD_DEGREES,
+        longitude=CENTER_LONGITUDE + (rng.random() - 0.5) * SPREAD_DEGREES,
+    )
+
+
+def build_queries(user_id: int, rng: random.Random) -> dict:
+    point = random_point(rng)
+    half = 0.02
+    ring = [
+        [point.longitude - half, point.latitude - half],
+        [point.longitude + half, point.latitude - half],
+        [point.longitude, point.latitude + half],
+        [point.longitude - half, point.latitude - half],
+    ]
+    return {
+        "near": near_query(user_id, point, 2000, TripAnchor.start, 100),
+        "nearest": nearest_query(user_id, point, TripAnchor.start, 10),
+        "bbox": bbox_query(
+            user_id,
+            point.longitude - half, point.latitude - half,
+            point.longitude + half, point.latitude + half,
+            TripAnchor.end, 100
+        ),
+        "polygon": polygon_query(user_id, PolygonQuery(coordinates=[ring])),
+    }
+
+
+def seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def check_plans(db, queries: dict) -> bool:
+    ok = True
+    for name, query in queries.items():
+        sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        plan = (await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))).scalar()[0]["Plan"]
+        scans = seq_scans(plan)
+        status = "Seq Scan en " + ", ".join(scans) if scans else "usa índices"
+        print(f"{name:>8}: {status}")
+        ok = ok and not scans
+    return ok
+
+
+async def measure(queries_per_type: int, seed: int) -> bool:
+    rng = random.Random(seed)
+    async with AsyncSessionLocal() as db:
+        user_ids = (await db.execute(
+            text("SELECT id FROM users WHERE email LIKE :pattern"),
+            {"pattern": f"{EMAIL_PREFIX}%"}
+        )).scalars().all()
+        if not user_ids:
+            print("No hay datos de benchmark; ejecuta primero con --setup")
+            return False
+
+        plans_ok = await check_plans(db, build_queries(rng.choice(user_ids), rng))
+
+        timings = {name: [] for name in build_queries(user_ids[0], rng)}
+        for _ in range(queries_per_type):
+            for name, query in build_queries(rng.choice(user_ids), rng).items():
+                start = time.perf_counter()
+                (await db.execute(query)).all()
+                timings[name].append((time.perf_counter() - start) * 1000)
+
+    for name, samples in timings.items():
+        quantiles = statistics.quantiles(samples, n=100)
+        print(
+            f"{name:>8}: p50 {quantiles[49]:.2f} ms  p95 {quantiles[94]:.2f} ms  "
+            f"p99 {quantiles[98]:.2f} ms"
+        )
+    return plans_ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setup", action="store_true")
+    parser.add_argument("--cleanup", action="store_true")
+    parser.add_argument("--trips", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        if args.cleanup:
+            await cleanup()
+            return 0
+        if args.setup:
+            await setup(args.trips, args.users)
+        return 0 if await measure(args.queries, args.seed) else 1
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,141 @@
+"""
+Benchmark del formato compacto de trazas GPS frente a una fila por lectura.
+
+Mide la velocidad de codificación/decodificación y los bytes por lectura.
+Con --database además carga las mismas trazas en dos tablas temporales
+(bytea por segmento y una fila PostGIS por lectura) y compara su tamaño
+real en disco, índices incluidos.
+
+Uso:
+    python -m benchmarks.bench_trace_codec --segments 2000 --points 600
+    python -m benchmarks.bench_trace_codec --segments 200 --points 600 --database
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from app.models.dataTypes import TransportationMode
+from app.services.traceCodec import decode_trace, encode_trace
+from app.services.tripMetrics import TrackBatch, compute_segment_metrics
+from benchmarks.bench_trip_metrics import build_tracks
+
+# Fila típica de una tabla (segment_id int4, seq int4, recorded_at
+# timestamptz, location geography(POINT)): cabecera de tupla 24 B,
+# apuntador 4 B, columnas 48 B, más ~20 B de índice btree y ~40 B de GiST
+ESTIMATED_ROW_BYTES = 24 + 4 + 48 + 20 + 40
+
+
+def bench_codec(tracks: list, repeat: int) -> list:
+    encode_timings, decode_timings = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        traces = [encode_trace(*track) for track in tracks]
+        encode_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for trace in traces:
+            decode_trace(trace)
+        decode_timings.append(time.perf_counter() - start)
+
+    points = sum(len(track[0]) for track in tracks)
+    trace_bytes = sum(len(trace) for trace in traces)
+    print(f"lecturas: {points}  segmentos: {len(tracks)}")
+    print(f"codificar:   {points / min(encode_timings):,.0f} lecturas/s")
+    print(f"decodificar: {points / min(decode_timings):,.0f} lecturas/s")
+    print(
+        f"traza: {trace_bytes / points:.2f} B/lectura  "
+        f"fila por lectura (estimado): {ESTIMATED_ROW_BYTES} B/lectura  "
+        f"-> {ESTIMATED_ROW_BYTES * points / trace_bytes:.1f}x"
+    )
+
+    modes = [TransportationMode.walking] * len(traces)
+    start = time.perf_counter()
+    compute_segment_metrics(TrackBatch.from_traces(traces, modes))
+    print(f"métricas desde trazas: {(time.perf_counter() - start) * 1000:.1f} ms")
+    return traces
+
+
+async def bench_database(tracks: list, traces: list) -> None:
+    from app.core.database import engine
+
+    async with engine.begin() as connection:
+        await connection.execute(text(
+            "CREATE TEMP TABLE bench_trace_rows ("
+            " segment_id integer, seq integer, recorded_at timestamptz,"
+            " location geography(POINT, 4326), PRIMARY KEY (segment_id, seq))"
+        ))
+        await connection.execute(text(
+            "CREATE INDEX ON bench_trace_rows USING gist (location)"
+        ))
+        await connection.execute(text(
+            "CREATE TEMP TABLE bench_trace_blobs (segment_id integer PRIMARY KEY, trace bytea)"
+        ))
+        await connection.execute(text(
+            "ALTER TABLE bench_trace_blobs ALTER COLUMN trace SET STORAGE EXTERNAL"
+        ))
+
+        for segment_id, ((latitudes, longitudes, timestamps), trace) in enumerate(zip(tracks, traces)):
+            await connection.execute(
+                text(
+                    "INSERT INTO bench_trace_rows "
+                    "SELECT :segment_id, p.seq, to_timestamp(p.ts), "
+                    "ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326)::geography "
+                    "FROM unnest(CAST(:lat AS float8[]), CAST(:lon AS float8[]), CAST(:ts AS float8[])) "
+                    "WITH ORDINALITY AS p(lat, lon, ts, seq)"
+                ),
+                {
+                    "segment_id": segment_id,
+                    "lat": latitudes.tolist(),
+                    "lon": longitudes.tolist(),
+                    "ts": timestamps.tolist(),
+                }
+            )
+            await connection.execute(
+                text("INSERT INTO bench_trace_blobs VALUES (:segment_id, :trace)"),
+                {"segment_id": segment_id, "trace": trace}
+            )
+
+        sizes = {}
+        for table in ("bench_trace_rows", "bench_trace_blobs"):
+            sizes[table] = (await connection.execute(
+                text(f"SELECT pg_total_relation_size('{table}')")
+            )).scalar()
+
+        start = time.perf_counter()
+        await connection.execute(text(
+            "SELECT segment_id, array_agg(location ORDER BY seq) FROM bench_trace_rows GROUP BY segment_id"
+        ))
+        rows_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        result = await connection.execute(text("SELECT trace FROM bench_trace_blobs"))
+        for (trace,) in result:
+            decode_trace(trace)
+        blobs_seconds = time.perf_counter() - start
+
+        await connection.execute(text("DROP TABLE bench_trace_rows, bench_trace_blobs"))
+    await engine.dispose()
+
+    rows, blobs = sizes["bench_trace_rows"], sizes["bench_trace_blobs"]
+    print(f"postgres fila por lectura: {rows:,} B  lectura completa {rows_seconds * 1000:.1f} ms")
+    print(f"postgres traza bytea:      {blobs:,} B  lectura completa {blobs_seconds * 1000:.1f} ms")
+    print(f"-> {rows / blobs:.1f}x menos almacenamiento")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--segments", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--database", action="store_true")
+    args = parser.parse_args()
+
+    tracks, _ = build_tracks(args.segments, args.points)
+    traces = bench_codec(tracks, args.repeat)
+    if args.database:
+        asyncio.run(bench_database(tracks, traces))
+
+
+if __name__ == "__main__":
+    main()
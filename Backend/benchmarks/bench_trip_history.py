@@ -0,0 +1,96 @@
+"""
+Compara la latencia del historial de viajes paginado por llave contra
+OFFSET/LIMIT a distintas profundidades.
+
+Usa los datos sintéticos de `bench_spatial_queries` (ejecutar antes su
+--setup con suficientes viajes por usuario). Recorre el historial del
+usuario con más viajes página por página y mide cada página con ambos
+métodos: con cursor la latencia debe mantenerse plana, con OFFSET crece
+con la profundidad.
+
+Uso:
+    python -m benchmarks.bench_trip_history [--page-size 50] [--pages 2000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.trips import Trip
+from app.models.user import User
+from app.services.tripHistory import TRIP_FIELDS, encode_cursor, trip_history_query
+from benchmarks.bench_spatial_queries import EMAIL_PREFIX
+
+# Lista sin ubicaciones: la proyección que usan las vistas de lista
+LIST_FIELDS = [field for field in TRIP_FIELDS if field not in ("start_location", "end_location")]
+
+
+async def timed(db, query, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = (await db.execute(query)).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), rows
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=2000, help="Máximo de páginas a recorrer")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(Trip.user_id, func.count().label("trips"))
+                .where(Trip.user_id.in_(select(User.id).where(User.email.like(f"{EMAIL_PREFIX}%"))))
+                .group_by(Trip.user_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            )).first()
+            if row is None:
+                print("No hay datos de benchmark; ejecuta primero bench_spatial_queries --setup")
+                return 1
+            print(f"usuario {row.user_id}: {row.trips} viajes")
+
+            # Muestrear ~10 profundidades repartidas en el historial
+            total_pages = min(args.pages, -(-row.trips // args.page_size))
+            checkpoints = sorted({0, *range(0, total_pages, max(1, total_pages // 10)), total_pages - 1})
+
+            keyset, offset = [], []
+            cursor = None
+            for page in range(total_pages):
+                query = trip_history_query(row.user_id, LIST_FIELDS, args.page_size, cursor)
+                repeat = args.repeat if page in checkpoints else 1
+                elapsed, rows = await timed(db, query, repeat)
+                if page in checkpoints:
+                    keyset.append((page, elapsed))
+                    offset_query = (
+                        select(*[Trip.id, Trip.start_time] + [getattr(Trip, field) for field in LIST_FIELDS])
+                        .where(Trip.user_id == row.user_id)
+                        .order_by(Trip.start_time.desc(), Trip.id.desc())
+                        .offset(page * args.page_size)
+                        .limit(args.page_size)
+                    )
+                    offset.append((await timed(db, offset_query, args.repeat))[0])
+                if len(rows) <= args.page_size:
+                    break
+                last = rows[args.page_size - 1]
+                cursor = encode_cursor(last.start_time, last.id)
+    finally:
+        await engine.dispose()
+
+    print(f"{'página':>8} {'cursor ms':>10} {'offset ms':>10}")
+    for (page, keyset_ms), offset_ms in zip(keyset, offset):
+        print(f"{page:>8} {keyset_ms:>10.2f} {offset_ms:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,50 @@
+"""
+Benchmark del motor de métricas de viajes.
+
+Uso:
+    python -m benchmarks.bench_trip_metrics --segments 2000 --points 500
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.models.dataTypes import TransportationMode
+from app.services.tripMetrics import TrackBatch, compute_segment_metrics
+
+
+def build_tracks(segments: int, points: int, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    modes = list(TransportationMode)
+    tracks = []
+    for _ in range(segments):
+        latitudes = 19.4 + np.cumsum(rng.normal(0, 2e-5, points))
+        longitudes = -99.1 + np.cumsum(rng.normal(0, 2e-5, points))
+        timestamps = 1_700_000_000 + np.arange(points, dtype=np.float64)
+        tracks.append((latitudes, longitudes, timestamps))
+    return tracks, [modes[i % len(modes)] for i in range(segments)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--segments", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tracks, modes = build_tracks(args.segments, args.points)
+    total_points = args.segments * args.points
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        compute_segment_metrics(TrackBatch.from_tracks(tracks, modes))
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(f"segmentos: {args.segments}  puntos: {total_points}")
+    print(f"mejor: {best * 1000:.1f} ms  ->  {total_points / best:,.0f} puntos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Serialización de listas de viajes de 1k a 50k elementos.
+
+Compara el camino anterior (modelos de Pydantic por fila, validación del
+`response_model` y JSONResponse con json.dumps) con el actual: dicts
+armados desde las filas con `trip_summary` y escritos con orjson.
+"""
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.core.responses import dumps
+from app.schemas.trip import Location, TripListResponse, TripSummary
+from app.services.tripSpatial import trip_summary
+
+SIZES = [1_000, 10_000, 50_000]
+
+_Row = namedtuple("_Row", [
+    "id", "start_time", "end_time", "start_latitude", "start_longitude", "end_latitude",
+    "end_longitude", "distance_meters", "duration_seconds", "carbon_saved_grams", "points",
+])
+
+
+class Row(_Row):
+    """
+    Sustituto de una fila de SQLAlchemy: atributos y `_mapping`.
+    """
+
+    @property
+    def _mapping(self) -> dict:
+        return self._asdict()
+
+
+def make_rows(count: int) -> list:
+    start = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    return [
+        Row(
+            id=i,
+            start_time=start - timedelta(minutes=i),
+            end_time=start - timedelta(minutes=i) + timedelta(seconds=900),
+            start_latitude=19.4326 + i * 1e-6,
+            start_longitude=-99.1332 - i * 1e-6,
+            end_latitude=19.4400 + i * 1e-6,
+            end_longitude=-99.1400 - i * 1e-6,
+            distance_meters=4200.5,
+            duration_seconds=900.0,
+            carbon_saved_grams=512.25,
+            points=42,
+        )
+        for i in range(count)
+    ]
+
+
+def previous_path(rows: list) -> bytes:
+    trips = [
+        TripSummary(
+            id=row.id,
+            start_time=row.start_time,
+            end_time=row.end_time,
+            start_location=Location(latitude=row.start_latitude, longitude=row.start_longitude),
+            end_location=Location(latitude=row.end_latitude, longitude=row.end_longitude),
+            distance_meters=row.distance_meters,
+            duration_seconds=row.duration_seconds,
+            carbon_saved_grams=row.carbon_saved_grams,
+            points=row.points,
+        )
+        for row in rows
+    ]
+    # FastAPI vuelca el modelo, lo valida contra el response_model y lo
+    # convierte con jsonable_encoder antes de json.dumps
+    content = TripListResponse(trips=trips).model_dump()
+    validated = TripListResponse.model_validate(content)
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode("utf-8")
+
+
+def row_path(rows: list) -> bytes:
+    return dumps({"trips": [trip_summary(row) for row in rows]})
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size // 1000}k")
+def rows(request):
+    return make_rows(request.param)
+
+
+@pytest.mark.benchmark(group="list-serialize")
+def bench_pydantic_response_model(benchmark, rows):
+    benchmark(previous_path, rows)
+
+
+@pytest.mark.benchmark(group="list-serialize")
+def bench_orjson_from_rows(benchmark, rows):
+    benchmark(row_path, rows)
+
+
+@pytest.mark.benchmark(group="list-serialize")
+def bench_orjson_dumps_only(benchmark, rows):
+    # Solo la escritura: el costo que queda cuando los dicts ya están armados
+    payload = {"trips": [trip_summary(row) for row in rows]}
+    benchmark(dumps, payload)
@@ -0,0 +1,57 @@
+"""
+Costo por petición del middleware de métricas.
+
+Compara una aplicación ASGI mínima con y sin `MetricsMiddleware`; la
+diferencia entre ambos es lo que agrega la instrumentación a cada
+petición (objetivo: menos de 50 µs).
+"""
+import asyncio
+
+import pytest
+
+from app.core.metrics import MetricsMiddleware, record_query, registry
+
+SCOPE = {"type": "http", "method": "GET", "path": "/trips", "headers": []}
+
+
+class _Route:
+    path = "/trips"
+
+
+async def endpoint(scope, receive, send):
+    # Lo que hace el router al resolver la ruta, y una sentencia SQL
+    scope["route"] = _Route
+    record_query(0.001)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+@pytest.fixture(scope="module")
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.benchmark(group="metrics")
+def bench_request_without_metrics(benchmark, loop):
+    benchmark(lambda: loop.run_until_complete(endpoint(dict(SCOPE), receive, send)))
+
+
+@pytest.mark.benchmark(group="metrics")
+def bench_request_with_metrics(benchmark, loop):
+    app = MetricsMiddleware(endpoint)
+    benchmark(lambda: loop.run_until_complete(app(dict(SCOPE), receive, send)))
+
+
+@pytest.mark.benchmark(group="metrics")
+def bench_render(benchmark):
+    benchmark(registry.render)
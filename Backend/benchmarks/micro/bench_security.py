@@ -0,0 +1,80 @@
+"""
+Costo de CPU de los tokens JWT y de bcrypt por petición.
+
+El algoritmo y la llave salen de ALGORITHM y SECRET_KEY, igual que en la
+API: correr con otro valor (por ejemplo ALGORITHM=HS512) y comparar con
+--benchmark-compare muestra su efecto en peticiones por núcleo (columna
+OPS).
+"""
+import secrets
+
+import pytest
+
+from app.core.data import RefreshTokenInformation, TokenInformation
+from app.core.hashing import _hash, _verify
+from app.core.security import (
+    create_access_token, create_refresh_token, refresh_tokens_action, token_cache, verify_token
+)
+from app.models.dataTypes import UserType
+
+PASSWORD = "benchmark-password"
+
+
+@pytest.fixture(scope="module")
+def access_payload():
+    return TokenInformation(id=42, type=UserType.individual, sid=secrets.token_urlsafe(16)).model_dump()
+
+
+@pytest.fixture(scope="module")
+def refresh_token():
+    return create_refresh_token(
+        RefreshTokenInformation(id=42, type=UserType.individual, sid=secrets.token_urlsafe(16)).model_dump()
+    )
+
+
+@pytest.fixture(scope="module")
+def password_hash():
+    return _hash(PASSWORD)
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_create_access_token(benchmark, access_payload):
+    benchmark(create_access_token, access_payload)
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_create_refresh_token(benchmark, access_payload):
+    benchmark(create_refresh_token, access_payload)
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_verify_token_uncached(benchmark, access_payload):
+    # Sin caché: cada ronda decodifica y verifica la firma
+    token = create_access_token(access_payload)
+
+    def verify():
+        token_cache.clear()
+        return verify_token(token)
+
+    benchmark(verify)
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_verify_token_cached(benchmark, access_payload):
+    token = create_access_token(access_payload)
+    verify_token(token)
+    benchmark(verify_token, token)
+    token_cache.clear()
+
+
+@pytest.mark.benchmark(group="jwt")
+def bench_refresh_tokens_action(benchmark, refresh_token):
+    benchmark(refresh_tokens_action, refresh_token)
+
+
+@pytest.mark.benchmark(group="bcrypt")
+def bench_verify_password(benchmark, password_hash):
+    # Con el costo configurado en pwd_context cada verificación tarda
+    # cientos de ms: pocas rondas bastan
+    result = benchmark.pedantic(_verify, args=(PASSWORD, password_hash), rounds=10, iterations=1, warmup_rounds=1)
+    assert result
@@ -0,0 +1,61 @@
+"""
+Validación y serialización con Pydantic de las respuestas de registro y
+login, y el camino que sigue FastAPI para convertirlas en JSON.
+"""
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.individual import IndividualUserResponse
+from app.schemas.organization import OrganizationResponse
+
+# Largo típico de los tokens que emite la API
+TOKEN = "e" * 220
+
+INDIVIDUAL = {
+    "id": 42,
+    "email": "persona@example.com",
+    "type": "individual",
+    "full_name": "Persona de Prueba",
+    "created_at": datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc),
+    "access_token": TOKEN,
+    "refresh_token": TOKEN,
+}
+
+ORGANIZATION = {
+    "id": 7,
+    "email": "org@example.com",
+    "type": "organization",
+    "name": "Organización de Prueba",
+    "package_type": "pro",
+    "created_at": datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc),
+    "access_token": TOKEN,
+    "refresh_token": TOKEN,
+}
+
+SCHEMAS = [
+    pytest.param(IndividualUserResponse, INDIVIDUAL, id="individual"),
+    pytest.param(OrganizationResponse, ORGANIZATION, id="organization"),
+]
+
+
+@pytest.mark.benchmark(group="pydantic-validate")
+@pytest.mark.parametrize("schema, data", SCHEMAS)
+def bench_validate(benchmark, schema, data):
+    benchmark(schema.model_validate, data)
+
+
+@pytest.mark.benchmark(group="pydantic-serialize")
+@pytest.mark.parametrize("schema, data", SCHEMAS)
+def bench_model_dump_json(benchmark, schema, data):
+    benchmark(schema.model_validate(data).model_dump_json)
+
+
+@pytest.mark.benchmark(group="pydantic-serialize")
+@pytest.mark.parametrize("schema, data", SCHEMAS)
+def bench_jsonable_encoder(benchmark, schema, data):
+    # Lo que hace JSONResponse con un modelo: jsonable_encoder y json.dumps
+    model = schema.model_validate(data)
+    benchmark(lambda: json.dumps(jsonable_encoder(model)).encode("utf-8"))